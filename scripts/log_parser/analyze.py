@@ -10,7 +10,23 @@ VPS 로그 통합 분석 스크립트
   python analyze.py logs/SESSION_ID/ --stuck              # 멈춘 차량 탐지
   python analyze.py logs/SESSION_ID/ --transfers          # 반송 현황 요약
   python analyze.py logs/SESSION_ID/ --veh 13 --raw       # 원시 레코드 출력
+  python analyze.py logs/SESSION_ID/ --vehs 41 108        # 여러 차량 타임라인 (시간순 interleave)
   python analyze.py logs/SESSION_ID/ --deadlock --pair 41 108 --node 260  # deadlock 분석
+  python analyze.py logs/SESSION_ID/ --find-deadlocks                  # 전 차량 wait-for cycle 자동 탐지 → --pair 후보
+  python analyze.py logs/SESSION_ID/ --lock-node 215 --where "wait_ms > 1000"   # 필터 표현식
+  python analyze.py logs/SESSION_ID/ --build-replay                    # snapshot → columnar replay store
+  python analyze.py logs/SESSION_ID/ --ratio-jump                      # 전 차량 점프/역주행 감지
+  python analyze.py logs/SESSION_ID/ --compact-snapshot                # snapshot → .dsnap 보관 포맷
+  python analyze.py logs/SESSION_ID/ --overview --sample-ms 60000     # 1분 단위 fleet 개요 (LOD pyramid)
+  python analyze.py logs/SESSION_ID/ --stops --limit 10                # stopReason / edge / 차량별 정지 시간
+  python analyze.py logs/SESSION_ID/ --edge-occupancy                  # edge 별 최대 대기열
+  python analyze.py logs/SESSION_ID/ --edge-occupancy 246              # edge 246 점유 추이
+  python analyze.py logs/SESSION_ID/ --stuck --no-cache                # 세션 캐시 (.analyze_cache/) 우회
+  python analyze.py logs/SESSION_ID/ --clear-cache                     # 세션 캐시 삭제
+  python analyze.py logs/SESSION_ID/ --report all                      # 요약/stuck/transfers/lock_detail/checkpoint 한 번에
+  python analyze.py logs/SESSION_ID/ --shell                           # 대화형 — 세션을 메모리에 두고 명령 반복
+  python analyze.py logs/SESSION_ID/ --serve &                         # daemon (Unix socket)
+  python analyze.py logs/SESSION_ID/ --veh 13 --remote                 # daemon 에 보내 실행
 """
 
 import argparse
@@ -22,7 +38,12 @@ from collections import defaultdict
 # 바이너리 파싱은 log_parser 에 일원화 (중복 제거 — 단일 파서)
 from log_parser import (parse_file as lp_parse_file,
                         iter_file as lp_iter_file,
-                        FILE_SUFFIX_TO_TYPES)
+                        iter_batches,
+                        parse_file_array,
+                        records_from_array,
+                        format_stop_reason,
+                        COLUMNS, EVENT_TYPES, FILE_SUFFIX_TO_TYPES, HAS_NUMPY)
+from stream_stats import SummaryStats
 
 # 가변 블록(snapshot) 은 절대 dict list 로 안 올림 — 항상 streaming.
 # route 는 가변이지만 작아서 parse_file 로 통째 로드.
@@ -63,7 +84,10 @@ def load_session(session_dir: Path,
                  needed: Optional[set] = None,
                  veh_filter: Optional[int] = None,
                  ts_from: int = 0,
-                 ts_to: Optional[int] = None) -> dict[str, list[dict]]:
+                 ts_to: Optional[int] = None,
+                 jobs: int = 1,
+                 where=None,
+                 cache: bool = True) -> dict[str, list[dict]]:
     """세션 .bin 파일 로드. {suffix: [records]} 반환.
 
     메모리 안전 (큰 세션에서 WSL OOM 회피):
@@ -73,8 +97,14 @@ def load_session(session_dir: Path,
       - 고정 크기 파일은 lp_iter_file 로 streaming 파싱 후 즉시 필터 —
         checkpoint(수백 MB, 수백만 레코드) 도 매칭 레코드만 메모리에 남음.
       - veh_filter / ts 범위를 파싱 단계에서 적용 → peak 메모리 = raw bytes.
+      - ts 범위가 있으면 .tsidx sidecar 로 해당 구간만 decode (ts_index.py).
+      - veh_filter 가 있으면 .vehidx sidecar 로 그 차량 레코드만 gather (veh_index.py).
+      - jobs > 1 이면 고정 크기 파일을 process pool 로 병렬 decode (parallel_load.py).
+      - where (where_expr.Predicate) 는 array 단계에서 boolean mask 로 적용.
+      - cache 면 세션 캐시 (session_cache.py) 의 컬럼 .npy 에서 필터 컬럼만 읽어 mask —
+        첫 실행에서 생성, 이후 실행은 sidecar / 병렬 decode 없이 이 경로.
     """
-    result = {}
+    files = []
     for f in sorted(session_dir.glob('*.bin')):
         suffix = _file_suffix(f)
         if suffix is None:
@@ -83,10 +113,64 @@ def load_session(session_dir: Path,
             continue
         if suffix == 'snapshot':
             continue  # streaming 전용 — 절대 통째 로드 안 함
+        files.append((f, suffix))
+
+    tables = {}
+    if cache and HAS_NUMPY:
+        from session_cache import load_table
+        for f, suffix in files:
+            table = load_table(f, FILE_SUFFIX_TO_TYPES[suffix][0])
+            if table is not None:
+                tables[f] = table
+
+    decoded = {}
+    if jobs > 1 and HAS_NUMPY:
+        from parallel_load import decode_files_parallel
+        decoded = decode_files_parallel([f for f, sfx in files
+                                         if sfx not in _VARIABLE_SUFFIXES and f not in tables],
+                                        jobs, veh_filter=veh_filter,
+                                        ts_from=(ts_from if ts_to is not None else None), ts_to=ts_to)
 
-        if suffix in _VARIABLE_SUFFIXES:
+    result = {}
+    for f, suffix in files:
+        etype = FILE_SUFFIX_TO_TYPES[suffix][0]
+        # --where 가 참조하는 컬럼이 없는 파일은 필터 없이 통과 (타임라인 등 다른 소스 유지)
+        pred = where if where is not None and where.applies_to(COLUMNS[etype]) else None
+        arr = None
+        records = None
+        if f in tables:
+            # 세션 캐시: 필터가 참조하는 컬럼만 읽어 mask 한 번
+            import numpy as np
+            table = tables[f]
+            keep = np.ones(len(table), dtype=bool)
+            if veh_filter is not None:
+                keep &= table['veh_id'] == veh_filter
+            if ts_to is not None and 'ts' in table.columns:
+                keep &= (table['ts'] >= ts_from) & (table['ts'] <= ts_to)
+            # route 의 edges 는 CSR 이라 mask 불가 — 그 술어만 dict 단계에서
+            by_row = pred is not None and not pred.applies_to(table.columns)
+            if pred is not None and not by_row:
+                keep &= pred.mask(table)
+            records = table.take(keep).records()
+            if by_row:
+                records = [r for r in records if pred.matches(r)]
+        elif f in decoded:
+            arr = decoded[f]
+        elif suffix in _VARIABLE_SUFFIXES:
             # route: 가변 블록이지만 작음 — 통째 로드
             records = lp_parse_file(f)
+            if pred is not None:
+                records = [r for r in records if pred.matches(r)]
+        elif veh_filter is not None and HAS_NUMPY:
+            # 차량 질의: .vehidx posting 으로 그 차량 레코드만 gather
+            from veh_index import read_vehicle
+            arr = read_vehicle(f, veh_filter, ts_from if ts_to is not None else None, ts_to)
+        elif ts_to is not None and HAS_NUMPY and 'ts' in COLUMNS[etype]:
+            # 시간 구간 질의: sparse ts index 로 구간만 decode + 벡터 필터
+            from ts_index import read_ts_range
+            arr = read_ts_range(f, ts_from, ts_to)
+        elif pred is not None and HAS_NUMPY:
+            arr = parse_file_array(f)
         else:
             # 고정 크기 파일: streaming 파싱 + 즉시 필터
             records = []
@@ -95,11 +179,19 @@ def load_session(session_dir: Path,
                     continue
                 if ts_to is not None and 'ts' in r and not (ts_from <= r['ts'] <= ts_to):
                     continue
+                if pred is not None and not pred.matches(r):
+                    continue
                 records.append(r)
 
+        if arr is not None:
+            if pred is not None:
+                arr = arr[pred.mask(arr)]
+            records = records_from_array(arr, etype)
+
         if records:
             result[suffix] = records
-            print(f"  loaded {f.name}: {len(records):,} records")
+            note = '' if where is None or pred is not None else '  (--where 미적용: 컬럼 없음)'
+            print(f"  loaded {f.name}: {len(records):,} records{note}")
     return result
 
 
@@ -119,7 +211,7 @@ def _needed_suffixes(args) -> Optional[set]:
         return {'edge_transit'}
     if args.transfers:
         return {'path', 'edge_transit', 'replay'}
-    if args.veh is not None:  # vehicle_timeline / raw
+    if args.veh is not None or args.vehs:  # vehicle_timeline / raw
         return {'edge_transit', 'path', 'replay', 'transfer', 'lock', 'checkpoint'}
     return None
 
@@ -131,6 +223,12 @@ def fmt_ts(ms: int) -> str:
     return f"{m:02d}:{sec:02d}.{rem:03d}"
 
 
+def find_snapshot_files(session_dir: Path) -> list[Path]:
+    """세션 snapshot — *_snapshot.bin, 없으면 보관용 *_snapshot.dsnap (compact_snapshot.py)."""
+    return (sorted(session_dir.glob('*_snapshot.bin'))
+            or sorted(session_dir.glob('*_snapshot.dsnap')))
+
+
 def fmt_ms(ms: int) -> str:
     if ms < 1000:
         return f"{ms}ms"
@@ -141,8 +239,22 @@ def fmt_ms(ms: int) -> str:
 # 분석 기능
 # ==============================================================================
 
-def cmd_summary(session_dir: Path):
-    """세션 전체 요약 — 파일별 streaming 집계 (O(1) 메모리, 큰 세션 안전)."""
+def _print_summary_line(suffix: str, cnt: int, ts_min, ts_max, n: int):
+    """cmd_summary 한 줄 — snapshot 은 n=peakV, 나머지는 n=고유 차량 수."""
+    t_range = f"{fmt_ts(ts_min)} ~ {fmt_ts(ts_max)}" if ts_min is not None else "?"
+    if suffix == 'snapshot':
+        print(f"  {suffix:<15} {cnt:>9,} frames   peakV={n:>4}  time={t_range}")
+    else:
+        print(f"  {suffix:<15} {cnt:>9,} records  vehs={n:>4}  time={t_range}")
+
+
+def cmd_summary(session_dir: Path, jobs: int = 1, cache: bool = True):
+    """세션 전체 요약 — 파일별 streaming 집계 (O(1) 메모리, 큰 세션 안전).
+
+    파일은 SummaryStats 로 한 번만 훑음. jobs > 1 이면 큰 파일을 chunk 로 나눠
+    process pool 에서 집계 후 merge. cache 면 고정 크기 파일은 세션 캐시 meta 의
+    요약 줄을 그대로 씀 (session_cache.py — 첫 실행에서 생성).
+    """
     from snapshot_streaming import iter_snapshot_frames
 
     print("\n=== Session Summary ===")
@@ -151,142 +263,138 @@ def cmd_summary(session_dir: Path):
         print("  (.bin 파일 없음)")
         return
 
+    cached = {}
+    if cache and HAS_NUMPY:
+        from session_cache import cached_summary
+        for f in files:
+            suffix = _file_suffix(f)
+            if suffix is None or suffix == 'snapshot':
+                continue
+            row = cached_summary(f, FILE_SUFFIX_TO_TYPES[suffix][0])
+            if row is not None:
+                cached[f] = (suffix, *row)
+
+    if jobs > 1 and HAS_NUMPY:
+        from parallel_load import summarize_files_parallel
+        targets = [f for f in files if _file_suffix(f) is not None and f not in cached]
+        cached.update(zip(targets, summarize_files_parallel(targets, jobs)))
+        for f in files:
+            if f in cached:
+                _print_summary_line(*cached[f])
+        return
+
     for f in files:
         suffix = _file_suffix(f)
         if suffix is None:
             continue
-
-        cnt = 0
-        ts_min = ts_max = None
-        veh_ids = set()
+        if f in cached:
+            _print_summary_line(*cached[f])
+            continue
 
         if suffix == 'snapshot':
             # 가변 블록 — frame 만 streaming 으로 카운트 (vehicle dict 안 만듦)
-            peak_v = 0
+            cnt, peak_v = 0, 0
+            ts_min = ts_max = None
             for fr in iter_snapshot_frames(f):
                 cnt += 1
                 peak_v = max(peak_v, fr['num_v'])
                 ts_min = fr['ts'] if ts_min is None else min(ts_min, fr['ts'])
                 ts_max = fr['ts'] if ts_max is None else max(ts_max, fr['ts'])
-            t_range = f"{fmt_ts(ts_min)} ~ {fmt_ts(ts_max)}" if ts_min is not None else "?"
-            print(f"  {suffix:<15} {cnt:>9,} frames   peakV={peak_v:>4}  time={t_range}")
+            _print_summary_line(suffix, cnt, ts_min, ts_max, peak_v)
             continue
 
-        records = lp_parse_file(f) if suffix in _VARIABLE_SUFFIXES else lp_iter_file(f)
-        for r in records:
-            cnt += 1
-            if 'ts' in r:
-                ts = r['ts']
-                ts_min = ts if ts_min is None else min(ts_min, ts)
-                ts_max = ts if ts_max is None else max(ts_max, ts)
-            if 'veh_id' in r:
-                veh_ids.add(r['veh_id'])
-        t_range = f"{fmt_ts(ts_min)} ~ {fmt_ts(ts_max)}" if ts_min is not None else "?"
-        print(f"  {suffix:<15} {cnt:>9,} records  vehs={len(veh_ids):>4}  time={t_range}")
-
-
-def cmd_vehicle_timeline(data: dict, veh_id: int, ts_from: int, ts_to: int):
-    """차량 타임라인: edge 이동 + path 할당 + job state + lock 병합"""
-    events = []  # (ts, kind, data)
-
-    # Edge transit
-    for r in data.get('edge_transit', []):
-        if r['veh_id'] != veh_id: continue
-        if not (ts_from <= r['ts'] <= ts_to): continue
-        events.append((r['ts'], 'EDGE', r))
-
-    # Path 할당
-    for r in data.get('path', []):
-        if r['veh_id'] != veh_id: continue
-        if not (ts_from <= r['ts'] <= ts_to): continue
-        events.append((r['ts'], 'PATH', r))
-
-    # Replay snapshot (job state 추적용)
-    last_job = -1
-    for r in data.get('replay', []):
-        if r['veh_id'] != veh_id: continue
-        if not (ts_from <= r['ts'] <= ts_to): continue
-        jstate = r.get('status', -1)  # status field in replay = job state? check field
-        # replay snapshot: ts veh_id x y z edge_idx ratio speed status
-        events.append((r['ts'], 'SNAP', r))
-
-    # DEV_TRANSFER
-    for r in data.get('transfer', []):
-        if r['veh_id'] != veh_id: continue
-        if not (ts_from <= r['ts'] <= ts_to): continue
-        events.append((r['ts'], 'XFER', r))
-
-    # Lock (REQ/WAIT/GRANT/RELEASE)
-    for r in data.get('lock', []):
-        if r['veh_id'] != veh_id: continue
-        if not (ts_from <= r['ts'] <= ts_to): continue
-        events.append((r['ts'], 'LOCK', r))
-
-    # Checkpoint events
-    for r in data.get('checkpoint', []):
-        if r['veh_id'] != veh_id: continue
-        if not (ts_from <= r['ts'] <= ts_to): continue
-        events.append((r['ts'], 'CP', r))
-
-    if not events:
-        print(f"  No events for veh {veh_id} in [{fmt_ts(ts_from)} ~ {fmt_ts(ts_to)}]")
-        return
-
-    events.sort(key=lambda x: x[0])
-
-    print(f"\n=== Vehicle {veh_id} Timeline ===")
-    print(f"  Events: {len(events)}\n")
-
-    cur_job = -1
-    for ts, kind, r in events:
-        prefix = f"  [{fmt_ts(ts)}]"
-
-        if kind == 'EDGE':
-            dur = r['exit_ts'] - r['enter_ts']
-            print(f"{prefix} EDGE_TRANSIT  edge={r['edge_id']:>4}  dur={fmt_ms(dur):>8}  len={r['edge_len']:>5.1f}m")
-
-        elif kind == 'PATH':
-            print(f"{prefix} PATH_ASSIGNED dest_edge={r['dest_edge']:>4}  path_len={r['path_len']}")
-
-        elif kind == 'SNAP':
-            job = r.get('status', -1)
-            if job != cur_job:
-                jname = JOB_STATE_NAMES.get(job, str(job))
-                print(f"{prefix} JOB_STATE     → {jname} ({job})  edge={r.get('edge_idx','?')}  ratio={r.get('ratio',0):.3f}  spd={r.get('speed',0):.1f}")
-                cur_job = job
+        if HAS_NUMPY:
+            # batch 단위 벡터 집계 — 레코드별 dict 없이 메모리 일정
+            stats = SummaryStats()
+            for batch in iter_batches(f):
+                stats.update_batch(batch)
+        else:
+            records = lp_parse_file(f) if suffix in _VARIABLE_SUFFIXES else lp_iter_file(f)
+            stats = SummaryStats().update_records(records)
+        _print_summary_line(suffix, stats.count, stats.ts_min, stats.ts_max, len(stats.veh_ids))
+
+
+def _timeline_line(kind: str, r: dict, cur_job: dict) -> Optional[str]:
+    """타임라인 한 줄 (prefix 제외) — 출력 안 하는 이벤트면 None. cur_job 은 차량별 job state."""
+    if kind == 'EDGE':
+        dur = r['exit_ts'] - r['enter_ts']
+        return f"EDGE_TRANSIT  edge={r['edge_id']:>4}  dur={fmt_ms(dur):>8}  len={r['edge_len']:>5.1f}m"
+
+    if kind == 'PATH':
+        return f"PATH_ASSIGNED dest_edge={r['dest_edge']:>4}  path_len={r['path_len']}"
+
+    if kind == 'SNAP':
+        job = r.get('status', -1)
+        if job == cur_job.get(r['veh_id'], -1):
+            return None
+        cur_job[r['veh_id']] = job
+        jname = JOB_STATE_NAMES.get(job, str(job))
+        return f"JOB_STATE     → {jname} ({job})  edge={r.get('edge_idx','?')}  ratio={r.get('ratio',0):.3f}  spd={r.get('speed',0):.1f}"
+
+    if kind == 'XFER':
+        return f"EDGE_CHANGE   {r['from_edge']:>4} → {r['to_edge']:>4}"
+
+    if kind == 'LOCK':
+        if r['event_type'] not in (1, 3):  # GRANT, WAIT만 출력 (너무 많으면 노이즈)
+            return None
+        ename = LOCK_EVENT_NAMES.get(r['event_type'], str(r['event_type']))
+        wait = f"  wait={fmt_ms(r['wait_ms'])}" if r.get('wait_ms', 0) > 0 else ""
+        holder = ""
+        if r['event_type'] == 3:  # WAIT
+            hh = r.get('holder_hint', 255)
+            holder = f"  holder=veh{hh}" if hh < 255 else "  holder=?"
+        return f"LOCK_{ename:<7}  node={r['node_idx']:>4}{wait}{holder}"
+
+    # CP
+    aname = CHECKPOINT_ACTION_NAMES.get(r['action'], str(r['action']))
+    flags = []
+    for bit, name in CHECKPOINT_FLAG_NAMES.items():
+        if r['cp_flags'] & bit:
+            flags.append(name)
+    fstr = '|'.join(flags) if flags else 'NONE'
+    return f"CP_{aname:<12} cpEdge={r['cp_edge']:>4}@{r['cp_ratio']:.3f} [{fstr}]  curEdge={r['current_edge']:>4}@{r['current_ratio']:.3f}"
+
+
+def cmd_vehicle_timeline(slices: list, veh_ids: list[int], ts_from: int, ts_to: int):
+    """차량 타임라인: edge 이동 + path 할당 + job state + lock 병합.
+
+    slices 는 vehicle_timeline.vehicle_slices / slices_from_records 결과 — heap 병합하며
+    바로 출력. 차량이 여러 대면 시간순으로 섞고 줄마다 차량 ID 표시.
+    """
+    from vehicle_timeline import merge_timeline
+    label = ', '.join(map(str, veh_ids))
+    total = sum(s.count for s in slices)
+    if not total:
+        print(f"  No events for veh {label} in [{fmt_ts(ts_from)} ~ {fmt_ts(ts_to)}]")
+        return
 
-        elif kind == 'XFER':
-            print(f"{prefix} EDGE_CHANGE   {r['from_edge']:>4} → {r['to_edge']:>4}")
+    multi = len(veh_ids) > 1
+    print(f"\n=== Vehicle {label} Timeline ===")
+    print(f"  Events: {total}\n")
 
-        elif kind == 'LOCK':
-            ename = LOCK_EVENT_NAMES.get(r['event_type'], str(r['event_type']))
-            wait = f"  wait={fmt_ms(r['wait_ms'])}" if r.get('wait_ms', 0) > 0 else ""
-            holder = ""
-            if r['event_type'] == 3:  # WAIT
-                hh = r.get('holder_hint', 255)
-                holder = f"  holder=veh{hh}" if hh < 255 else "  holder=?"
-            if r['event_type'] in (1, 3):  # GRANT, WAIT만 출력 (너무 많으면 노이즈)
-                print(f"{prefix} LOCK_{ename:<7}  node={r['node_idx']:>4}{wait}{holder}")
-
-        elif kind == 'CP':
-            aname = CHECKPOINT_ACTION_NAMES.get(r['action'], str(r['action']))
-            flags = []
-            for bit, name in CHECKPOINT_FLAG_NAMES.items():
-                if r['cp_flags'] & bit:
-                    flags.append(name)
-            fstr = '|'.join(flags) if flags else 'NONE'
-            print(f"{prefix} CP_{aname:<12} cpEdge={r['cp_edge']:>4}@{r['cp_ratio']:.3f} [{fstr}]  curEdge={r['current_edge']:>4}@{r['current_ratio']:.3f}")
+    cur_job = {}
+    last_edge = {}  # veh → (ts, edge) 마지막 edge_transit
+    max_ts = {}     # veh → 마지막 이벤트 ts
+    for ts, kind, r in merge_timeline(slices):
+        veh = r['veh_id']
+        max_ts[veh] = ts
+        if kind == 'EDGE':
+            last_edge[veh] = (ts, r['edge_id'])
+        line = _timeline_line(kind, r, cur_job)
+        if line is not None:
+            who = f" veh{veh:<4}" if multi else ""
+            print(f"  [{fmt_ts(ts)}]{who} {line}")
 
     # 마지막 edge 확인 - stuck 여부
-    edge_transits = [(r['ts'], r['edge_id']) for ts, kind, r in events if kind == 'EDGE']
-    if edge_transits:
-        last_ts, last_edge = edge_transits[-1]
-        all_ts = [ts for ts, _, _ in events]
-        max_ts = max(all_ts)
-        silent = max_ts - last_ts
+    for veh in veh_ids:
+        if veh not in last_edge:
+            continue
+        last_ts, edge = last_edge[veh]
+        silent = max_ts[veh] - last_ts
         if silent > 5000:
-            print(f"\n  ⚠️  STUCK? 마지막 edge_transit: edge={last_edge} at {fmt_ts(last_ts)}")
-            print(f"        이후 {fmt_ms(silent)} 동안 edge 전환 없음 (현재 edge={last_edge}에 머무는 중)")
+            who = f"veh{veh} " if multi else ""
+            print(f"\n  ⚠️  STUCK? {who}마지막 edge_transit: edge={edge} at {fmt_ts(last_ts)}")
+            print(f"        이후 {fmt_ms(silent)} 동안 edge 전환 없음 (현재 edge={edge}에 머무는 중)")
 
 
 def cmd_stuck(data: dict, threshold_ms: int = 10000):
@@ -306,7 +414,11 @@ def cmd_stuck(data: dict, threshold_ms: int = 10000):
             last_transit[v] = (r['ts'], r['edge_id'])
 
     global_max_ts = max(r['ts'] for r in edge_transits)
+    _print_stuck(last_transit, global_max_ts, threshold_ms)
+
 
+def _print_stuck(last_transit: dict, global_max_ts: int, threshold_ms: int):
+    """cmd_stuck 표 — last_transit: veh_id → (마지막 transit ts, edge_id)."""
     stuck = []
     for veh_id, (ts, edge_id) in last_transit.items():
         silent = global_max_ts - ts
@@ -345,30 +457,35 @@ def cmd_transfers(data: dict):
             js = r.get('status', -1)
             if not job_history[v] or job_history[v][-1][1] != js:
                 job_history[v].append((r['ts'], js))
-
-        print(f"\n  Job State 변화 (최종 상태 기준):")
-        print(f"  {'veh':>5}  {'현재 state':>16}  {'변화 횟수':>8}  {'history (최근 3)':}")
-        for veh_id in sorted(job_history.keys()):
-            hist = job_history[veh_id]
-            last_js = hist[-1][1]
-            last_name = JOB_STATE_NAMES.get(last_js, str(last_js))
-            recent = hist[-3:]
-            hist_str = ' → '.join(f"{JOB_STATE_NAMES.get(js,'?')}@{fmt_ts(ts)}" for ts, js in recent)
-            if last_js in (2, 3, 4, 5):  # 비 IDLE만 표시
-                print(f"  {veh_id:>5}  {last_name:>16}  {len(hist):>8}  {hist_str}")
+        _print_job_history(job_history)
 
     # path 할당 통계
     if paths:
-        path_by_veh = defaultdict(list)
-        for r in paths:
-            path_by_veh[r['veh_id']].append(r)
-
-        print(f"\n  Path 할당 통계 ({len(paths)} total):")
         dest_count = defaultdict(int)
         for r in paths:
             dest_count[r['dest_edge']] += 1
-        top_dests = sorted(dest_count.items(), key=lambda x: -x[1])[:10]
-        print(f"  Top 목적지 edges: {top_dests}")
+        _print_path_stats(len(paths), dest_count)
+
+
+def _print_job_history(job_history: dict):
+    """cmd_transfers job state 표 — veh_id → [(ts, job_state)] (연속 중복 제거, 시간순)."""
+    print(f"\n  Job State 변화 (최종 상태 기준):")
+    print(f"  {'veh':>5}  {'현재 state':>16}  {'변화 횟수':>8}  {'history (최근 3)':}")
+    for veh_id in sorted(job_history.keys()):
+        hist = job_history[veh_id]
+        last_js = hist[-1][1]
+        last_name = JOB_STATE_NAMES.get(last_js, str(last_js))
+        recent = hist[-3:]
+        hist_str = ' → '.join(f"{JOB_STATE_NAMES.get(js,'?')}@{fmt_ts(ts)}" for ts, js in recent)
+        if last_js in (2, 3, 4, 5):  # 비 IDLE만 표시
+            print(f"  {veh_id:>5}  {last_name:>16}  {len(hist):>8}  {hist_str}")
+
+
+def _print_path_stats(total: int, dest_count: dict):
+    """cmd_transfers path 통계 — dest_count 는 처음 등장 순 dict (동률 순서 유지)."""
+    print(f"\n  Path 할당 통계 ({total} total):")
+    top_dests = sorted(dest_count.items(), key=lambda x: -x[1])[:10]
+    print(f"  Top 목적지 edges: {top_dests}")
 
 
 def cmd_deadlock(data: dict, veh_ids: list[int], node_id: int | None = None):
@@ -475,6 +592,42 @@ def cmd_deadlock(data: dict, veh_ids: list[int], node_id: int | None = None):
             print(f"    {common_edges}")
 
 
+def cmd_find_deadlocks(session_dir: Path, ts_from: int, ts_to: int, limit: int = 50,
+                       cache: bool = True):
+    """fleet 전체 deadlock 후보 — lock event 를 재생한 wait-for graph 의 cycle (deadlock_finder.py)."""
+    from deadlock_finder import find_deadlocks
+    lock_files = sorted(session_dir.glob('*_lock.bin'))
+    if not lock_files:
+        print(f"[ERROR] {session_dir} 에 lock.bin 없음")
+        return
+    for f in lock_files:
+        cycles, n_events = find_deadlocks(f, ts_from, ts_to, cache=cache)
+        stuck = [c for c in cycles if c.end_ts is None]
+        span = f", {fmt_ts(ts_from)} ~ {fmt_ts(ts_to)}" if ts_to < 999_000_000 else ''
+        print(f"\n=== wait-for cycle ({f.name}{span}) — "
+              f"lock event {n_events:,}, cycle {len(cycles):,} (미해소 {len(stuck):,}) ===")
+        if not cycles:
+            print("  cycle 없음")
+            continue
+        resolved = [c for c in cycles if c.end_ts is not None]
+        for title, group in (('❗ 끝까지 해소 안 됨 (deadlock 후보)', stuck),
+                             ('해소된 cycle (일시적 상호 대기)', resolved)):
+            if not group:
+                continue
+            print(f"\n  [{title}] {len(group):,}건")
+            for c in group[:limit]:
+                end = 'END' if c.end_ts is None else fmt_ts(c.end_ts)
+                dur = '' if c.end_ts is None else fmt_ms(c.end_ts - c.start_ts)
+                chain = ''.join(f"veh{v} ─node {n}→ " for v, n in c.members) + f"veh{c.vehicles[0]}"
+                print(f"    {fmt_ts(c.start_ts)} ~ {end:<9} {dur:>7}  {chain}")
+            if len(group) > limit:
+                print(f"    ... {len(group) - limit:,} more (--limit 로 조정)")
+        if stuck:
+            c = stuck[0]
+            print(f"\n  상세: python analyze.py {session_dir} --deadlock --pair "
+                  f"{' '.join(map(str, c.vehicles))} --node {c.nodes[0]}")
+
+
 def cmd_lock_node(session_dir: Path, data: dict, node_idx: int, ts_from: int, ts_to: int):
     """특정 노드의 lock activity 통합 분석:
        - 시간순 모든 lock event (REQ/WAIT/GRANT/RELEASE)
@@ -493,7 +646,7 @@ def cmd_lock_node(session_dir: Path, data: dict, node_idx: int, ts_from: int, ts
 
     # snapshot 은 통째 로드하면 OOM — 필요한 ts/veh 만 streaming 캡처
     snap_pos = {}  # ts -> { vehId: {edge,ratio,vel,stop} }
-    snap_files = list(session_dir.glob('*_snapshot.bin'))
+    snap_files = find_snapshot_files(session_dir)
     if snap_files:
         from snapshot_streaming import capture_at_ts_list
         ts_list = sorted({r['ts'] for r in locks})
@@ -596,11 +749,7 @@ def cmd_lock_detail(data: dict, ts_from: int, ts_to: int,
         return
 
     # FLUSH_MARKER 검출 (preLock 버퍼 flush 시점)
-    flush_markers = [r for r in details if r['type'] == 90]
-    if flush_markers:
-        print(f"\n=== preLock buffer flush 정보 ({len(flush_markers)} 개 marker) ===")
-        for r in flush_markers:
-            print(f"  ts={r['ts']:>6}  flushed {r['wait_ms']} preLock 이벤트 (callback 설정 시점)")
+    _print_flush_markers([(r['ts'], r['wait_ms']) for r in details if r['type'] == 90])
 
     # 시간순 출력
     filtered.sort(key=lambda x: x[0]['ts'])
@@ -617,27 +766,38 @@ def cmd_lock_detail(data: dict, ts_from: int, ts_to: int,
             holder = str(holder_raw)
         print(f"{r['ts']:>10}  {r['veh_id']:>4}  {r['node_idx']:>4}  {name:<20}  {holder:>6}  {r['wait_ms']:>6}")
 
-    # type 별 요약
-    print(f"\n=== type 별 발화 요약 ===")
     by_type = defaultdict(int)
-    for _, name in filtered:
+    by_node = defaultdict(int)
+    by_veh = defaultdict(int)
+    for r, name in filtered:
         by_type[name] += 1
+        by_node[r['node_idx']] += 1
+        by_veh[r['veh_id']] += 1
+    _print_lock_detail_summary(by_type, by_node, by_veh)
+
+
+def _print_flush_markers(markers: list):
+    """preLock 버퍼 flush marker — [(ts, flush 된 이벤트 수)] (파일 순서)."""
+    if markers:
+        print(f"\n=== preLock buffer flush 정보 ({len(markers)} 개 marker) ===")
+        for ts, count in markers:
+            print(f"  ts={ts:>6}  flushed {count} preLock 이벤트 (callback 설정 시점)")
+
+
+def _print_lock_detail_summary(by_type: dict, by_node: dict, by_veh: dict):
+    """type / node / veh 별 발화 수 — 모두 처음 등장 (시간순) 순 dict."""
+    # type 별 요약
+    print(f"\n=== type 별 발화 요약 ===")
     for name, cnt in sorted(by_type.items(), key=lambda x: -x[1]):
         print(f"  {name:<20}  {cnt}")
 
     # node 별 hot spot
     print(f"\n=== node 별 (top 10) ===")
-    by_node = defaultdict(int)
-    for r, _ in filtered:
-        by_node[r['node_idx']] += 1
     for node, cnt in sorted(by_node.items(), key=lambda x: -x[1])[:10]:
         print(f"  node={node:>4}  {cnt}")
 
     # veh 별 (top 10) — REQ 안 하고 grant 받은 차량 등 추적
     print(f"\n=== veh 별 (top 10) ===")
-    by_veh = defaultdict(int)
-    for r, _ in filtered:
-        by_veh[r['veh_id']] += 1
     for vid, cnt in sorted(by_veh.items(), key=lambda x: -x[1])[:10]:
         print(f"  veh={vid:>4}  {cnt}")
 
@@ -654,7 +814,9 @@ def cmd_checkpoint(session_dir: Path, ts_from: int, ts_to: int,
                    veh_filter: Optional[int] = None,
                    edge_filter: Optional[int] = None,
                    action_filter: Optional[str] = None,
-                   flag_filter: Optional[str] = None):
+                   flag_filter: Optional[str] = None,
+                   where=None,
+                   cache: bool = True):
     """DEV_CHECKPOINT 분석 — checkpoint HIT/MISS/WAIT_BLOCKED 시간순 추적.
 
     LOCK_REQUEST CP 가 누락되거나 처리 stuck 되는 케이스(N216 류 deadlock) 진단용.
@@ -666,31 +828,84 @@ def cmd_checkpoint(session_dir: Path, ts_from: int, ts_to: int,
       edge_filter   : checkpoint 의 cp_edge 또는 current_edge 가 일치
       action_filter : LOADED/HIT/MISS/WAITING/WAIT_BLOCKED 부분 일치
       flag_filter   : REQ/WAIT/REL/PREP/SLOW 부분 일치 (LOCK_REQUEST 만 보고 싶을 때 'REQ')
+      where         : --where 술어 (where_expr.Predicate)
+      cache         : 세션 캐시 (session_cache.py) 사용
     """
     cp_files = list(session_dir.glob('*_checkpoint.bin'))
     if not cp_files:
         print("  checkpoint event 0 (DEV_CHECKPOINT 미활성화 또는 발화 없음)")
         print("  → logger-setup.ts 에서 events.checkpoint = true 강제 설정 후 재실행 필요")
         return
-
-    # 필터 적용 — 파일을 streaming 으로 읽으며 통과분만 누적
-    total = 0
-    filtered = []
-    for r in lp_iter_file(cp_files[0]):
-        total += 1
-        if not (ts_from <= r['ts'] <= ts_to):
-            continue
-        if veh_filter is not None and r['veh_id'] != veh_filter:
-            continue
-        if edge_filter is not None and r['cp_edge'] != edge_filter and r['current_edge'] != edge_filter:
-            continue
-        action_name = CHECKPOINT_ACTION_NAMES.get(r['action'], f'?{r["action"]}')
-        if action_filter and action_filter.upper() not in action_name:
-            continue
-        flag_str = _format_cp_flags(r['cp_flags'])
-        if flag_filter and flag_filter.upper() not in flag_str:
-            continue
-        filtered.append((r, action_name, flag_str))
+    if where is not None and not where.applies_to(COLUMNS[15]):
+        print(f"  (--where 미적용: 컬럼 없음 {sorted(where.columns - set(COLUMNS[15]))})")
+        where = None
+
+    if HAS_NUMPY:
+        # 모든 필터를 한 술어로 묶어 array 에 mask 한 번 — action/flag 부분 일치는
+        # 매칭되는 코드 목록으로 바꿔 'in (...)' 로 표현
+        import numpy as np
+        from log_parser import EVENT_DTYPES
+        from where_expr import compile_where
+        ranged = ts_from > 0 or ts_to < 999_000_000
+        table = None
+        if cache:
+            from session_cache import load_table
+            table = load_table(cp_files[0], 15)  # 컬럼 캐시 — 술어가 참조하는 컬럼만 읽음
+        if table is not None:
+            batches = []
+        elif ranged:
+            from ts_index import read_ts_range
+            batches = [read_ts_range(cp_files[0], ts_from, ts_to)]  # 시간 구간만 decode
+        else:
+            batches = iter_batches(cp_files[0])  # 통과분만 누적 — 메모리 일정
+        conds = [f"{ts_from} <= ts <= {ts_to}"]
+        if veh_filter is not None:
+            conds.append(f"veh_id == {veh_filter}")
+        if edge_filter is not None:
+            conds.append(f"(cp_edge == {edge_filter} or current_edge == {edge_filter})")
+        if action_filter:
+            codes = [a for a in range(256)
+                     if action_filter.upper() in CHECKPOINT_ACTION_NAMES.get(a, f'?{a}')]
+            conds.append(f"action in {tuple(codes) + (-1,)}")
+        if flag_filter:
+            codes = [v for v in range(256) if flag_filter.upper() in _format_cp_flags(v)]
+            conds.append(f"cp_flags in {tuple(codes) + (-1,)}")
+        if where is not None:
+            conds.append(f"({where.expr})")
+        pred = compile_where(' and '.join(conds))
+        # '전체' 는 시간 구간과 무관하게 파일의 레코드 수 (numpy 없는 경로와 동일)
+        total = (len(table) if table is not None
+                 else cp_files[0].stat().st_size // EVENT_TYPES[15][1])
+        kept = [batch[pred.mask(batch)] for batch in batches]
+        if table is not None:
+            rows = table.take(pred.mask(table)).records()
+        else:
+            arr = np.concatenate(kept) if kept else np.empty(0, dtype=EVENT_DTYPES[15])
+            rows = records_from_array(arr, 15)
+        filtered = [(r, CHECKPOINT_ACTION_NAMES.get(r['action'], f'?{r["action"]}'),
+                     _format_cp_flags(r['cp_flags']))
+                    for r in rows]
+    else:
+        # 필터 적용 — 파일을 streaming 으로 읽으며 통과분만 누적
+        total = 0
+        filtered = []
+        for r in lp_iter_file(cp_files[0]):
+            total += 1
+            if not (ts_from <= r['ts'] <= ts_to):
+                continue
+            if veh_filter is not None and r['veh_id'] != veh_filter:
+                continue
+            if edge_filter is not None and r['cp_edge'] != edge_filter and r['current_edge'] != edge_filter:
+                continue
+            action_name = CHECKPOINT_ACTION_NAMES.get(r['action'], f'?{r["action"]}')
+            if action_filter and action_filter.upper() not in action_name:
+                continue
+            flag_str = _format_cp_flags(r['cp_flags'])
+            if flag_filter and flag_filter.upper() not in flag_str:
+                continue
+            if where is not None and not where.matches(r):
+                continue
+            filtered.append((r, action_name, flag_str))
 
     if not filtered:
         print(f"  필터 통과 event 0 (전체 {total:,} 중)")
@@ -705,31 +920,28 @@ def cmd_checkpoint(session_dir: Path, ts_from: int, ts_to: int,
         print(f"{r['ts']:>10}  {r['veh_id']:>4}  {r['cp_edge']:>6}  {r['cp_ratio']:>7.4f}  "
               f"{flag_str:<20}  {action_name:<13}  {r['current_edge']:>7}  {r['current_ratio']:>8.4f}")
 
-    # action 별 요약
-    print(f"\n=== action 별 요약 ===")
     by_action = defaultdict(int)
-    for _, name, _ in filtered:
+    hot = {'WAIT_BLOCKED': defaultdict(int), 'MISS': defaultdict(int)}
+    for r, name, flag_str in filtered:
         by_action[name] += 1
+        if name in hot:
+            hot[name][(r['cp_edge'], flag_str)] += 1
+    _print_checkpoint_summary(by_action, hot['WAIT_BLOCKED'], hot['MISS'])
+
+
+def _print_checkpoint_summary(by_action: dict, wait_blocked: dict, miss: dict):
+    """action 별 수 + WAIT_BLOCKED / MISS 의 (cp_edge, flags) hot spot — 처음 등장 (시간순) 순 dict."""
+    # action 별 요약
+    print(f"\n=== action 별 요약 ===")
     for name, cnt in sorted(by_action.items(), key=lambda x: -x[1]):
         print(f"  {name:<13}  {cnt}")
 
     # WAIT_BLOCKED 가 자주 나오는 (cp_edge, cp_flags) — stuck 의심 지점
-    if any(name == 'WAIT_BLOCKED' for _, name, _ in filtered):
-        print(f"\n=== WAIT_BLOCKED hot spots (top 10) ===")
-        by_loc = defaultdict(int)
-        for r, name, flag_str in filtered:
-            if name == 'WAIT_BLOCKED':
-                by_loc[(r['cp_edge'], flag_str)] += 1
-        for (edge, flag), cnt in sorted(by_loc.items(), key=lambda x: -x[1])[:10]:
-            print(f"  cpEdge={edge:>4}  flags={flag:<15}  count={cnt}")
-
     # MISS 가 자주 나오는 (cp_edge, cp_flags) — CP 놓침
-    if any(name == 'MISS' for _, name, _ in filtered):
-        print(f"\n=== MISS hot spots (top 10) ===")
-        by_loc = defaultdict(int)
-        for r, name, flag_str in filtered:
-            if name == 'MISS':
-                by_loc[(r['cp_edge'], flag_str)] += 1
+    for label, by_loc in (('WAIT_BLOCKED', wait_blocked), ('MISS', miss)):
+        if not by_loc:
+            continue
+        print(f"\n=== {label} hot spots (top 10) ===")
         for (edge, flag), cnt in sorted(by_loc.items(), key=lambda x: -x[1])[:10]:
             print(f"  cpEdge={edge:>4}  flags={flag:<15}  count={cnt}")
 
@@ -770,7 +982,7 @@ def cmd_ratio_jump(session_dir: Path, veh_id: int, ts_from: int, ts_to: int,
         currentRatio > targetRatio 케이스에서 ratio 가 target 으로 강제됨.
     """
     from snapshot_streaming import detect_ratio_jumps
-    snap_files = list(session_dir.glob('*_snapshot.bin'))
+    snap_files = find_snapshot_files(session_dir)
     if not snap_files:
         print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
         return
@@ -788,14 +1000,64 @@ def cmd_ratio_jump(session_dir: Path, veh_id: int, ts_from: int, ts_to: int,
         print(f"{j['ts']:>10} {j['edge']:>6} {j['prev_ratio']:>11.3f} {j['cur_ratio']:>10.3f} {j['delta']:>+8.3f} {j['prev_vel']:>9.3f} {j['cur_vel']:>8.3f} {note:<20}")
 
 
+def cmd_fleet_anomalies(session_dir: Path, ts_from: int, ts_to: int,
+                        threshold: float = 0.3, max_vel: Optional[float] = None,
+                        limit: int = 50, jobs: int = 1):
+    """전 차량 ratio 점프 / 역주행 / 불가능 상태 — snapshot 한 번 훑어 표 하나로 (fleet_anomaly.py).
+
+    jobs > 1 이면 snapshot 을 byte 구간으로 나눠 병렬 scan (parallel_snapshot.py, 결과 동일).
+    """
+    import numpy as np
+    from fleet_anomaly import anomaly_flag_names, detect_fleet_anomalies, ANOMALY_FLAG_NAMES
+    snap_files = find_snapshot_files(session_dir)
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    ts_range = (ts_from, ts_to) if ts_to < 999_000_000 else None
+    if jobs > 1 and snap_files[0].suffix == '.bin':
+        from parallel_snapshot import detect_fleet_anomalies_parallel
+        table = detect_fleet_anomalies_parallel(snap_files[0], jobs, threshold=threshold,
+                                                ts_range=ts_range, max_vel=max_vel)
+    else:
+        table = detect_fleet_anomalies(snap_files[0], threshold=threshold, ts_range=ts_range, max_vel=max_vel)
+    print(f"\n=== fleet anomalies (threshold={threshold}, {fmt_ts(ts_from)} ~ {fmt_ts(ts_to)}) — {len(table):,} rows ===")
+    if not len(table):
+        print("  no anomalies detected")
+        return
+
+    print(f"{'ts':>10} {'veh':>5} {'edge':>6} {'prev_ratio':>11} {'cur_ratio':>10} {'delta':>8} "
+          f"{'prev_vel':>9} {'cur_vel':>8}  flags")
+    print('-' * 100)
+    for r in table[:limit].tolist():
+        ts, _, veh, edge, _, pr, cr, d, pv, cv, flags = r
+        print(f"{ts:>10} {veh:>5} {edge:>6} {pr:>11.3f} {cr:>10.3f} {d:>+8.3f} {pv:>9.3f} {cv:>8.3f}  "
+              f"{anomaly_flag_names(flags)}")
+    if len(table) > limit:
+        print(f"  ... {len(table) - limit:,} more (--limit 로 조정)")
+
+    print(f"\n=== flag 별 ===")
+    for bit, name in ANOMALY_FLAG_NAMES.items():
+        n = int(((table['flags'] & bit) > 0).sum())
+        if n:
+            print(f"  {name:<18} {n:,}")
+    print(f"\n=== 차량별 top 10 ===")
+    vehs, counts = np.unique(table['veh_id'], return_counts=True)
+    for i in np.argsort(-counts, kind='stable')[:10].tolist():
+        print(f"  veh {int(vehs[i]):>5}  {int(counts[i]):,}")
+
+
 def cmd_compare_pair(session_dir: Path, vehs: list[int],
-                     ts_from: int, ts_to: int, sample_every_ms: int = 1000):
+                     ts_from: int, ts_to: int, sample_every_ms: int = 1000,
+                     jobs: int = 1):
     """두 차량의 위치를 시간순으로 비교 (deadlock 조사 시 누가 앞에 있는지 확인용).
 
     snapshot.bin 을 streaming 으로 읽어서 sample_every_ms 마다 두 차량 상태 출력.
+    행마다 한 실제 frame 의 상태만 씀 — LOD pyramid 의 bucket sample 은 차량마다 다른
+    frame 에서 오므로 "누가 앞에 있나" 비교에는 쓰지 않는다.
+    jobs > 1 이고 replay store 가 없으면 byte 구간 병렬 scan (parallel_snapshot.py).
     """
     from snapshot_streaming import capture_dense_range
-    snap_files = list(session_dir.glob('*_snapshot.bin'))
+    snap_files = find_snapshot_files(session_dir)
     if not snap_files:
         print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
         return
@@ -804,7 +1066,15 @@ def cmd_compare_pair(session_dir: Path, vehs: list[int],
         print("[ERROR] --pair 에 두 차량 이상 필요")
         return
 
-    frames = capture_dense_range(snap_path, (ts_from, ts_to), target_vehs=set(vehs))
+    use_parallel = False
+    if jobs > 1 and HAS_NUMPY and snap_path.suffix == '.bin':
+        from replay_store import open_replay_store
+        use_parallel = open_replay_store(snap_path) is None
+    if use_parallel:
+        from parallel_snapshot import capture_dense_range_parallel
+        frames = capture_dense_range_parallel(snap_path, (ts_from, ts_to), target_vehs=set(vehs), jobs=jobs)
+    else:
+        frames = capture_dense_range(snap_path, (ts_from, ts_to), target_vehs=set(vehs))
     if not frames:
         print("  no frames in range")
         return
@@ -816,7 +1086,11 @@ def cmd_compare_pair(session_dir: Path, vehs: list[int],
         if f['ts'] - last_ts >= sample_every_ms:
             sampled.append(f)
             last_ts = f['ts']
+    _print_compare_pair(vehs, ts_from, ts_to, sample_every_ms, sampled)
+
 
+def _print_compare_pair(vehs: list[int], ts_from: int, ts_to: int, sample_every_ms: int,
+                        sampled: list[dict]):
     print(f"\n=== veh compare {vehs} ({fmt_ts(ts_from)} ~ {fmt_ts(ts_to)}, every {sample_every_ms}ms) ===")
     header = f"{'ts':>10}"
     for v in vehs:
@@ -834,6 +1108,168 @@ def cmd_compare_pair(session_dir: Path, vehs: list[int],
         print(line)
 
 
+def cmd_build_replay(session_dir: Path):
+    """snapshot.bin → dense columnar replay store 변환 (한 번만 — 이후 capture/ratio-jump 가 자동 사용)."""
+    from replay_store import convert_snapshot, replay_dir
+    snap_files = list(session_dir.glob('*_snapshot.bin'))
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    for f in snap_files:
+        store = convert_snapshot(f)
+        out = replay_dir(f)
+        size = sum(p.stat().st_size for p in out.iterdir())
+        print(f"  {f.name} → {out.name}/  frames={store.n_frames:,}  vehicles={len(store.veh_ids):,}  "
+              f"({size / 1e6:.1f} MB, 원본 {f.stat().st_size / 1e6:.1f} MB)")
+
+
+def cmd_clear_cache(session_dir: Path):
+    """세션 캐시 (.analyze_cache/) 삭제 — 다음 실행에서 다시 생성 (session_cache.py)."""
+    from session_cache import cache_dir, clear_cache
+    n = clear_cache(session_dir)
+    print(f"  {cache_dir(session_dir)} 삭제: {n} 개 파일 캐시" if n else "  (세션 캐시 없음)")
+
+
+def cmd_stops(session_dir: Path, ts_from: int, ts_to: int, veh_id: Optional[int] = None,
+              limit: int = 50):
+    """정지 구간 — stopReason / edge / 차량별 총 정지 시간, --veh 지정 시 그 차량 구간 목록 (stop_intervals.py)."""
+    from stop_intervals import aggregate_stops, extract_stop_intervals
+    snap_files = find_snapshot_files(session_dir)
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    ts_range = (ts_from, ts_to) if ts_to < 999_000_000 else None
+    intervals = extract_stop_intervals(snap_files[0], ts_range,
+                                       target_vehs=None if veh_id is None else {veh_id})
+    print(f"\n=== stop intervals ({fmt_ts(ts_from)} ~ {fmt_ts(ts_to)}) — {len(intervals):,} intervals ===")
+    if not len(intervals):
+        print("  no stops")
+        return
+
+    if veh_id is not None:
+        print(f"{'start':>10} {'end':>10} {'dur_ms':>8} {'edge':>6} {'frames':>7}  reason")
+        print('-' * 70)
+        for _, start, end, reason, edge, frames, is_open in intervals[:limit].tolist():
+            note = ' (open)' if is_open else ''
+            print(f"{start:>10} {end:>10} {end - start:>8} {edge:>6} {frames:>7}  "
+                  f"{format_stop_reason(reason)}{note}")
+        if len(intervals) > limit:
+            print(f"  ... {len(intervals) - limit:,} more (--limit 로 조정)")
+        return
+
+    for by, title, fmt_key in (('reason', 'stopReason 별', format_stop_reason),
+                               ('edge', 'edge 별', str), ('veh_id', '차량별', str)):
+        agg = aggregate_stops(intervals, by)
+        print(f"\n=== {title} 총 정지 시간 (top {min(limit, len(agg))}/{len(agg)}) ===")
+        print(f"{'key':<28} {'intervals':>9} {'total':>12} {'max_ms':>8} {'vehicles':>8}")
+        for key, n, total, max_ms, vehs in agg[:limit].tolist():
+            print(f"{fmt_key(key):<28} {n:>9,} {fmt_ts(total):>12} {max_ms:>8} {vehs:>8}")
+
+
+def cmd_build_lod(session_dir: Path):
+    """snapshot.bin → 다해상도 요약 pyramid (<stem>.lod/) — --overview 가 사용."""
+    from snapshot_pyramid import build_pyramid, lod_dir
+    snap_files = find_snapshot_files(session_dir)
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    for f in snap_files:
+        pyramid = build_pyramid(f)
+        print(f"  {f.name} → {lod_dir(f).name}/")
+        for level, (veh, fleet) in sorted(pyramid.levels.items()):
+            print(f"    {level:>8,}ms  buckets={len(fleet):>7,}  rows={len(veh):>9,}  "
+                  f"{(veh.nbytes + fleet.nbytes) / 1e3:,.1f} KB")
+
+
+def cmd_overview(session_dir: Path, ts_from: int, ts_to: int, resolution_ms: int = 60_000,
+                 veh_id: Optional[int] = None, limit: int = 50):
+    """긴 세션 개요 — LOD pyramid 에서 fleet (또는 --veh 차량) 타임라인을 bucket 단위로."""
+    from snapshot_pyramid import build_pyramid, open_pyramid
+    snap_files = find_snapshot_files(session_dir)
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    pyramid = open_pyramid(snap_files[0])
+    if pyramid is None:
+        print("  (LOD pyramid 없음 — 생성 중, 다음부터는 재사용)")
+        pyramid = build_pyramid(snap_files[0])
+    level = pyramid.pick_level(resolution_ms)
+
+    if veh_id is None:
+        rows = pyramid.fleet(level, ts_from, ts_to)
+        print(f"\n=== fleet overview ({level:,}ms buckets, {len(rows):,} rows) ===")
+        print(f"{'bucket':>10} {'time':>10} {'frames':>7} {'vehicles':>9} {'mean_vel':>9} {'stopped%':>9}")
+        print('-' * 60)
+        for b, _, n, nv, mv, st in rows[:limit].tolist():
+            print(f"{b:>10} {fmt_ts(b):>10} {n:>7} {nv:>9.1f} {mv:>9.3f} {100 * st:>8.1f}%")
+    else:
+        rows = pyramid.vehicle_samples(veh_id, level, ts_from, ts_to)
+        print(f"\n=== veh {veh_id} overview ({level:,}ms buckets, {len(rows):,} rows) ===")
+        print(f"{'bucket':>10} {'time':>10} {'dom_edge':>8} {'mean_vel':>9} {'stopped%':>9} "
+              f"| sample {'ts':>10} {'edge':>5} {'ratio':>6} {'vel':>6} {'stop':>4}")
+        print('-' * 96)
+        for b, _, sts, e, r, v, st, _, mv, sp, dom in rows[:limit].tolist():
+            print(f"{b:>10} {fmt_ts(b):>10} {dom:>8} {mv:>9.3f} {100 * sp:>8.1f}% "
+                  f"| sample {sts:>10} {e:>5} {r:>6.3f} {v:>6.2f} {st:>4}")
+    if len(rows) > limit:
+        print(f"  ... {len(rows) - limit:,} more (--limit 로 조정)")
+
+
+def cmd_compact_snapshot(session_dir: Path, quantize: bool = False):
+    """snapshot.bin → keyframe + delta 보관 포맷 .dsnap (compact_snapshot.py). 원본은 그대로 둠."""
+    from compact_snapshot import convert_to_compact
+    snap_files = list(session_dir.glob('*_snapshot.bin'))
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    for f in snap_files:
+        out = convert_to_compact(f, quantize=quantize)
+        src, dst = f.stat().st_size, out.stat().st_size
+        print(f"  {f.name} → {out.name}  {dst / 1e6:.1f} MB (원본 {src / 1e6:.1f} MB, "
+              f"{src / max(dst, 1):.1f}x{', quantized' if quantize else ''})")
+
+
+def cmd_edge_occupancy(session_dir: Path, ts_from: int, ts_to: int, edge: Optional[int] = None,
+                       sample_every_ms: int = 1000, limit: int = 50):
+    """edge 점유 — edge 지정 시 점유 추이, 없으면 edge 별 최대 대기열 (edge_occupancy.py)."""
+    import numpy as np
+    from edge_occupancy import decode_edge_occupancy
+    snap_files = list(session_dir.glob('*_snapshot.bin'))
+    if not snap_files:
+        print(f"[ERROR] {session_dir} 에 snapshot.bin 없음")
+        return
+    ts_range = (ts_from, ts_to) if ts_to < 999_000_000 else None
+    occ = decode_edge_occupancy(snap_files[0], ts_range)
+    if not occ.n_frames:
+        print("  no frames in range")
+        return
+
+    if edge is not None:
+        ts, counts = occ.edge_series(edge)
+        print(f"\n=== edge {edge} occupancy ({fmt_ts(int(ts[0]))} ~ {fmt_ts(int(ts[-1]))}, "
+              f"peak={int(counts.max())}, mean={float(counts.mean()):.2f}) ===")
+        last_ts = None
+        for i, (t, c) in enumerate(zip(ts.tolist(), counts.tolist())):
+            if last_ts is not None and t - last_ts < sample_every_ms:
+                continue
+            last_ts = t
+            vehs = ','.join(map(str, occ.vehicles_on(i, edge).tolist()))
+            print(f"  {t:>10} ({fmt_ts(t)})  {c:>4}  {vehs}")
+        return
+
+    edges, peak, peak_ts = occ.peak_per_edge()
+    busy = (occ.counts > 0).sum(axis=0)
+    order = np.lexsort((edges, -peak.astype(np.int64)))[:limit]
+    print(f"\n=== edge 별 최대 대기열 ({occ.n_frames:,} frames, {len(edges):,} edges) ===")
+    print(f"{'edge':>6} {'peak':>5} {'peak_ts':>10} {'occupied%':>10}")
+    print('-' * 36)
+    for i in order.tolist():
+        print(f"{int(edges[i]):>6} {int(peak[i]):>5} {int(peak_ts[i]):>10} "
+              f"{100 * int(busy[i]) / occ.n_frames:>9.1f}%")
+    if len(edges) > limit:
+        print(f"  ... {len(edges) - limit:,} more (--limit 로 조정)")
+
+
 def cmd_topology(session_dir: Path, rail_dir: str | Path, edge_idx: int | None = None,
                  node_idx: int | None = None):
     """rail config 의 토폴로지 검증/조회.
@@ -870,7 +1306,241 @@ def parse_ts(s: str) -> int:
     return int(s)
 
 
-def main():
+# ==============================================================================
+# --report: 세션 파일 한 번 훑기로 여러 분석 (report_engine.py 의 analyzer 프로토콜)
+# 출력은 같은 이름의 cmd_* 와 같은 print helper 사용 — 레코드 dict 대신 batch 벡터 누적
+# ==============================================================================
+
+class _SummaryReport:
+    """cmd_summary 와 같은 줄 — 파일마다 SummaryStats (snapshot 은 frame 수 / peakV)."""
+    suffixes = None
+
+    def __init__(self):
+        self.rows = []
+
+    def begin_file(self, f: Path, suffix: str):
+        self._stats = SummaryStats()
+        self._frames = [0, None, None, 0]  # frame 수, ts_min, ts_max, peakV
+
+    def feed(self, suffix: str, batch):
+        if suffix != 'snapshot':
+            self._stats.update_batch(batch)
+            return
+        if len(batch):
+            fr = self._frames
+            fr[0] += len(batch)
+            lo, hi = int(batch['ts'].min()), int(batch['ts'].max())
+            fr[1] = lo if fr[1] is None else min(fr[1], lo)
+            fr[2] = hi if fr[2] is None else max(fr[2], hi)
+            fr[3] = max(fr[3], int(batch['num_v'].max()))
+
+    def end_file(self, f: Path, suffix: str):
+        st = self._stats
+        self.rows.append((suffix, *self._frames) if suffix == 'snapshot'
+                         else (suffix, st.count, st.ts_min, st.ts_max, len(st.veh_ids)))
+
+    def report(self):
+        print("\n=== Session Summary ===")
+        if not self.rows:
+            print("  (.bin 파일 없음)")
+        for row in self.rows:
+            _print_summary_line(*row)
+
+
+class _StuckReport:
+    """cmd_stuck — 차량별 마지막 transit (최대 ts, 동률이면 먼저 나온 레코드)."""
+    suffixes = ('edge_transit',)
+
+    def __init__(self, threshold_ms: int = 10000):
+        self.threshold_ms = threshold_ms
+        self.last = {}
+        self.max_ts = None
+
+    def begin_file(self, f: Path, suffix: str):
+        pass
+
+    def feed(self, suffix: str, batch):
+        import numpy as np
+        if not len(batch):
+            return
+        ts = batch['ts'].astype(np.int64)
+        order = np.lexsort((-ts, batch['veh_id']))  # 차량별 ts 내림차순, 동률은 파일 순
+        veh = batch['veh_id'][order]
+        first = np.concatenate(([True], veh[1:] != veh[:-1]))
+        for vid, t, edge in zip(veh[first].tolist(), ts[order][first].tolist(),
+                                batch['edge_id'][order][first].tolist()):
+            cur = self.last.get(vid)
+            if cur is None or t > cur[0]:
+                self.last[vid] = (t, edge)
+        hi = int(ts.max())
+        self.max_ts = hi if self.max_ts is None else max(self.max_ts, hi)
+
+    def end_file(self, f: Path, suffix: str):
+        pass
+
+    def report(self):
+        print(f"\n=== Stuck Vehicles (threshold: {fmt_ms(self.threshold_ms)}) ===")
+        if self.max_ts is None:
+            print("  edge_transit 로그 없음")
+            return
+        _print_stuck(self.last, self.max_ts, self.threshold_ms)
+
+
+class _TransfersReport:
+    """cmd_transfers — replay 는 (ts, veh, status) 컬럼만 모아 정렬, path 는 dest 개수만."""
+    suffixes = ('replay', 'path')
+
+    def __init__(self):
+        from report_engine import OrderedCounter
+        self._replay = []
+        self.dest = OrderedCounter()
+        self.n_paths = 0
+
+    def begin_file(self, f: Path, suffix: str):
+        pass
+
+    def feed(self, suffix: str, batch):
+        import numpy as np
+        if suffix == 'replay':
+            self._replay.append((batch['ts'].astype(np.int64), batch['veh_id'].astype(np.int64),
+                                 batch['status'].astype(np.int64)))
+            return
+        pos = np.arange(self.n_paths, self.n_paths + len(batch))
+        self.dest.add(batch['dest_edge'], np.zeros(len(batch), dtype=np.int64), pos)
+        self.n_paths += len(batch)
+
+    def end_file(self, f: Path, suffix: str):
+        pass
+
+    def _job_history(self) -> dict:
+        """cmd_transfers 와 같은 veh_id → [(ts, job_state)] (ts 순, 연속 중복 제거)."""
+        import numpy as np
+        ts, veh, js = (np.concatenate(c) for c in zip(*self._replay))
+        order = np.argsort(ts, kind='stable')
+        order = order[np.argsort(veh[order], kind='stable')]
+        ts, veh, js = ts[order], veh[order], js[order]
+        head = np.concatenate(([True], veh[1:] != veh[:-1]))
+        keep = head | np.concatenate(([True], js[1:] != js[:-1]))
+        ts, veh, js, head = ts[keep].tolist(), veh[keep], js[keep].tolist(), head[keep]
+        starts = np.flatnonzero(head).tolist() + [len(ts)]
+        return {int(veh[a]): list(zip(ts[a:b], js[a:b])) for a, b in zip(starts, starts[1:])}
+
+    def report(self):
+        print("\n=== Transfer Summary ===")
+        n_replay = sum(len(c[0]) for c in self._replay)
+        if not n_replay:
+            print("  replay 로그 없음 (job_state 추적 불가)")
+        if not self.n_paths:
+            print("  path 로그 없음 (DEV_PATH 활성화 필요)")
+        if n_replay:
+            _print_job_history(self._job_history())
+        if self.n_paths:
+            _print_path_stats(self.n_paths, self.dest.items())
+
+
+class _LockDetailReport:
+    """cmd_lock_detail 요약 (flush marker + type / node / veh 별) — event 목록은 --lock-detail."""
+    suffixes = ('lock_detail',)
+
+    def __init__(self):
+        from report_engine import OrderedCounter
+        self.n = 0
+        self.markers = []
+        self.by_type, self.by_node, self.by_veh = OrderedCounter(), OrderedCounter(), OrderedCounter()
+
+    def begin_file(self, f: Path, suffix: str):
+        pass
+
+    def feed(self, suffix: str, batch):
+        import numpy as np
+        ts = batch['ts']
+        pos = np.arange(self.n, self.n + len(batch))
+        self.n += len(batch)
+        self.by_type.add(batch['type'], ts, pos)
+        self.by_node.add(batch['node_idx'], ts, pos)
+        self.by_veh.add(batch['veh_id'], ts, pos)
+        flush = batch['type'] == 90
+        self.markers.extend(zip(ts[flush].tolist(), batch['wait_ms'][flush].tolist()))
+
+    def end_file(self, f: Path, suffix: str):
+        pass
+
+    def report(self):
+        if not self.n:
+            print("  lock_detail event 0 (DEV_LOCK_DETAIL 미활성화 또는 발화 없음)")
+            return
+        _print_flush_markers(self.markers)
+        print(f"\n=== DEV_LOCK_DETAIL ({self.n} events — 목록은 --lock-detail) ===")
+        by_type = {LOCK_DETAIL_NAMES.get(t, f'?{t}'): c for t, c in self.by_type.items().items()}
+        _print_lock_detail_summary(by_type, self.by_node.items(), self.by_veh.items())
+
+
+class _CheckpointReport:
+    """cmd_checkpoint 요약 (action 별 + WAIT_BLOCKED / MISS hot spot) — event 목록은 --checkpoint + 필터."""
+    suffixes = ('checkpoint',)
+    _HOT_ACTIONS = ((4, 'WAIT_BLOCKED'), (2, 'MISS'))
+
+    def __init__(self):
+        from report_engine import OrderedCounter
+        self.n = 0
+        self.by_action = OrderedCounter()
+        self.hot = {code: OrderedCounter() for code, _ in self._HOT_ACTIONS}
+
+    def begin_file(self, f: Path, suffix: str):
+        pass
+
+    def feed(self, suffix: str, batch):
+        import numpy as np
+        ts = batch['ts']
+        pos = np.arange(self.n, self.n + len(batch))
+        self.n += len(batch)
+        action = batch['action']
+        self.by_action.add(action, ts, pos)
+        # (cp_edge, cp_flags) 를 int64 key 하나로
+        loc = (batch['cp_edge'].astype(np.int64) << 32) | batch['cp_flags'].astype(np.int64)
+        for code, counter in self.hot.items():
+            m = action == code
+            counter.add(loc[m], ts[m], pos[m])
+
+    def end_file(self, f: Path, suffix: str):
+        pass
+
+    def report(self):
+        print(f"\n=== DEV_CHECKPOINT ({self.n} events — 목록은 --checkpoint + 필터) ===")
+        if not self.n:
+            print("  checkpoint event 0 (DEV_CHECKPOINT 미활성화 또는 발화 없음)")
+            return
+        by_action = {CHECKPOINT_ACTION_NAMES.get(a, f'?{a}'): c
+                     for a, c in self.by_action.items().items()}
+        hot = []
+        for code, _ in self._HOT_ACTIONS:
+            # 서로 다른 flags 값이 같은 문자열이 될 수 있음 — 처음 본 순서대로 합침
+            by_loc = defaultdict(int)
+            for key, c in self.hot[code].items().items():
+                by_loc[(key >> 32, _format_cp_flags(key & 0xFFFFFFFF))] += c
+            hot.append(by_loc)
+        _print_checkpoint_summary(by_action, *hot)
+
+
+REPORT_ANALYZERS = {
+    'summary': _SummaryReport,
+    'stuck': _StuckReport,
+    'transfers': _TransfersReport,
+    'lock_detail': _LockDetailReport,
+    'checkpoint': _CheckpointReport,
+}
+
+
+def cmd_report(session_dir: Path, names: list[str]):
+    """--report — 선택한 분석을 세션 파일 한 번씩만 훑어 함께 계산 (report_engine.py)."""
+    from report_engine import run_report
+    analyzers = [REPORT_ANALYZERS[name]() for name in names]
+    run_report(session_dir, analyzers)
+    for a in analyzers:
+        a.report()
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='VPS 로그 통합 분석',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -899,16 +1569,20 @@ def main():
                         help='--checkpoint 필터: action 부분 일치 (LOADED/HIT/MISS/WAITING/WAIT_BLOCKED)')
     parser.add_argument('--cp-flag', dest='cp_flag',
                         help='--checkpoint 필터: flags 부분 일치 (REQ/WAIT/REL/PREP/SLOW)')
+    parser.add_argument('--vehs', type=int, nargs='+', metavar='VEH',
+                        help='여러 차량 타임라인을 시간순으로 섞어서 (예: --vehs 41 108)')
     parser.add_argument('--raw', action='store_true', help='원시 레코드 출력')
     parser.add_argument('--limit', type=int, default=50, help='raw 모드 최대 출력 수')
     parser.add_argument('--ratio-jump', dest='ratio_jump', action='store_true',
-                        help='차량 ratio 점프 (텔레포트) 감지 (--veh 필수)')
+                        help='차량 ratio 점프 (텔레포트) 감지 (--veh 없으면 전 차량 + 역주행/불가능 상태)')
     parser.add_argument('--jump-threshold', dest='jump_threshold', type=float, default=0.3,
                         help='--ratio-jump 임계값 (절댓값, 기본 0.3)')
+    parser.add_argument('--max-vel', dest='max_vel', type=float,
+                        help='--ratio-jump 전 차량 모드: 이 속도 초과를 BAD_VELOCITY 로 표시')
     parser.add_argument('--compare-pair', dest='compare_pair', action='store_true',
                         help='두 차량 위치 비교 (--pair VEH1 VEH2 필수)')
     parser.add_argument('--sample-ms', dest='sample_ms', type=int, default=1000,
-                        help='--compare-pair 샘플링 간격 ms (기본 1000)')
+                        help='--compare-pair 샘플링 / --overview 해상도 간격 ms (기본 1000)')
     parser.add_argument('--topology', action='store_true', help='rail 토폴로지 조회')
     parser.add_argument('--rail-dir', dest='rail_dir',
                         help='--topology rail config 폴더 (예: public/railConfig/cop)')
@@ -916,8 +1590,68 @@ def main():
                         help='--topology 조회할 edge index (1-based)')
     parser.add_argument('--node-idx', dest='node_idx', type=int,
                         help='--topology 조회할 node index (0-based)')
+    parser.add_argument('--build-replay', dest='build_replay', action='store_true',
+                        help='snapshot.bin → <stem>.replay/ columnar store 변환 (이후 snapshot 질의 가속)')
+    parser.add_argument('--find-deadlocks', dest='find_deadlocks', action='store_true',
+                        help='lock event 재생 wait-for graph 로 전 차량 deadlock cycle 자동 탐지 (시작 ts / 차량 / 노드)')
+    parser.add_argument('--stops', action='store_true',
+                        help='정지 구간 (stopReason run-length) — reason / edge / 차량별 총 정지 시간 (--veh 지정 시 구간 목록)')
+    parser.add_argument('--build-lod', dest='build_lod', action='store_true',
+                        help='snapshot.bin → <stem>.lod/ 다해상도 요약 pyramid 생성')
+    parser.add_argument('--overview', action='store_true',
+                        help='LOD pyramid 로 긴 세션 개요 (--sample-ms 해상도, --veh 지정 시 차량 타임라인)')
+    parser.add_argument('--compact-snapshot', dest='compact_snapshot', action='store_true',
+                        help='snapshot.bin → <stem>.dsnap keyframe+delta 보관 포맷 (무손실, 원본 유지)')
+    parser.add_argument('--quantize', action='store_true',
+                        help='--compact-snapshot 에서 ratio/vel 을 u16 로 양자화 (손실, 더 작음)')
+    parser.add_argument('--edge-occupancy', dest='edge_occupancy', type=int, nargs='?', const=-1,
+                        metavar='EDGE', help='edge 점유 — EDGE 지정 시 점유 추이, 생략 시 edge 별 최대 대기열')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='병렬 decode worker 수 (기본 1 = 순차, numpy 필요)')
+    parser.add_argument('--where',
+                        help='필터 표현식 — 컬럼이 있는 파일에만 적용 (예: "veh_id in (41,108) and wait_ms > 1000")')
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true',
+                        help='세션 캐시 (.analyze_cache/) 를 쓰지도 만들지도 않음')
+    parser.add_argument('--clear-cache', dest='clear_cache', action='store_true',
+                        help='세션 캐시 삭제 후 종료')
+    parser.add_argument('--report', metavar='NAMES',
+                        help=f"파일 한 번 훑기로 여러 분석 — all 또는 쉼표 목록 ({','.join(REPORT_ANALYZERS)})")
+    parser.add_argument('--shell', action='store_true',
+                        help='대화형 모드 — 세션을 메모리에 올려 두고 명령 반복 (session_shell.py)')
+    parser.add_argument('--serve', nargs='?', const='', metavar='SOCK',
+                        help='daemon 모드 — Unix socket (기본 <session_dir>/.analyze.sock) 으로 명령 수신')
+    parser.add_argument('--remote', nargs='?', const='', metavar='SOCK',
+                        help='이 명령을 --serve daemon 에 보내 실행 (daemon 없으면 로컬 실행)')
+    return parser
+
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
+    if args.shell or args.serve is not None or args.remote is not None:
+        if not HAS_NUMPY:
+            print("[ERROR] --shell / --serve / --remote 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        import session_shell
+        if args.remote is not None:
+            sys.exit(session_shell.send_command(args.session_dir, sys.argv[1:], args.remote, parser, run))
+        if not Path(args.session_dir).is_dir():
+            print(f"[ERROR] 디렉토리 없음: {args.session_dir}", file=sys.stderr)
+            sys.exit(1)
+        if args.shell:
+            session_shell.repl(args.session_dir, parser, run)
+        else:
+            session_shell.serve(args.session_dir, parser, run, args.serve)
+        return
+    run(args)
+
 
+def run(args, session=None):
+    """파싱된 인자로 명령 하나 실행.
+
+    session (session_shell.HotSession) 이 있으면 load_session 대신 그 메모리 상주
+    레코드에서 필터 — --shell / --serve 가 명령마다 파일을 다시 decode 하지 않음.
+    """
     session_dir = Path(args.session_dir)
     if not session_dir.exists():
         print(f"[ERROR] 디렉토리 없음: {session_dir}", file=sys.stderr)
@@ -931,13 +1665,84 @@ def main():
         cmd_topology(session_dir, args.rail_dir, args.edge_idx, args.node_idx)
         return
 
+    if args.clear_cache:
+        if not HAS_NUMPY:
+            print("[ERROR] --clear-cache 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        cmd_clear_cache(session_dir)
+        return
+
+    if args.build_replay:
+        cmd_build_replay(session_dir)
+        return
+
+    if args.find_deadlocks:
+        if not HAS_NUMPY:
+            print("[ERROR] --find-deadlocks 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        cmd_find_deadlocks(session_dir, parse_ts(args.ts_from), parse_ts(args.ts_to), args.limit,
+                           cache=not args.no_cache)
+        return
+
+    if args.stops:
+        if not HAS_NUMPY:
+            print("[ERROR] --stops 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        cmd_stops(session_dir, parse_ts(args.ts_from), parse_ts(args.ts_to), args.veh, args.limit)
+        return
+
+    if args.build_lod or args.overview:
+        if not HAS_NUMPY:
+            print("[ERROR] --build-lod / --overview 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        if args.build_lod:
+            cmd_build_lod(session_dir)
+        else:
+            cmd_overview(session_dir, parse_ts(args.ts_from), parse_ts(args.ts_to),
+                         args.sample_ms, args.veh, args.limit)
+        return
+
+    if args.compact_snapshot:
+        if not HAS_NUMPY:
+            print("[ERROR] --compact-snapshot 은 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        cmd_compact_snapshot(session_dir, args.quantize)
+        return
+
+    if args.edge_occupancy is not None:
+        if not HAS_NUMPY:
+            print("[ERROR] --edge-occupancy 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        cmd_edge_occupancy(session_dir, parse_ts(args.ts_from), parse_ts(args.ts_to),
+                           None if args.edge_occupancy < 0 else args.edge_occupancy,
+                           args.sample_ms, args.limit)
+        return
+
+    if args.report:
+        if not HAS_NUMPY:
+            print("[ERROR] --report 는 numpy 필요", file=sys.stderr)
+            sys.exit(1)
+        names = list(REPORT_ANALYZERS) if args.report == 'all' else args.report.split(',')
+        unknown = [n for n in names if n not in REPORT_ANALYZERS]
+        if unknown:
+            print(f"[ERROR] --report 알 수 없는 항목: {unknown} (가능: all, {', '.join(REPORT_ANALYZERS)})",
+                  file=sys.stderr)
+            sys.exit(1)
+        cmd_report(session_dir, names)
+        return
+
     # ratio_jump / compare_pair 도 snapshot 만 streaming 으로 읽음 — 전체 load 불필요
     if args.ratio_jump:
-        if args.veh is None:
-            print("[ERROR] --ratio-jump 에 --veh 필요", file=sys.stderr)
-            sys.exit(1)
         ts_from = parse_ts(args.ts_from)
         ts_to   = parse_ts(args.ts_to)
+        if args.veh is None:
+            # --veh 없으면 전 차량 한 번에 (점프 + 역주행 + 불가능 상태)
+            if not HAS_NUMPY:
+                print("[ERROR] --ratio-jump 전 차량 모드는 numpy 필요 (아니면 --veh 지정)", file=sys.stderr)
+                sys.exit(1)
+            cmd_fleet_anomalies(session_dir, ts_from, ts_to, args.jump_threshold,
+                                args.max_vel, args.limit, jobs=args.jobs)
+            return
         cmd_ratio_jump(session_dir, args.veh, ts_from, ts_to, args.jump_threshold)
         return
 
@@ -945,39 +1750,72 @@ def main():
     ts_to   = parse_ts(args.ts_to)
     full_ts = (args.ts_from == '0' and args.ts_to == '999999999')
 
+    where = None
+    if args.where:
+        from where_expr import WhereError, compile_where
+        try:
+            where = compile_where(args.where)
+        except WhereError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+
     # --- load_session 불필요한 명령들 (streaming 전용) ---
     if args.compare_pair:
         if not args.pair or len(args.pair) < 2:
             print("[ERROR] --compare-pair 에 --pair VEH1 VEH2 필요", file=sys.stderr)
             sys.exit(1)
-        cmd_compare_pair(session_dir, args.pair, ts_from, ts_to, args.sample_ms)
+        cmd_compare_pair(session_dir, args.pair, ts_from, ts_to, args.sample_ms, jobs=args.jobs)
         return
 
     if args.checkpoint:
         # checkpoint.bin 은 수백만 레코드 — 필터 없이 전부 출력하면 무의미 + OOM 위험
         if (args.veh is None and args.cp_edge is None and not args.cp_action
-                and not args.cp_flag and full_ts):
+                and not args.cp_flag and not args.where and full_ts):
             print("[ERROR] --checkpoint 단독 실행은 레코드가 너무 많습니다 (수백만).\n"
                   "        --veh / --cp-edge / --cp-action / --cp-flag / --from~--to 중 "
                   "하나로 필터하세요.", file=sys.stderr)
             sys.exit(1)
         cmd_checkpoint(session_dir, ts_from, ts_to,
                        veh_filter=args.veh, edge_filter=args.cp_edge,
-                       action_filter=args.cp_action, flag_filter=args.cp_flag)
+                       action_filter=args.cp_action, flag_filter=args.cp_flag,
+                       where=where, cache=not args.no_cache)
         return
 
     # 명령 플래그가 없으면 세션 요약 — 파일별 streaming 집계
     is_summary = not (args.deadlock or args.lock_detail or args.lock_node is not None
-                      or args.stuck or args.transfers or args.veh is not None)
+                      or args.stuck or args.transfers or args.veh is not None or args.vehs)
     if is_summary:
-        cmd_summary(session_dir)
+        cmd_summary(session_dir, jobs=args.jobs, cache=not args.no_cache)
+        return
+
+    # 타임라인 — (소스, 차량) slice 를 heap 병합하며 바로 출력 (vehicle_timeline.py).
+    # --shell / --where / numpy 없음은 아래 load 결과에서 같은 slice 를 만듦
+    veh_ids = args.vehs or ([args.veh] if args.veh is not None else [])
+    is_timeline = bool(veh_ids) and not (args.deadlock or args.lock_detail or args.lock_node is not None
+                                         or args.stuck or args.transfers or args.raw)
+    if is_timeline and session is None and where is None and HAS_NUMPY:
+        from vehicle_timeline import vehicle_slices
+        print(f"Loading session: {session_dir}")
+        cmd_vehicle_timeline(vehicle_slices(session_dir, veh_ids, ts_from, ts_to,
+                                            cache=not args.no_cache),
+                             veh_ids, ts_from, ts_to)
         return
 
     # --- load_session 필요한 명령들 — 필요한 파일만 선택 로드 ---
     needed = _needed_suffixes(args)
     print(f"Loading session: {session_dir}")
-    data = load_session(session_dir, needed=needed, veh_filter=args.veh,
-                        ts_from=ts_from, ts_to=(None if full_ts else ts_to))
+    load = session.load if session is not None else load_session
+    if args.raw and args.vehs:
+        # --vehs --raw: 차량마다 그 차량만 로드해서 원시 레코드 출력
+        for vid in veh_ids:
+            data = load(session_dir, needed=needed, veh_filter=vid,
+                        ts_from=ts_from, ts_to=(None if full_ts else ts_to), jobs=args.jobs,
+                        where=where, cache=not args.no_cache)
+            cmd_raw(data, vid, ts_from, ts_to, args.limit)
+        return
+    data = load(session_dir, needed=needed, veh_filter=args.veh,
+                ts_from=ts_from, ts_to=(None if full_ts else ts_to), jobs=args.jobs,
+                where=where, cache=not args.no_cache)
     if not data:
         print("[ERROR] 필요한 .bin 파일을 찾을 수 없습니다", file=sys.stderr)
         sys.exit(1)
@@ -998,11 +1836,12 @@ def main():
         cmd_stuck(data)
     elif args.transfers:
         cmd_transfers(data)
-    elif args.veh is not None:
-        if args.raw:
-            cmd_raw(data, args.veh, ts_from, ts_to, args.limit)
-        else:
-            cmd_vehicle_timeline(data, args.veh, ts_from, ts_to)
+    elif args.raw and args.veh is not None:
+        cmd_raw(data, args.veh, ts_from, ts_to, args.limit)
+    elif is_timeline:
+        from vehicle_timeline import slices_from_records
+        cmd_vehicle_timeline(slices_from_records(data, veh_ids, ts_from, ts_to),
+                             veh_ids, ts_from, ts_to)
 
 
 if __name__ == '__main__':
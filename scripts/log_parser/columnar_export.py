@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+세션 .bin → 타입 있는 columnar 파일 (Parquet / Arrow IPC) export.
+
+export_csv 는 dict list → DataFrame → text CSV 라 느리고 타입이 사라진다.
+이 모듈은 parse_file_array 의 structured array 를 row group 단위로 잘라
+바로 Arrow 배열로 넘긴다 — 레코드별 Python 객체 없음. Parquet row group 마다
+min/max 통계가 붙으므로 ts / veh_id 조건은 predicate pushdown 으로 걸러진다.
+
+I/O:
+  Input:
+    - filepath: 고정 크기 .bin (ML_ROUTE 포함, snapshot 제외)
+    - output_dir: 출력 폴더
+    - fmt: 'parquet' | 'arrow'
+    - row_group_records: row group(Arrow 는 record batch) 당 레코드 수
+    - veh_buckets: >0 이면 veh_id % N 으로 hive 파티션 (veh_bucket=K/)
+    - veh_id / ts_from / ts_to (optional): 파싱 단계 필터
+  Output:
+    - 파티션 없음: output_dir/<stem>.parquet (또는 .arrow)
+    - 파티션:     output_dir/<stem>/veh_bucket=K/part-0.parquet
+    - ML_ROUTE 의 edges 는 list<uint32> 컬럼 (pathLen 만큼)
+
+읽기 예 (notebook):
+    pq.read_table('out/S1_checkpoint.parquet', filters=[('ts', '>=', 60000), ('veh_id', '=', 13)])
+    pyarrow.dataset.dataset('out/S1_checkpoint', partitioning='hive')
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from log_parser import COLUMNS, detect_file_type, parse_file_array
+from route_table import route_csr
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# predicate pushdown 단위 — 너무 크면 skip 효과 없음, 너무 작으면 footer 비대
+DEFAULT_ROW_GROUP_RECORDS = 128 * 1024
+
+
+def _etype_for(filepath: Path) -> int | None:
+    types = detect_file_type(str(filepath))
+    if not types or types == ['snapshot']:
+        return None
+    return types[0]
+
+
+def _chunk_table(chunk, etype: int):
+    """structured array 조각 → pa.Table (컬럼 순서 = COLUMNS[etype])."""
+    if etype == 2:
+        path_len, offsets, flat = route_csr(chunk)
+        cols = {'ts': pa.array(np.ascontiguousarray(chunk['ts'])),
+                'veh_id': pa.array(np.ascontiguousarray(chunk['veh_id'])),
+                'path_len': pa.array(path_len),
+                'edges': pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)), pa.array(flat))}
+        return pa.table(cols)
+    return pa.table({name: pa.array(np.ascontiguousarray(chunk[name])) for name in COLUMNS[etype]})
+
+
+class _Sink:
+    """Parquet / Arrow IPC writer 공통 인터페이스 (schema 는 첫 flush 에서 결정).
+
+    veh_bucket 파티션에서는 chunk 하나가 bucket 수만큼 잘게 쪼개지므로,
+    row_group_records 가 찰 때까지 모았다가 한 row group 으로 기록한다.
+    """
+
+    def __init__(self, path: Path, fmt: str, row_group_records: int):
+        self.path = path
+        self.fmt = fmt
+        self.row_group_records = row_group_records
+        self.writer = None
+        self.pending = []
+        self.pending_rows = 0
+        self.rows = 0
+
+    def write(self, table):
+        self.pending.append(table)
+        self.pending_rows += table.num_rows
+        if self.pending_rows >= self.row_group_records:
+            self._flush()
+
+    def _flush(self, final: bool = False):
+        if not self.pending:
+            return
+        table = pa.concat_tables(self.pending)
+        # 꽉 찬 row group 만 기록하고 나머지는 다음 write 로 이월 (close 시 전부)
+        n = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_records
+        rest = table.slice(n)
+        table = table.slice(0, n)
+        self.pending = [rest] if rest.num_rows else []
+        self.pending_rows = rest.num_rows
+        if self.writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.fmt == 'parquet':
+                self.writer = pq.ParquetWriter(self.path, table.schema, compression='zstd')
+            else:
+                self.writer = pa.ipc.new_file(str(self.path), table.schema)
+        if self.fmt == 'parquet':
+            self.writer.write_table(table, row_group_size=self.row_group_records)
+        else:
+            for batch in table.to_batches(max_chunksize=self.row_group_records):
+                self.writer.write_batch(batch)
+        self.rows += table.num_rows
+
+    def close(self):
+        self._flush(final=True)
+        if self.writer is not None:
+            self.writer.close()
+
+
+def export_columnar(filepath: str | Path, output_dir: str | Path, fmt: str = 'parquet',
+                    row_group_records: int = DEFAULT_ROW_GROUP_RECORDS,
+                    veh_buckets: int = 0,
+                    veh_id: int | None = None,
+                    ts_from: int | None = None,
+                    ts_to: int | None = None,
+                    where=None) -> list[Path]:
+    """단일 .bin → Parquet/Arrow. 생성된 파일 경로 목록 반환 (레코드 0 이면 빈 list).
+
+    where (where_expr.Predicate) 는 veh/ts 필터와 함께 chunk 단위 mask 에 AND.
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("columnar export 는 pyarrow 필요 (pip install pyarrow)")
+    if fmt not in ('parquet', 'arrow'):
+        raise ValueError(f"unknown columnar format: {fmt}")
+    filepath = Path(filepath)
+    etype = _etype_for(filepath)
+    if etype is None:
+        print(f"[SKIP] {filepath.name}: 가변 블록/알 수 없는 타입 — columnar export 미지원",
+              file=sys.stderr)
+        return []
+    if where is not None and not where.applies_to(COLUMNS[etype]):
+        print(f"[SKIP] {filepath.name}: --where 컬럼 없음 {sorted(where.columns - set(COLUMNS[etype]))}",
+              file=sys.stderr)
+        return []
+
+    arr = parse_file_array(filepath, [etype])
+    output_dir = Path(output_dir)
+    ext = '.parquet' if fmt == 'parquet' else '.arrow'
+    has_veh = 'veh_id' in COLUMNS[etype]
+    sinks: dict[int | None, _Sink] = {}
+
+    def sink_for(bucket):
+        if bucket not in sinks:
+            if bucket is None:
+                path = output_dir / f'{filepath.stem}{ext}'
+            else:
+                path = output_dir / filepath.stem / f'veh_bucket={bucket}' / f'part-0{ext}'
+            sinks[bucket] = _Sink(path, fmt, row_group_records)
+        return sinks[bucket]
+
+    try:
+        for start in range(0, len(arr), row_group_records):
+            chunk = arr[start:start + row_group_records]
+            mask = None
+            if veh_id is not None and has_veh:
+                mask = chunk['veh_id'] == veh_id
+            if ts_from is not None and 'ts' in COLUMNS[etype]:
+                m = chunk['ts'] >= ts_from
+                mask = m if mask is None else mask & m
+            if ts_to is not None and 'ts' in COLUMNS[etype]:
+                m = chunk['ts'] <= ts_to
+                mask = m if mask is None else mask & m
+            if where is not None:
+                m = where.mask(chunk)
+                mask = m if mask is None else mask & m
+            if mask is not None:
+                chunk = chunk[mask]
+            if len(chunk) == 0:
+                continue
+
+            if veh_buckets > 0 and has_veh:
+                buckets = chunk['veh_id'] % veh_buckets
+                for b in np.unique(buckets).tolist():
+                    sink_for(b).write(_chunk_table(chunk[buckets == b], etype))
+            else:
+                sink_for(None).write(_chunk_table(chunk, etype))
+    finally:
+        for s in sinks.values():
+            s.close()
+
+    for s in sinks.values():
+        print(f"Exported: {s.path} ({s.rows:,} rows)")
+    return [s.path for s in sinks.values()]
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+snapshot.bin → keyframe + delta 압축 보관 포맷 (.dsnap) 변환 / 읽기.
+
+snapshot 은 frame 마다 전 차량을 14B 씩 통째로 기록해서 300MB+ 가 된다. 대부분의
+차량은 frame 사이에 ratio / vel 만 조금 바뀌고 edge / stop / vehId 목록은 그대로다.
+보관용으로는 주기적인 keyframe (전체) + 그 사이 delta frame (바뀐 필드만) 으로 다시 쓴다.
+
+  chunk = keyframe 1 개 + 뒤따르는 delta frame (keyframe_interval - 1 개), zlib 압축
+  frame payload (chunk 안, 컬럼 단위):
+    ts u32, num_v u16, kind u8 (0=key, 1=delta)
+    key  : veh_id[n] edge[n] ratio[n] vel[n] stop[n]
+    delta: ids_same u8 (0 이면 veh_id[n] 이어짐)
+           필드마다 changed bitmap (packbits, ceil(n/8)B) + 바뀐 값만
+           — 직전 frame 의 같은 vehId 값과 비교, 직전에 없던 차량은 0 과 비교
+    activeEdges: same u8 (0 이면 u32 길이 + 원본 byte 그대로)
+
+ratio / vel 은 기본적으로 f32 bit 패턴 그대로 비교·저장 → frame 단위 무손실
+(restore 하면 원본 frame byte 와 동일. frame 사이 쓰레기 byte 와 파일 끝에서
+vehicle 블록이 잘린 frame 은 버림). quantize=True 면 ratio 는 1/65535, vel 은
+0.01 m/s 단위 u16 로 저장 (손실 — [0,1] / [0, 655.35] 밖과 NaN 은 잘림).
+
+파일 끝 chunk index (chunk 별 ts min/max, offset, 크기, frame 수) 로 ts 구간에
+걸친 chunk 만 풀어서 seek 는 keyframe 단위.
+
+I/O:
+  Input:  *_snapshot.bin
+  Output:
+    - convert_to_compact(filepath, out=None, keyframe_interval=64, quantize=False)
+        → <stem>.dsnap 경로 (원본 옆)
+    - iter_compact_frames(path, ts_range) → snapshot_streaming.iter_snapshot_frames 와 같은 frame dict
+      (iter_snapshot_frames 에 .dsnap 경로를 주면 자동으로 이쪽 사용)
+    - restore_snapshot(path, out) → snapshot.bin 재구성
+"""
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from frame_index import load_frame_index
+from log_parser import MMAP_RELEASE_BYTES, SNAPSHOT_VEHICLE_DTYPE, map_file, release_pages
+from snapshot_streaming import HEADER_SIZE, SNAPSHOT_MAGIC, VEHICLE_RECORD_SIZE
+
+COMPACT_SUFFIX = '.dsnap'
+COMPACT_MAGIC = b'DSNP'
+COMPACT_VERSION = 1
+DEFAULT_KEYFRAME_INTERVAL = 64
+FLAG_QUANTIZED = 1
+RATIO_QUANT = 65535.0  # ratio 1 = 65535
+VEL_QUANT = 100.0      # 0.01 m/s 단위
+
+# magic(4) version(u32) flags(u32) keyframe_interval(u32)
+_HEADER = struct.Struct('<4sIII')
+# index_offset(u64) n_chunks(u32) magic(4)
+_FOOTER = struct.Struct('<QI4s')
+_FRAME_HEAD = struct.Struct('<IHB')
+CHUNK_ENTRY_DTYPE = np.dtype([('ts_min', '<u4'), ('ts_max', '<u4'), ('offset', '<u8'),
+                              ('size', '<u4'), ('n_frames', '<u4')])
+_KIND_KEY, _KIND_DELTA = 0, 1
+_FIELDS = ('edge', 'ratio', 'vel', 'stop')
+
+
+def compact_path(filepath: str | Path) -> Path:
+    return Path(filepath).with_suffix(COMPACT_SUFFIX)
+
+
+def _field_dtypes(quantized: bool) -> dict:
+    """저장 컬럼 dtype — f32 는 bit 패턴 (u32) 으로 다뤄 NaN / -0 까지 그대로 비교."""
+    wide = '<u2' if quantized else '<u4'
+    return {'edge': np.dtype('<u2'), 'ratio': np.dtype(wide),
+            'vel': np.dtype(wide), 'stop': np.dtype('<u2')}
+
+
+def _to_columns(arr, quantized: bool) -> dict:
+    cols = {'edge': arr['edge'].copy(), 'stop': arr['stop'].copy()}
+    if quantized:
+        with np.errstate(invalid='ignore'):
+            ratio = np.nan_to_num(np.clip(arr['ratio'].astype(np.float64), 0, 1))
+            vel = np.nan_to_num(np.clip(arr['vel'].astype(np.float64), 0, 0xFFFF / VEL_QUANT))
+        cols['ratio'] = np.rint(ratio * RATIO_QUANT).astype('<u2')
+        cols['vel'] = np.rint(vel * VEL_QUANT).astype('<u2')
+    else:
+        cols['ratio'] = arr['ratio'].view('<u4').copy()
+        cols['vel'] = arr['vel'].view('<u4').copy()
+    return cols
+
+
+def _from_columns(ids, cols: dict, quantized: bool) -> np.ndarray:
+    arr = np.empty(len(ids), dtype=SNAPSHOT_VEHICLE_DTYPE)
+    arr['veh_id'] = ids
+    arr['edge'] = cols['edge']
+    arr['stop'] = cols['stop']
+    if quantized:
+        arr['ratio'] = cols['ratio'] / RATIO_QUANT
+        arr['vel'] = cols['vel'] / VEL_QUANT
+    else:
+        arr['ratio'] = cols['ratio'].view('<f4')
+        arr['vel'] = cols['vel'].view('<f4')
+    return arr
+
+
+def _aligned_prev(prev, ids) -> dict:
+    """직전 frame 값을 현재 frame 의 vehId 순서로 정렬 (직전에 없던 차량은 0)."""
+    prev_ids, prev_cols = prev
+    if not len(prev_ids):
+        return {name: np.zeros(len(ids), dtype=col.dtype) for name, col in prev_cols.items()}
+    pos = np.full(1 << 16, -1, dtype=np.int64)
+    pos[prev_ids] = np.arange(len(prev_ids))
+    p = pos[ids]
+    have = p >= 0
+    return {name: np.where(have, col[np.maximum(p, 0)], 0).astype(col.dtype)
+            for name, col in prev_cols.items()}
+
+
+class _ChunkWriter:
+    """frame 을 받아 chunk payload 로 인코딩 — keyframe_interval 마다 flush."""
+
+    def __init__(self, f, keyframe_interval: int, quantized: bool):
+        self.f = f
+        self.interval = keyframe_interval
+        self.quantized = quantized
+        self.index = []
+        self._reset()
+
+    def _reset(self):
+        self.parts = []
+        self.ts = []
+        self.prev = None
+        self.prev_edges = None
+
+    def add(self, ts: int, arr, edges_bytes: bytes):
+        ids = arr['veh_id'].copy()
+        cols = _to_columns(arr, self.quantized)
+        out = self.parts
+        if self.prev is None:
+            out.append(_FRAME_HEAD.pack(ts, len(ids), _KIND_KEY))
+            out.append(ids.tobytes())
+            out.extend(cols[name].tobytes() for name in _FIELDS)
+        else:
+            out.append(_FRAME_HEAD.pack(ts, len(ids), _KIND_DELTA))
+            same_ids = np.array_equal(ids, self.prev[0])
+            out.append(b'\x01' if same_ids else b'\x00')
+            if not same_ids:
+                out.append(ids.tobytes())
+            prev = self.prev[1] if same_ids else _aligned_prev(self.prev, ids)
+            for name in _FIELDS:
+                changed = cols[name] != prev[name]
+                out.append(np.packbits(changed).tobytes())
+                out.append(cols[name][changed].tobytes())
+        if edges_bytes == self.prev_edges:
+            out.append(b'\x01')
+        else:
+            out.append(b'\x00' + struct.pack('<I', len(edges_bytes)))
+            out.append(edges_bytes)
+        self.prev = (ids, cols)
+        self.prev_edges = edges_bytes
+        self.ts.append(ts)
+        if len(self.ts) >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if not self.ts:
+            return
+        blob = zlib.compress(b''.join(self.parts), 6)
+        self.index.append((min(self.ts), max(self.ts), self.f.tell(), len(blob), len(self.ts)))
+        self.f.write(blob)
+        self._reset()
+
+
+def convert_to_compact(filepath: str | Path, out: Optional[str | Path] = None,
+                       keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                       quantize: bool = False) -> Path:
+    """snapshot.bin → .dsnap (frame index 로 frame 위치를 얻어 한 번 훑음)."""
+    filepath = Path(filepath)
+    out = Path(out) if out else compact_path(filepath)
+    entries = load_frame_index(filepath).entries
+    raw = map_file(filepath)
+    total = len(raw)
+    tmp = out.with_name(out.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(COMPACT_MAGIC, COMPACT_VERSION,
+                             FLAG_QUANTIZED if quantize else 0, keyframe_interval))
+        writer = _ChunkWriter(f, keyframe_interval, quantize)
+        released = 0
+        for ts, num_v, off, size in entries.tolist():
+            veh_off = off + HEADER_SIZE
+            edges_off = veh_off + VEHICLE_RECORD_SIZE * num_v
+            if edges_off > total:
+                break  # 파일 끝에서 vehicle 블록이 잘린 frame
+            arr = np.frombuffer(raw, dtype=SNAPSHOT_VEHICLE_DTYPE, count=num_v, offset=veh_off)
+            writer.add(ts, arr, bytes(raw[edges_off:min(off + size, total)]))
+            if off + size - released >= MMAP_RELEASE_BYTES:
+                release_pages(raw, released, off + size)
+                released = off + size
+        writer.flush()
+        index = np.array(writer.index, dtype=CHUNK_ENTRY_DTYPE)
+        index_offset = f.tell()
+        f.write(index.tobytes())
+        f.write(_FOOTER.pack(index_offset, len(index), COMPACT_MAGIC))
+    tmp.replace(out)  # 다 쓴 뒤에만 .dsnap 으로 — 중단되면 .tmp 만 남음
+    return out
+
+
+def _read_layout(data) -> tuple[bool, np.ndarray]:
+    """(quantized, chunk index). 포맷이 아니면 ValueError."""
+    if len(data) < _HEADER.size + _FOOTER.size:
+        raise ValueError("dsnap 파일이 너무 작음")
+    magic, version, flags, _ = _HEADER.unpack_from(data, 0)
+    index_offset, n_chunks, tail = _FOOTER.unpack_from(data, len(data) - _FOOTER.size)
+    if magic != COMPACT_MAGIC or tail != COMPACT_MAGIC or version != COMPACT_VERSION:
+        raise ValueError("dsnap magic / version 불일치")
+    index = np.frombuffer(data, dtype=CHUNK_ENTRY_DTYPE, count=n_chunks, offset=index_offset)
+    return bool(flags & FLAG_QUANTIZED), index
+
+
+def _decode_chunk(blob: bytes, quantized: bool):
+    """chunk 하나 → (ts, vehicle ndarray, activeEdges bytes) generator."""
+    buf = zlib.decompress(blob)
+    dts = _field_dtypes(quantized)
+    cur = 0
+    prev = None
+    edges = b''
+
+    def take(dtype, n):
+        nonlocal cur
+        a = np.frombuffer(buf, dtype=dtype, count=n, offset=cur)
+        cur += a.nbytes
+        return a
+
+    while cur < len(buf):
+        ts, n, kind = _FRAME_HEAD.unpack_from(buf, cur)
+        cur += _FRAME_HEAD.size
+        if kind == _KIND_KEY:
+            ids = take('<u2', n)
+            cols = {name: take(dts[name], n) for name in _FIELDS}
+        else:
+            same_ids = buf[cur] == 1
+            cur += 1
+            ids = prev[0] if same_ids else take('<u2', n)
+            base = prev[1] if same_ids else _aligned_prev(prev, ids)
+            cols = {}
+            for name in _FIELDS:
+                changed = np.unpackbits(take('u1', (n + 7) // 8), count=n).astype(bool)
+                col = base[name].copy()
+                col[changed] = take(dts[name], int(changed.sum()))
+                cols[name] = col
+        if buf[cur] == 0:
+            size = struct.unpack_from('<I', buf, cur + 1)[0]
+            edges = buf[cur + 5:cur + 5 + size]
+            cur += 5 + size
+        else:
+            cur += 1
+        prev = (ids, cols)
+        yield ts, _from_columns(ids, cols, quantized), edges
+
+
+def iter_compact_frames(path: str | Path, ts_range: Optional[tuple[int, int]] = None):
+    """.dsnap frame generator — iter_snapshot_frames 와 같은 frame dict.
+
+    frame 마다 원본 snapshot frame byte (헤더 + vehicle 블록 + activeEdges) 를
+    다시 만들어 'raw' 로 주므로 frame_vehicles 등 기존 소비자가 그대로 동작.
+    """
+    ts_from = ts_range[0] if ts_range else 0
+    ts_to = ts_range[1] if ts_range else 0xFFFFFFFF
+    data = map_file(path)
+    quantized, index = _read_layout(data)
+    hit = np.flatnonzero((index['ts_max'] >= ts_from) & (index['ts_min'] <= ts_to))
+    for ci in hit.tolist():
+        off, size = int(index['offset'][ci]), int(index['size'][ci])
+        for ts, arr, edges in _decode_chunk(bytes(data[off:off + size]), quantized):
+            if ts_from <= ts <= ts_to:
+                frame = (struct.pack('<HIH', SNAPSHOT_MAGIC, ts, len(arr))
+                         + arr.tobytes() + edges)
+                yield {'ts': ts, 'num_v': len(arr), 'raw': frame,
+                       'veh_off': HEADER_SIZE, 'next_off': len(frame)}
+
+
+def restore_snapshot(path: str | Path, out: str | Path) -> Path:
+    """.dsnap → snapshot.bin (quantize 안 한 파일이면 frame byte 가 원본과 동일)."""
+    out = Path(out)
+    with open(out, 'wb') as f:
+        for frame in iter_compact_frames(path):
+            f.write(frame['raw'])
+    return out
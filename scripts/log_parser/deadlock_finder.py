@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+ml_lock 재생 → wait-for graph cycle 로 fleet 전체 deadlock 후보 자동 탐지 (--find-deadlocks).
+
+--deadlock 은 이미 의심하는 두 차량 (--pair 41 108) 만 본다. 그 pair 를 찾는 일이
+수작업이었다. WaitForGraph 는 lock event 를 ts 순으로 재생하며 상태 두 개만 든다.
+  holder[node]  GRANT 로 잡은 차량 (RELEASE 로 해제, GRANT 가 오면 교체 — --lock-node 와 같은 규칙)
+                GRANT 를 못 본 노드 (세션 시작 전 보유) 는 WAIT 의 holder_hint 로 보충
+  waits[veh]    WAIT 로 들어가 아직 GRANT 를 못 받은 노드 (차량은 한 번에 한 노드에서만 막힘)
+
+대기 차량 w 의 wait-for 간선은 w → holder[waits[w]] 하나뿐 (out-degree ≤ 1, 함수 그래프).
+그래서 cycle 은 "간선이 바뀐 차량에서 다음 차량을 따라가다 자기로 돌아오는가" 로 판정되고,
+그래프를 따로 저장하지 않는다. 간선이 바뀌는 event 는
+  WAIT(w, n)           w 의 간선 생김 → w 에서 확인 (holder_hint 로 n 의 holder 가 정해지면 n 대기자 전원)
+  GRANT(v, n)          n 대기자 전원의 간선이 v 로 → 대기자마다 확인
+  RELEASE(v, n)        n 대기자의 간선 사라짐 (cycle 생길 수 없음)
+비용은 O(event 수 × 대기 사슬 길이) — 사슬은 보통 몇 대라 event 수에 거의 선형.
+
+cycle 은 구성 간선 (참여 차량의 대기, 대기 노드의 holder) 중 하나라도 바뀌면 해소로 보고
+end_ts 를 기록한다. 끝까지 남은 cycle (end_ts None) 이 실제 deadlock 후보.
+
+I/O:
+  Input:  *_lock.bin (ML_LOCK), ts 범위
+  Output:
+    - WaitForGraph().feed(ts, veh, node, event_type, holder_hint) / .cycles
+    - find_deadlocks(filepath, ts_from, ts_to, cache) → (cycles, lock event 수)
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from log_parser import EVENT_DTYPES, iter_batches
+
+LOCK_ETYPE = 4
+LOCK_REQ, LOCK_GRANT, LOCK_RELEASE, LOCK_WAIT = 0, 1, 2, 3
+HOLDER_UNKNOWN = 255
+
+# 한 번에 python 값으로 바꾸는 event 수
+REPLAY_CHUNK = 65536
+
+
+@dataclass
+class WaitCycle:
+    start_ts: int
+    members: list[tuple[int, int]]  # (차량, 그 차량이 기다리는 노드) — 노드 holder 는 다음 차량
+    end_ts: Optional[int] = None    # None = 끝까지 해소 안 됨
+
+    @property
+    def vehicles(self) -> list[int]:
+        return [v for v, _ in self.members]
+
+    @property
+    def nodes(self) -> list[int]:
+        return [n for _, n in self.members]
+
+
+class WaitForGraph:
+    """lock event 를 ts 순으로 feed — 생긴 cycle 은 self.cycles 에 (시작 순)."""
+
+    def __init__(self):
+        self.holder: dict[int, int] = {}
+        self.waits: dict[int, int] = {}
+        self.waiters: dict[int, set] = {}
+        self.cycles: list[WaitCycle] = []
+        self._veh_cycle: dict[int, WaitCycle] = {}   # 진행 중 cycle 참여 차량
+        self._node_cycle: dict[int, WaitCycle] = {}  # 진행 중 cycle 의 대기 노드
+
+    def _next(self, veh: int) -> Optional[int]:
+        node = self.waits.get(veh)
+        if node is None:
+            return None
+        h = self.holder.get(node)
+        return None if h == veh else h
+
+    def _close(self, ts: int, cycle: Optional[WaitCycle]):
+        if cycle is None:
+            return
+        cycle.end_ts = ts
+        for veh, node in cycle.members:
+            self._veh_cycle.pop(veh, None)
+            self._node_cycle.pop(node, None)
+
+    def _check(self, ts: int, start: int):
+        """start 에서 간선을 따라가 start 로 돌아오면 새 cycle."""
+        if start in self._veh_cycle:
+            return
+        path = [start]
+        seen = {start}
+        cur = self._next(start)
+        while cur is not None and cur not in seen:
+            seen.add(cur)
+            path.append(cur)
+            cur = self._next(cur)
+        if cur != start:
+            return  # 막다른 사슬이거나 start 가 속하지 않은 기존 cycle 로 들어감
+        # 가장 작은 차량 ID 부터 — 같은 cycle 이 늘 같은 모양으로 출력
+        k = path.index(min(path))
+        path = path[k:] + path[:k]
+        cycle = WaitCycle(ts, [(v, self.waits[v]) for v in path])
+        self.cycles.append(cycle)
+        for veh, node in cycle.members:
+            self._veh_cycle[veh] = cycle
+            self._node_cycle[node] = cycle
+
+    def _unwait(self, ts: int, veh: int):
+        node = self.waits.pop(veh, None)
+        if node is None:
+            return
+        self.waiters[node].discard(veh)
+        self._close(ts, self._veh_cycle.get(veh))
+
+    def feed(self, ts: int, veh: int, node: int, event_type: int, holder_hint: int = HOLDER_UNKNOWN):
+        if event_type == LOCK_WAIT:
+            if self.waits.get(veh) != node:
+                self._unwait(ts, veh)
+                self.waits[veh] = node
+                self.waiters.setdefault(node, set()).add(veh)
+            if node not in self.holder and holder_hint != HOLDER_UNKNOWN and holder_hint != veh:
+                # hint 로 holder 가 정해지면 그 노드의 기존 대기자 간선도 같이 생김
+                self.holder[node] = holder_hint
+                for w in list(self.waiters[node]):
+                    self._check(ts, w)
+            else:
+                self._check(ts, veh)
+
+        elif event_type == LOCK_GRANT:
+            if self.waits.get(veh) == node:
+                self._unwait(ts, veh)
+            if self.holder.get(node) == veh:
+                return
+            self._close(ts, self._node_cycle.get(node))
+            self.holder[node] = veh
+            for w in list(self.waiters.get(node, ())):
+                self._check(ts, w)
+
+        elif event_type == LOCK_RELEASE:
+            if self.holder.get(node) == veh:
+                self._close(ts, self._node_cycle.get(node))
+                del self.holder[node]
+
+
+def _lock_columns(filepath: Path, ts_from: int, ts_to: int, cache: bool):
+    """lock 컬럼 (ts, veh_id, node_idx, event_type, holder_hint) — ts 범위, ts 순 (동률은 파일 순)."""
+    names = ('ts', 'veh_id', 'node_idx', 'event_type', 'holder_hint')
+    table = None
+    if cache:
+        from session_cache import load_table
+        table = load_table(filepath, LOCK_ETYPE)
+    if table is not None:
+        cols = {n: table[n] for n in names}
+    else:
+        parts = [b[list(names)].copy() for b in iter_batches(filepath, event_types=[LOCK_ETYPE])]
+        arr = np.concatenate(parts) if parts else np.empty(0, dtype=EVENT_DTYPES[LOCK_ETYPE])
+        cols = {n: arr[n] for n in names}
+    ts = np.asarray(cols['ts'])
+    keep = (ts >= ts_from) & (ts <= ts_to)
+    cols = {n: np.asarray(c)[keep] for n, c in cols.items()}
+    if len(cols['ts']) > 1 and (np.diff(cols['ts'].astype(np.int64)) < 0).any():
+        order = np.argsort(cols['ts'], kind='stable')
+        cols = {n: c[order] for n, c in cols.items()}
+    return cols
+
+
+def _iter_events(cols: dict) -> Iterator[tuple]:
+    for start in range(0, len(cols['ts']), REPLAY_CHUNK):
+        chunk = [cols[n][start:start + REPLAY_CHUNK].tolist()
+                 for n in ('ts', 'veh_id', 'node_idx', 'event_type', 'holder_hint')]
+        yield from zip(*chunk)
+
+
+def find_deadlocks(filepath: str | Path, ts_from: int = 0, ts_to: int = 0xFFFFFFFF,
+                   cache: bool = True) -> tuple[list[WaitCycle], int]:
+    """lock.bin 전체를 재생 → (생긴 cycle 목록 (시작 순), 재생한 event 수)."""
+    cols = _lock_columns(Path(filepath), ts_from, ts_to, cache)
+    graph = WaitForGraph()
+    feed = graph.feed
+    for ts, veh, node, event_type, hint in _iter_events(cols):
+        feed(ts, veh, node, event_type, hint)
+    return graph.cycles, len(cols['ts'])
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+snapshot.bin activeEdges 구간 → CSR edge 점유 구조 + frames × edges 점유 수 행렬.
+
+frame 마다 붙는 activeEdges (edgeId, count, vehId×count) 는 iter_snapshot_frames 가
+건너뛰고, parse_snapshot_file 만 frame 별 dict list 로 만들었다. "edge 246 의 점유
+추이" / "edge 별 최대 대기열" 을 보려면 frame × edge 이중 Python loop 가 필요했다.
+
+EdgeOccupancy 는 시간 구간 전체를 한 번 decode 해 두 가지 형태로 들고 있다:
+
+  CSR (frame → edge → vehicles)
+    frame_ptr (F+1,)  int64   frame i 의 entry 는 [frame_ptr[i], frame_ptr[i+1])
+    entry_edge (E,)   uint16  entry 별 edgeId (activeEdges 순서 그대로)
+    veh_ptr (E+1,)    int64   entry j 의 차량은 veh_ids[veh_ptr[j]:veh_ptr[j+1]]
+    veh_ids (N,)      uint16  (edge 위 순서 그대로)
+  dense 점유 수
+    edges (K,)        uint16  구간 안에 한 번이라도 등장한 edgeId (오름차순 = 열 번호)
+    counts (F, K)     uint16  frame 별 edge 점유 차량 수 (없으면 0)
+
+entry header 위치만 Python 으로 따라가고 (frame 당 activeEdge 수만큼),
+차량 ID 는 header 를 뺀 나머지 u16 을 mask 로 한 번에 떼어낸다.
+
+I/O:
+  Input:
+    - filepath: *_snapshot.bin
+    - ts_range: 닫힌 구간 [ts_from, ts_to] (ms, optional)
+  Output:
+    - decode_edge_occupancy(filepath, ts_range) → EdgeOccupancy
+        .edge_series(edge)        # (ts, count) — edge 점유 추이
+        .peak_per_edge()          # (edges, peak, peak_ts) — edge 별 최대 대기열
+        .vehicles_on(i, edge)     # frame i 에서 edge 위 vehId 배열
+"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from frame_index import load_frame_index
+from log_parser import MMAP_RELEASE_BYTES, map_file, release_pages
+from snapshot_streaming import HEADER_SIZE, VEHICLE_RECORD_SIZE
+
+
+@dataclass
+class EdgeOccupancy:
+    ts: np.ndarray
+    frame_ptr: np.ndarray
+    entry_edge: np.ndarray
+    veh_ptr: np.ndarray
+    veh_ids: np.ndarray
+    edges: np.ndarray
+    counts: np.ndarray
+
+    def __post_init__(self):
+        self._col = np.full(1 << 16, -1, dtype=np.int64)
+        self._col[self.edges] = np.arange(len(self.edges))
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.ts)
+
+    def column(self, edge: int) -> int:
+        """edgeId → counts 열 번호 (구간에 없던 edge 면 -1)."""
+        return int(self._col[edge])
+
+    def edge_series(self, edge: int) -> tuple[np.ndarray, np.ndarray]:
+        """edge 의 frame 별 점유 수 (ts, count). 구간에 없던 edge 면 count 는 전부 0."""
+        col = self.column(edge)
+        if col < 0:
+            return self.ts, np.zeros(len(self.ts), dtype=np.uint16)
+        return self.ts, self.counts[:, col]
+
+    def peak_per_edge(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """edge 별 최대 점유 수와 처음 그 값에 도달한 ts → (edges, peak, peak_ts)."""
+        if not len(self.ts) or not len(self.edges):
+            empty = np.empty(0, dtype=np.uint16)
+            return self.edges, empty, np.empty(0, dtype=self.ts.dtype)
+        at = self.counts.argmax(axis=0)
+        return self.edges, self.counts[at, np.arange(len(self.edges))], self.ts[at]
+
+    def frame_edges(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        """frame i 의 (edgeId, 점유 수) — activeEdges 순서."""
+        lo, hi = self.frame_ptr[i], self.frame_ptr[i + 1]
+        return self.entry_edge[lo:hi], np.diff(self.veh_ptr[lo:hi + 1])
+
+    def vehicles_on(self, i: int, edge: int) -> np.ndarray:
+        """frame i 에서 edge 위에 있는 vehId 배열 (edge 위 순서)."""
+        lo, hi = self.frame_ptr[i], self.frame_ptr[i + 1]
+        hit = np.flatnonzero(self.entry_edge[lo:hi] == edge)
+        if not len(hit):
+            return np.empty(0, dtype=np.uint16)
+        j = lo + hit[0]
+        return self.veh_ids[self.veh_ptr[j]:self.veh_ptr[j + 1]]
+
+
+def _decode_section(raw, off: int, end: int):
+    """activeEdges 구간 [off, end) → (entry edgeId, entry 차량 수, vehId 배열).
+
+    파일 끝에서 잘린 entry 는 버림 (parse_snapshot_file 과 같은 처리).
+    """
+    if off + 2 > end:
+        return None
+    num_e = struct.unpack_from('<H', raw, off)[0]
+    words = np.frombuffer(raw, dtype='<u2', count=(end - off) // 2, offset=off)
+    n = len(words)
+    heads = []
+    p = 1
+    for _ in range(num_e):
+        if p + 2 > n:
+            break
+        count = int(words[p + 1])
+        if p + 2 + count > n:
+            break
+        heads.append(p)
+        p += 2 + count
+    heads = np.asarray(heads, dtype=np.int64)
+    body = np.ones(p, dtype=bool)
+    body[0] = False
+    body[heads] = False
+    body[heads + 1] = False
+    return words[heads], words[heads + 1].astype(np.int64), words[:p][body]
+
+
+def decode_edge_occupancy(filepath: str | Path,
+                          ts_range: Optional[tuple[int, int]] = None) -> EdgeOccupancy:
+    """snapshot 의 activeEdges 를 ts_range 구간만 decode → EdgeOccupancy."""
+    filepath = Path(filepath)
+    idx = load_frame_index(filepath)
+    lo, hi = idx.frame_range(*(ts_range or (None, None)))
+    entries = idx.entries[lo:hi]
+    if ts_range is not None:
+        entries = entries[(entries['ts'] >= ts_range[0]) & (entries['ts'] <= ts_range[1])]
+
+    raw = map_file(filepath)
+    total = len(raw)
+    ts_list, frame_len, edge_parts, count_parts, veh_parts = [], [], [], [], []
+    released = int(entries['offset'][0]) if len(entries) else 0
+    for ts, num_v, off, size in entries.tolist():
+        sec = off + HEADER_SIZE + VEHICLE_RECORD_SIZE * num_v
+        decoded = _decode_section(raw, sec, min(off + size, total))
+        if decoded is None:
+            continue  # 파일 끝에서 vehicle 블록이 잘린 frame
+        e, c, v = decoded
+        ts_list.append(ts)
+        frame_len.append(len(e))
+        edge_parts.append(e)
+        count_parts.append(c)
+        veh_parts.append(v)
+        if off + size - released >= MMAP_RELEASE_BYTES:
+            release_pages(raw, released, off + size)
+            released = off + size
+
+    frame_ptr = np.zeros(len(ts_list) + 1, dtype=np.int64)
+    np.cumsum(frame_len, out=frame_ptr[1:])
+    entry_edge = np.concatenate(edge_parts) if edge_parts else np.empty(0, dtype=np.uint16)
+    entry_count = np.concatenate(count_parts) if count_parts else np.empty(0, dtype=np.int64)
+    veh_ptr = np.zeros(len(entry_edge) + 1, dtype=np.int64)
+    np.cumsum(entry_count, out=veh_ptr[1:])
+    veh_ids = np.concatenate(veh_parts) if veh_parts else np.empty(0, dtype=np.uint16)
+
+    # dense 점유 수: entry 별 (frame, 열) 에 차량 수를 더함 (같은 edge 가 두 번 나와도 합산)
+    edges = np.unique(entry_edge)
+    col = np.full(1 << 16, -1, dtype=np.int64)
+    col[edges] = np.arange(len(edges))
+    rows = np.repeat(np.arange(len(ts_list)), frame_len)
+    flat = np.bincount(rows * len(edges) + col[entry_edge], weights=entry_count,
+                       minlength=len(ts_list) * len(edges))
+    counts = flat.astype(np.uint16).reshape(len(ts_list), len(edges))
+
+    return EdgeOccupancy(ts=np.asarray(ts_list, dtype=np.uint32), frame_ptr=frame_ptr,
+                         entry_edge=entry_edge, veh_ptr=veh_ptr, veh_ids=veh_ids,
+                         edges=edges, counts=counts)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+전 차량 ratio 점프 / 역주행 / 불가능한 상태 조합 감지 — snapshot 한 번 훑기.
+
+detect_ratio_jumps 는 차량 한 대만 추적해서, TARGET_RATIO 회귀 후 fleet 전체를
+점검하려면 차량 수만큼 파일을 다시 읽어야 했다. FleetAnomalyScanner 는 vehId 로
+인덱싱한 직전 상태 배열 (65536 칸) 을 들고 frame 마다 전 차량을 배열 차분으로
+한 번에 비교한다. 차량이 frame 에서 빠졌다 돌아오면 마지막으로 본 상태와 비교.
+
+flags (bitmask — 한 행에 여러 개 가능):
+  RATIO_JUMP        같은 edge 에서 |Δratio| > threshold (텔레포트)
+  BACKWARD          같은 edge 에서 ratio 감소 (Δ < -BACKWARD_EPS)
+  RATIO_RANGE       ratio 가 [0, 1] 밖 (NaN 포함)
+  MOVED_AT_ZERO_VEL 직전/현재 속도 모두 0 인데 같은 edge 에서 전진
+  BAD_VELOCITY      속도 < 0 / NaN·inf / max_vel 초과 (max_vel 지정 시)
+
+I/O:
+  Input:
+    - filepath: *_snapshot.bin
+    - threshold (기본 0.3), ts_range (optional), max_vel (optional, m/s)
+  Output:
+    - detect_fleet_anomalies(...) → ANOMALY_DTYPE structured ndarray, (ts, veh_id) 정렬
+      (ts, prev_ts, veh_id, edge, prev_edge, prev_ratio, ratio, delta, prev_vel, vel, flags)
+    - anomaly_flag_names(flags) → 'RATIO_JUMP|BACKWARD' 형식 문자열
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from snapshot_streaming import iter_frame_arrays
+
+RATIO_JUMP = 1
+BACKWARD = 2
+RATIO_RANGE = 4
+MOVED_AT_ZERO_VEL = 8
+BAD_VELOCITY = 16
+ANOMALY_FLAG_NAMES = {RATIO_JUMP: 'RATIO_JUMP', BACKWARD: 'BACKWARD', RATIO_RANGE: 'RATIO_RANGE',
+                      MOVED_AT_ZERO_VEL: 'MOVED_AT_ZERO_VEL', BAD_VELOCITY: 'BAD_VELOCITY'}
+
+# f32 ratio 반올림 흔들림은 역주행으로 안 봄
+BACKWARD_EPS = 1e-4
+
+ANOMALY_DTYPE = np.dtype([('ts', '<u4'), ('prev_ts', '<i8'), ('veh_id', '<u2'),
+                          ('edge', '<u2'), ('prev_edge', '<u2'),
+                          ('prev_ratio', '<f8'), ('ratio', '<f8'), ('delta', '<f8'),
+                          ('prev_vel', '<f8'), ('vel', '<f8'), ('flags', '<u1')])
+
+STATE_DTYPE = np.dtype([('veh_id', '<u2'), ('ts', '<i8'), ('edge', '<u2'),
+                        ('ratio', '<f8'), ('vel', '<f8')])
+
+
+def anomaly_flag_names(flags: int) -> str:
+    return '|'.join(name for bit, name in ANOMALY_FLAG_NAMES.items() if flags & bit)
+
+
+class FleetAnomalyScanner:
+    """frame 을 순서대로 feed → anomaly 행 누적. 직전 상태는 vehId 인덱스 배열."""
+
+    def __init__(self, threshold: float = 0.3, max_vel: Optional[float] = None):
+        self.threshold = threshold
+        self.max_vel = max_vel
+        self.frames = 0
+        self._seen = np.zeros(1 << 16, dtype=bool)
+        self._ts = np.full(1 << 16, -1, dtype=np.int64)
+        self._edge = np.zeros(1 << 16, dtype=np.uint16)
+        self._ratio = np.full(1 << 16, np.nan)
+        self._vel = np.full(1 << 16, np.nan)
+        self._hits: list[np.ndarray] = []
+
+    def feed(self, ts: int, arr):
+        """frame 하나 (SNAPSHOT_VEHICLE_DTYPE 배열) 비교 후 상태 갱신."""
+        self.frames += 1
+        if not len(arr):
+            return
+        ids = arr['veh_id'].astype(np.int64)
+        edge = arr['edge']
+        ratio = arr['ratio'].astype(np.float64)
+        vel = arr['vel'].astype(np.float64)
+        prev_edge, prev_ratio, prev_vel = self._edge[ids], self._ratio[ids], self._vel[ids]
+
+        same = self._seen[ids] & (edge == prev_edge)
+        delta = ratio - prev_ratio
+        with np.errstate(invalid='ignore'):
+            flags = np.where(same & (np.abs(delta) > self.threshold), RATIO_JUMP, 0)
+            flags |= np.where(same & (delta < -BACKWARD_EPS), BACKWARD, 0)
+            flags |= np.where(~((ratio >= 0) & (ratio <= 1)), RATIO_RANGE, 0)
+            flags |= np.where(same & (prev_vel == 0) & (vel == 0) & (delta > BACKWARD_EPS),
+                              MOVED_AT_ZERO_VEL, 0)
+            bad_vel = ~np.isfinite(vel) | (vel < 0)
+            if self.max_vel is not None:
+                bad_vel |= vel > self.max_vel
+            flags |= np.where(bad_vel, BAD_VELOCITY, 0)
+
+        hit = np.flatnonzero(flags)
+        if len(hit):
+            rows = np.zeros(len(hit), dtype=ANOMALY_DTYPE)
+            rows['ts'] = ts
+            rows['prev_ts'] = self._ts[ids[hit]]
+            rows['veh_id'] = ids[hit]
+            rows['edge'] = edge[hit]
+            rows['prev_edge'] = prev_edge[hit]
+            rows['prev_ratio'] = prev_ratio[hit]
+            rows['ratio'] = ratio[hit]
+            rows['delta'] = delta[hit]
+            rows['prev_vel'] = prev_vel[hit]
+            rows['vel'] = vel[hit]
+            rows['flags'] = flags[hit]
+            self._hits.append(rows)
+
+        self._seen[ids] = True
+        self._ts[ids] = ts
+        self._edge[ids] = edge
+        self._ratio[ids] = ratio
+        self._vel[ids] = vel
+
+    def state(self) -> np.ndarray:
+        """본 차량들의 마지막 상태 (STATE_DTYPE) — 구간 병렬 scan 이음매 처리용."""
+        ids = np.flatnonzero(self._seen)
+        out = np.empty(len(ids), dtype=STATE_DTYPE)
+        out['veh_id'] = ids
+        out['ts'] = self._ts[ids]
+        out['edge'] = self._edge[ids]
+        out['ratio'] = self._ratio[ids]
+        out['vel'] = self._vel[ids]
+        return out
+
+    def set_state(self, state: np.ndarray):
+        """state() 결과로 해당 차량들의 직전 상태를 덮어씀."""
+        ids = state['veh_id'].astype(np.int64)
+        self._seen[ids] = True
+        self._ts[ids] = state['ts']
+        self._edge[ids] = state['edge']
+        self._ratio[ids] = state['ratio']
+        self._vel[ids] = state['vel']
+
+    def result(self) -> np.ndarray:
+        """누적 anomaly 를 (ts, veh_id) 순으로 정렬한 표."""
+        if not self._hits:
+            return np.empty(0, dtype=ANOMALY_DTYPE)
+        out = np.concatenate(self._hits)
+        return out[np.lexsort((out['veh_id'], out['ts']))]
+
+
+def detect_fleet_anomalies(filepath: str | Path,
+                           threshold: float = 0.3,
+                           ts_range: Optional[tuple[int, int]] = None,
+                           max_vel: Optional[float] = None) -> np.ndarray:
+    """snapshot 한 번 훑어 전 차량 anomaly 표 반환."""
+    scanner = FleetAnomalyScanner(threshold, max_vel)
+    for ts, arr in iter_frame_arrays(filepath, ts_range):
+        scanner.feed(ts, arr)
+    return scanner.result()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+snapshot.bin 의 frame offset index (.frameidx sidecar).
+
+snapshot 은 frame 마다 가변 길이 activeEdges 가 붙어서, 늦은 시간대 frame 에
+가려면 byte 0 부터 모든 frame 의 activeEdges 를 건너뛰며 걸어야 했다.
+frame 별 (ts, num_v, byte offset, frame 크기) 를 한 번 기록해 두면
+ts_range 의 첫 frame 을 binary search 로 찾아 바로 seek 한다 (O(log n)).
+
+ts 는 "대체로" 오름차순이라 ts_index.py 와 같은 방식 (ts 누적 max / 역누적 min
+을 searchsorted) 으로 후보 frame 구간을 구한다 — 정렬이 깨져도 결과는 정확.
+
+frame 경계 탐색은 frame_walk.py (Numba 가 있으면 JIT kernel) 가 담당.
+
+sidecar 는 원본 size / mtime_ns 를 기록 — 녹화 중이라 파일이 자라거나 바뀌면
+자동 재생성. 쓰기 권한 없으면 메모리에만 둔다.
+
+I/O:
+  Input:
+    - filepath: *_snapshot.bin
+    - ts_from, ts_to: 닫힌 구간 [ts_from, ts_to] (ms)
+  Output:
+    - <stem>.frameidx sidecar (원본과 같은 폴더)
+    - load_frame_index(filepath) → FrameIndex
+        .entries                       # (n_frames,) ts / num_v / offset / size
+        .frame_range(ts_from, ts_to)   # 후보 frame 구간 [lo, hi)
+"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from log_parser import map_file
+from frame_walk import walk_frame_arrays
+
+FRAMEIDX_MAGIC = b'FRIX'
+FRAMEIDX_VERSION = 1
+# magic(4) version(u32) src_size(u64) src_mtime_ns(u64) n_frames(u32)
+_HEADER = struct.Struct('<4sIQQI')
+FRAME_ENTRY_DTYPE = np.dtype([('ts', '<u4'), ('num_v', '<u4'),
+                              ('offset', '<u8'), ('size', '<u8')])
+
+
+@dataclass
+class FrameIndex:
+    entries: np.ndarray  # FRAME_ENTRY_DTYPE, 파일 순서
+
+    def __post_init__(self):
+        ts = self.entries['ts']
+        self._prefix_max = np.maximum.accumulate(ts) if len(ts) else ts
+        self._suffix_min = np.minimum.accumulate(ts[::-1])[::-1] if len(ts) else ts
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def frame_range(self, ts_from: int | None, ts_to: int | None) -> tuple[int, int]:
+        """[ts_from, ts_to] frame 을 모두 포함하는 후보 frame 구간 [lo, hi)."""
+        lo = 0 if ts_from is None else int(np.searchsorted(self._prefix_max, ts_from, side='left'))
+        hi = len(self.entries) if ts_to is None else int(np.searchsorted(self._suffix_min, ts_to, side='right'))
+        return (lo, hi) if lo < hi else (0, 0)
+
+
+def frameidx_path(filepath: str | Path) -> Path:
+    return Path(filepath).with_suffix('.frameidx')
+
+
+def build_frame_index(filepath: str | Path, write: bool = True) -> FrameIndex:
+    """snapshot 을 한 번 훑어 frame 위치 기록 → sidecar 기록 (write=False 면 메모리만)."""
+    filepath = Path(filepath)
+    st = filepath.stat()
+    offset, ts, num_v, next_off = walk_frame_arrays(map_file(filepath))
+    entries = np.empty(len(offset), dtype=FRAME_ENTRY_DTYPE)
+    entries['ts'] = ts
+    entries['num_v'] = num_v
+    entries['offset'] = offset
+    entries['size'] = next_off - offset
+
+    idx = FrameIndex(entries)
+    if write:
+        header = _HEADER.pack(FRAMEIDX_MAGIC, FRAMEIDX_VERSION, st.st_size, st.st_mtime_ns, len(entries))
+        try:
+            with open(frameidx_path(filepath), 'wb') as f:
+                f.write(header)
+                f.write(entries.tobytes())
+        except OSError:
+            pass  # 읽기 전용 로그 폴더 — 이번 실행은 메모리 index 로 충분
+    return idx
+
+
+def _read_sidecar(filepath: Path) -> FrameIndex | None:
+    """sidecar 가 원본(size/mtime)과 일치하면 FrameIndex, 아니면 None."""
+    try:
+        data = frameidx_path(filepath).read_bytes()
+        st = filepath.stat()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, size, mtime_ns, n_frames = _HEADER.unpack_from(data)
+    if (magic != FRAMEIDX_MAGIC or version != FRAMEIDX_VERSION
+            or size != st.st_size or mtime_ns != st.st_mtime_ns
+            or len(data) != _HEADER.size + n_frames * FRAME_ENTRY_DTYPE.itemsize):
+        return None
+    return FrameIndex(np.frombuffer(data, dtype=FRAME_ENTRY_DTYPE, count=n_frames, offset=_HEADER.size))
+
+
+def load_frame_index(filepath: str | Path) -> FrameIndex:
+    """유효한 sidecar 가 있으면 로드, 없거나 stale 이면 재생성."""
+    filepath = Path(filepath)
+    idx = _read_sidecar(filepath)
+    return idx if idx is not None else build_frame_index(filepath)
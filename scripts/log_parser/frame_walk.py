@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+snapshot frame 경계 탐색 kernel — Numba 가 있으면 JIT, 없으면 walk_frames.
+
+frame 경계 찾기는 본질적으로 순차적이다: 다음 frame 위치를 알려면 현재 frame 의
+activeEdges 를 끝까지 읽어야 한다. walk_frames 는 edge 마다 struct.unpack_from 을
+여러 번 불러서 frame_index 생성 / 구간 병렬 scan 의 대부분이 여기서 쓰였다.
+
+_walk_kernel 은 uint8 배열 위에서 같은 규칙 (magic 재동기화, 파일 끝 잘림 처리까지
+walk_frames 와 동일) 으로 frame 위치를 배열에 채우는 단순 loop 라 numba.njit 로
+그대로 compile 된다. 출력은 고정 크기 배열 묶음 (KERNEL_BATCH_FRAMES 개씩) 이라
+kernel 을 여러 번 불러 이어 붙인다.
+
+Numba 는 선택 의존성 — 없으면 walk_frames 결과를 같은 배열 형식으로 모은다.
+
+I/O:
+  Input:  raw (snapshot mmap / bytes), off (시작 offset), stop (이 offset 이상에서 시작하는 frame 전에서 멈춤)
+  Output: walk_frame_arrays(raw, off, stop) → (offset, ts, num_v, next_off) int64 배열 4개
+"""
+
+import numpy as np
+
+from snapshot_streaming import HEADER_SIZE, SNAPSHOT_MAGIC, VEHICLE_RECORD_SIZE, walk_frames
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# kernel 한 번 호출이 채우는 최대 frame 수 (출력 배열 4 × 8B × 65536 = 2MB)
+KERNEL_BATCH_FRAMES = 65536
+
+_MAGIC_LO = SNAPSHOT_MAGIC & 0xFF
+_MAGIC_HI = SNAPSHOT_MAGIC >> 8
+
+
+def _u16(buf, i):
+    return int(buf[i]) | (int(buf[i + 1]) << 8)
+
+
+def _u32(buf, i):
+    return _u16(buf, i) | (_u16(buf, i + 2) << 16)
+
+
+def _walk_kernel(buf, off, stop, out_off, out_ts, out_nv, out_next):
+    """buf[off:] 에서 frame 을 최대 len(out_off) 개 찾아 채움 → (찾은 수, 다음 off, 끝났는지).
+
+    walk_frames 와 같은 규칙 — numba 없이도 (느리지만) 그대로 실행된다.
+    """
+    total = buf.shape[0]
+    cap = out_off.shape[0]
+    n = 0
+    while off + HEADER_SIZE <= total and n < cap:
+        if buf[off] != _MAGIC_LO or buf[off + 1] != _MAGIC_HI:
+            # 다음 0xCAFE 까지 재동기화
+            nxt = -1
+            p = off + 1
+            while p + 1 < total:
+                if buf[p] == _MAGIC_LO and buf[p + 1] == _MAGIC_HI:
+                    nxt = p
+                    break
+                p += 1
+            if nxt < 0:
+                return n, off, True
+            off = nxt
+            continue
+        if off >= stop:
+            return n, off, True
+
+        ts = _u32(buf, off + 2)
+        num_v = _u16(buf, off + 6)
+        cur = off + HEADER_SIZE + VEHICLE_RECORD_SIZE * num_v
+        if cur + 2 > total:
+            return n, off, True
+        num_e = _u16(buf, cur)
+        cur += 2
+        for _ in range(num_e):
+            if cur + 4 > total:
+                break
+            cur += 4 + 2 * _u16(buf, cur + 2)
+
+        out_off[n] = off
+        out_ts[n] = ts
+        out_nv[n] = num_v
+        out_next[n] = cur
+        n += 1
+        off = cur
+    return n, off, off + HEADER_SIZE > total
+
+
+if HAS_NUMBA:
+    _u16 = numba.njit(inline='always')(_u16)
+    _u32 = numba.njit(inline='always')(_u32)
+    _walk_kernel_jit = numba.njit(cache=True, nogil=True)(_walk_kernel)
+
+
+def _walk_python(raw, off: int, stop: int):
+    rows = []
+    for row in walk_frames(raw, off):
+        if row[0] >= stop:
+            break
+        rows.append(row)
+    arr = np.array(rows, dtype=np.int64).reshape(-1, 4)
+    return arr[:, 0], arr[:, 1], arr[:, 2], arr[:, 3]
+
+
+def walk_frame_arrays(raw, off: int = 0, stop: int | None = None):
+    """raw 의 frame 위치를 한 번에 → (offset, ts, num_v, next_off) int64 배열.
+
+    walk_frames 를 끝까지 돌린 결과와 같다 (stop 이 있으면 시작 offset 이 stop
+    이상인 frame 부터는 제외).
+    """
+    stop = len(raw) if stop is None else stop
+    if not HAS_NUMBA:
+        return _walk_python(raw, off, stop)
+
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    parts = []
+    while True:
+        outs = [np.empty(KERNEL_BATCH_FRAMES, dtype=np.int64) for _ in range(4)]
+        n, off, done = _walk_kernel_jit(buf, off, stop, *outs)
+        parts.append([o[:n] for o in outs])
+        if done:
+            break
+    return tuple(np.concatenate([p[i] for p in parts]) for i in range(4))
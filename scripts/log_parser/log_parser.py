@@ -11,11 +11,15 @@ VPS SimLogger 바이너리 로그 파서
 """
 
 import argparse
+import mmap
 import os
+import re
 import struct
 import sys
 from pathlib import Path
 
+from stream_stats import SummaryStats
+
 try:
     import numpy as np
     HAS_NUMPY = True
@@ -96,6 +100,22 @@ CP_FLAGS = {
     16: 'MOVE_SLOW',
 }
 
+# snapshot stopReason bitmask (constants.ts StopReason 와 동기화)
+STOP_REASON = {
+    1:    'OBS_LIDAR',
+    2:    'OBS_CAMERA',
+    4:    'E_STOP',
+    8:    'LOCKED',
+    16:   'DESTINATION_REACHED',
+    32:   'PATH_BLOCKED',
+    64:   'LOAD_ON',
+    128:  'LOAD_OFF',
+    256:  'NOT_INITIALIZED',
+    512:  'INDIVIDUAL_CONTROL',
+    1024: 'SENSORED',
+    2048: 'IDLE',
+}
+
 # Checkpoint action (LockMgr/types.ts CheckpointAction 와 동기화)
 CP_ACTION = {
     0: 'LOADED',
@@ -106,6 +126,95 @@ CP_ACTION = {
 }
 
 
+# struct format 문자 → numpy dtype (전부 little-endian, padding 'x' 는 offset 만 전진)
+_STRUCT_TO_NP = {'I': '<u4', 'H': '<u2', 'B': 'u1', 'f': '<f4'}
+
+
+def _build_event_dtype(etype: int):
+    """EVENT_TYPES[etype] 의 struct format → packed numpy structured dtype.
+
+    필드명은 COLUMNS 를 그대로 쓴다. padding 바이트('x')는 이름 없는 구멍으로
+    두고 offsets/itemsize 를 명시 → 레코드 크기가 struct 와 byte 단위로 일치.
+    '9f' 같은 반복 카운트는 컬럼 수와 맞으면 개별 필드로, 아니면(ML_ROUTE 의
+    edge × 100) 하나의 subarray 필드로 묶는다.
+    """
+    _, record_size, fmt = EVENT_TYPES[etype]
+    columns = COLUMNS[etype]
+    tokens = [(int(n) if n else 1, code)
+              for n, code in re.findall(r'(\d*)([a-zA-Z])', fmt.lstrip('<'))]
+    n_grouped = sum(1 for _, code in tokens if code != 'x')
+    expand = n_grouped != len(columns)
+
+    names, formats, offsets = [], [], []
+    off = 0
+    for count, code in tokens:
+        if code == 'x':
+            off += count
+            continue
+        np_code = _STRUCT_TO_NP[code]
+        item = np.dtype(np_code).itemsize
+        if expand or count == 1:
+            for _ in range(count):
+                names.append(columns[len(names)])
+                formats.append(np_code)
+                offsets.append(off)
+                off += item
+        else:
+            names.append(columns[len(names)])
+            formats.append((np_code, (count,)))
+            offsets.append(off)
+            off += item * count
+
+    if off != record_size or len(names) != len(columns):
+        raise ValueError(f"dtype mismatch for event {etype}: {off}B/{record_size}B")
+    return np.dtype({'names': names, 'formats': formats,
+                     'offsets': offsets, 'itemsize': record_size})
+
+
+# etype → numpy structured dtype (numpy 없으면 빈 dict — struct fallback 사용)
+EVENT_DTYPES = {etype: _build_event_dtype(etype) for etype in EVENT_TYPES} if HAS_NUMPY else {}
+
+# snapshot frame 의 14B vehicle 레코드 (packed — 정렬 padding 없음)
+SNAPSHOT_VEHICLE_SIZE = 14
+SNAPSHOT_VEHICLE_DTYPE = np.dtype([('veh_id', '<u2'), ('edge', '<u2'), ('ratio', '<f4'),
+                                   ('vel', '<f4'), ('stop', '<u2')]) if HAS_NUMPY else None
+_SNAPSHOT_VEHICLE_KEYS = ('vehId', 'currentEdge', 'ratio', 'velocity', 'stopReason')
+
+
+# streaming reader 가 이만큼 읽을 때마다 지나간 page 를 RSS 에서 내림
+MMAP_RELEASE_BYTES = 64 * 1024 * 1024
+
+
+def map_file(filepath):
+    """파일을 read-only mmap 으로 매핑 (read_bytes 대체).
+
+    ACCESS_READ = MAP_SHARED 라 같은 세션을 여는 여러 analyze.py 프로세스가
+    OS page cache 를 공유하고, 실제로 건드린 page 만 RSS 에 잡힌다.
+    fd 는 바로 닫아도 매핑은 유지. 반환 객체를 참조하는 numpy 배열이 살아있는
+    동안 매핑도 유지되므로 명시적으로 close 하지 않는다.
+    빈 파일은 mmap 불가 → b'' 반환.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def release_pages(buf, start: int, end: int):
+    """buf[start:end] 의 mapped page 를 프로세스 RSS 에서 내림 (page cache 는 유지).
+
+    streaming reader 가 지나간 구간에 호출 → 파일 크기와 무관하게 peak RSS 일정.
+    다시 접근하면 page cache 에서 투명하게 재매핑되므로 안전.
+    mmap 이 아니거나 madvise 미지원 플랫폼(Windows)이면 no-op.
+    """
+    if not isinstance(buf, mmap.mmap) or not hasattr(mmap, 'MADV_DONTNEED'):
+        return
+    start -= start % mmap.PAGESIZE
+    end -= end % mmap.PAGESIZE
+    if end > start:
+        buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
 def format_cp_flags(flags: int) -> str:
     """checkpoint flags bitmask → 사람이 읽을 수 있는 문자열"""
     if flags == 0:
@@ -114,6 +223,14 @@ def format_cp_flags(flags: int) -> str:
     return '|'.join(parts) if parts else f'0x{flags:02x}'
 
 
+def format_stop_reason(reason: int) -> str:
+    """snapshot stopReason bitmask → 사람이 읽을 수 있는 문자열"""
+    if reason == 0:
+        return 'NONE'
+    parts = [name for bit, name in STOP_REASON.items() if reason & bit]
+    return '|'.join(parts) if parts else f'0x{reason:03x}'
+
+
 def detect_file_type(filename: str):
     """파일명에서 이벤트 타입 목록 추출"""
     stem = Path(filename).stem  # e.g., "session_xxx_edge_transit"
@@ -138,7 +255,7 @@ def parse_snapshot_file(filepath: str):
         print(f"[ERROR] File not found: {filepath}", file=sys.stderr)
         return []
 
-    raw = filepath.read_bytes()
+    raw = map_file(filepath)
     blocks = []
     off = 0
     total = len(raw)
@@ -157,21 +274,16 @@ def parse_snapshot_file(filepath: str):
             num_v = struct.unpack_from('<H', raw, off + 6)[0]
             cur = off + 8
 
-            vehicles = []
-            for _ in range(num_v):
-                if cur + 14 > total:
-                    break
-                veh_id, cur_edge = struct.unpack_from('<HH', raw, cur)
-                ratio, vel = struct.unpack_from('<ff', raw, cur + 4)
-                stop_reason = struct.unpack_from('<H', raw, cur + 12)[0]
-                vehicles.append({
-                    'vehId': veh_id,
-                    'currentEdge': cur_edge,
-                    'ratio': ratio,
-                    'velocity': vel,
-                    'stopReason': stop_reason,
-                })
-                cur += 14
+            n_avail = min(num_v, (total - cur) // SNAPSHOT_VEHICLE_SIZE)
+            if HAS_NUMPY:
+                # vehicle 블록을 packed dtype 으로 한 번에 decode
+                rows = np.frombuffer(raw, dtype=SNAPSHOT_VEHICLE_DTYPE, count=n_avail,
+                                     offset=cur).tolist()
+            else:
+                rows = [struct.unpack_from('<HHffH', raw, cur + i * SNAPSHOT_VEHICLE_SIZE)
+                        for i in range(n_avail)]
+            vehicles = [dict(zip(_SNAPSHOT_VEHICLE_KEYS, row)) for row in rows]
+            cur += SNAPSHOT_VEHICLE_SIZE * n_avail
 
             if cur + 2 > total:
                 break
@@ -198,14 +310,62 @@ def parse_snapshot_file(filepath: str):
     return blocks
 
 
+def decode_records(raw, etype: int, name: str = ''):
+    """고정 크기 레코드 buffer → numpy structured ndarray (zero-copy).
+
+    np.frombuffer 로 raw 위에 dtype 만 씌움 — 레코드별 Python 객체 생성 없음.
+    record_size 로 나누어떨어지지 않는 꼬리 바이트는 parse_file 과 동일하게
+    경고 후 버린다. 반환 배열은 raw 를 참조하므로 read-only.
+    """
+    _, record_size, _ = EVENT_TYPES[etype]
+    total_bytes = len(raw)
+    if total_bytes % record_size != 0:
+        label = f"{name}: " if name else ''
+        print(f"[WARN] {label}File size {total_bytes} not aligned to record size {record_size}, "
+              f"truncating to {total_bytes // record_size} records", file=sys.stderr)
+    return np.frombuffer(raw, dtype=EVENT_DTYPES[etype], count=total_bytes // record_size)
+
+
+def parse_file_array(filepath: str, event_types=None):
+    """고정 크기 .bin 파일 → numpy structured ndarray (컬럼 = COLUMNS[etype]).
+
+    parse_file 의 columnar 버전. arr['veh_id'] == 13 같은 벡터 연산으로 필터.
+    ML_ROUTE 는 'edges' 가 (ROUTE_MAX_EDGES,) subarray — pathLen 이후는 쓰레기 값.
+    복수 타입 파일은 parse_file 과 동일하게 첫 타입 레이아웃으로 해석.
+    snapshot(가변 블록)은 미지원 — snapshot_streaming 사용.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("parse_file_array 는 numpy 필요 (pip install numpy)")
+    filepath = Path(filepath)
+    if event_types is None:
+        event_types = detect_file_type(str(filepath))
+    if not event_types or event_types == ['snapshot']:
+        raise ValueError(f"parse_file_array 는 고정 크기 파일 전용: {filepath.name}")
+    etype = event_types[0]
+    if etype not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type: {etype}")
+    return decode_records(map_file(filepath), etype)
+
+
+def records_from_array(arr, etype: int) -> list[dict]:
+    """structured ndarray → list[dict] (parse_file 의 기존 반환 형식)."""
+    columns = COLUMNS[etype]
+    if etype == 2:
+        path_lens = np.minimum(arr['path_len'], ROUTE_MAX_EDGES).tolist()
+        edges = arr['edges']
+        return [{'ts': ts, 'veh_id': veh_id, 'path_len': n, 'edges': edges[i, :n].tolist()}
+                for i, (ts, veh_id, n) in enumerate(zip(arr['ts'].tolist(),
+                                                        arr['veh_id'].tolist(), path_lens))]
+    return [dict(zip(columns, row)) for row in arr.tolist()]
+
+
 def parse_route_file(filepath: str):
     """
     ML_ROUTE binary 파일 파싱 (고정 412B 레코드).
     레코드: ts(u32) vehId(u32) pathLen(u32) + edge(u32) × ROUTE_MAX_EDGES
     edges 는 pathLen 만큼만 잘라 리스트로 반환 (1-based edge index, [0]=현재 edge).
     """
-    records = []
-    raw = Path(filepath).read_bytes()
+    raw = map_file(filepath)
     record_size = 12 + ROUTE_MAX_EDGES * 4
     if len(raw) == 0:
         return []
@@ -213,6 +373,11 @@ def parse_route_file(filepath: str):
         print(f"[WARN] route file {len(raw)} not aligned to {record_size}, "
               f"truncating to {len(raw) // record_size} records", file=sys.stderr)
     num_records = len(raw) // record_size
+    if HAS_NUMPY:
+        arr = np.frombuffer(raw, dtype=EVENT_DTYPES[2], count=num_records)
+        return records_from_array(arr, 2)
+
+    records = []
     for i in range(num_records):
         off = i * record_size
         ts, veh_id, path_len = struct.unpack_from('<III', raw, off)
@@ -252,52 +417,94 @@ def parse_file(filepath: str, event_types=None):
     if event_types == [2]:
         return parse_route_file(str(filepath))
 
-    records = []
-    raw = filepath.read_bytes()
+    raw = map_file(filepath)
     total_bytes = len(raw)
 
     if total_bytes == 0:
         return []
 
-    # 단일 이벤트 타입 파일인 경우 (most common)
-    if len(event_types) == 1:
-        etype = event_types[0]
-        if etype not in EVENT_TYPES:
-            print(f"[ERROR] Unknown event type: {etype}", file=sys.stderr)
-            return []
-        _, record_size, fmt = EVENT_TYPES[etype]
-        columns = COLUMNS[etype]
+    etype = event_types[0]
+    if etype not in EVENT_TYPES:
+        print(f"[ERROR] Unknown event type: {etype}", file=sys.stderr)
+        return []
 
-        if total_bytes % record_size != 0:
-            print(f"[WARN] File size {total_bytes} not aligned to record size {record_size}, "
-                  f"truncating to {total_bytes // record_size} records", file=sys.stderr)
+    # 복수 이벤트 타입 파일 (job.bin = ML_PICKUP + ML_DROPOFF) 도 동일 구조라
+    # 첫 타입 레이아웃으로 해석 — 정렬 경고는 단일 타입 파일에서만
+    if HAS_NUMPY:
+        if len(event_types) == 1:
+            arr = decode_records(raw, etype)
+        else:
+            record_size = EVENT_TYPES[etype][1]
+            arr = np.frombuffer(raw, dtype=EVENT_DTYPES[etype], count=total_bytes // record_size)
+        return records_from_array(arr, etype)
 
-        num_records = total_bytes // record_size
-        for i in range(num_records):
-            offset = i * record_size
-            values = struct.unpack_from(fmt, raw, offset)
-            records.append(dict(zip(columns, values)))
+    # numpy 없음 — struct fallback
+    _, record_size, fmt = EVENT_TYPES[etype]
+    columns = COLUMNS[etype]
+    if len(event_types) == 1 and total_bytes % record_size != 0:
+        print(f"[WARN] File size {total_bytes} not aligned to record size {record_size}, "
+              f"truncating to {total_bytes // record_size} records", file=sys.stderr)
+    records = []
+    num_records = total_bytes // record_size
+    for i in range(num_records):
+        values = struct.unpack_from(fmt, raw, i * record_size)
+        records.append(dict(zip(columns, values)))
+    return records
 
-    # 복수 이벤트 타입 파일 (job.bin = ML_PICKUP + ML_DROPOFF)
-    else:
-        # ML_PICKUP과 ML_DROPOFF는 동일한 구조이므로 모두 16바이트
-        _, record_size, fmt = EVENT_TYPES[event_types[0]]
-        columns = COLUMNS[event_types[0]]
-        num_records = total_bytes // record_size
-        for i in range(num_records):
-            offset = i * record_size
-            values = struct.unpack_from(fmt, raw, offset)
-            records.append(dict(zip(columns, values)))
 
-    return records
+# iter_batches 기본 batch 크기 (iter_file 도 이 단위로 decode)
+DEFAULT_BATCH_RECORDS = 65536
+
+
+def _fixed_etype(filepath: Path, event_types, caller: str) -> int:
+    if event_types is None:
+        event_types = detect_file_type(str(filepath))
+    if not event_types or len(event_types) != 1:
+        raise ValueError(f"{caller} 은 단일 타입 파일 전용: {filepath.name}")
+    etype = event_types[0]
+    if etype == 'snapshot' or etype not in EVENT_TYPES:
+        raise ValueError(f"{caller} 은 가변 블록 미지원({filepath.name}) — snapshot_streaming 사용")
+    return etype
+
+
+def iter_batches(filepath: str, batch_records: int = DEFAULT_BATCH_RECORDS, event_types=None):
+    """고정 크기 단일 타입 파일을 batch_records 개씩 structured ndarray 로 yield.
+
+    iter_file(레코드당 dict) 과 parse_file_array(전체 로드) 의 중간 —
+    batch 는 mmap 위의 zero-copy view 라 batch 안에서는 벡터 연산, 파일 전체로는
+    지나간 page 를 release_pages 로 내려 peak RSS ≈ MMAP_RELEASE_BYTES.
+    (지난 batch 를 들고 있어도 값은 유효 — 다시 접근하면 page 가 재적재될 뿐.)
+    ML_ROUTE 도 고정 크기 (edges subarray) 라 지원. snapshot 은 미지원.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("iter_batches 는 numpy 필요 (pip install numpy)")
+    filepath = Path(filepath)
+    etype = _fixed_etype(filepath, event_types, 'iter_batches')
+    record_size = EVENT_TYPES[etype][1]
+    dtype = EVENT_DTYPES[etype]
+    raw = map_file(filepath)
+    if isinstance(raw, mmap.mmap) and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        raw.madvise(mmap.MADV_SEQUENTIAL)
+    num_records = len(raw) // record_size
+    batch_records = max(1, batch_records)
+    released = 0
+    for start in range(0, num_records, batch_records):
+        count = min(batch_records, num_records - start)
+        yield np.frombuffer(raw, dtype=dtype, count=count, offset=start * record_size)
+        pos = (start + count) * record_size
+        if pos - released >= MMAP_RELEASE_BYTES:
+            release_pages(raw, released, pos)
+            released = pos
 
 
 def iter_file(filepath: str, event_types=None):
     """고정 크기 단일 타입 파일을 한 레코드씩 yield (스트리밍).
 
     parse_file 은 전체를 list 로 메모리에 올림 — checkpoint(수백 MB) 같은 큰
-    파일에서 OOM. 이 generator 는 raw bytes 만 한 번 읽고 레코드를 하나씩
-    내보내므로, 호출자가 필터링하면 매칭된 레코드만 메모리에 남는다.
+    파일에서 OOM. 이 generator 는 파일을 mmap 으로 매핑해 레코드를 하나씩
+    내보내고 지나간 page 는 release_pages 로 내리므로, 호출자가 필터링하면
+    매칭된 레코드만 메모리에 남는다 (peak RSS ≈ MMAP_RELEASE_BYTES).
+    numpy 가 있으면 iter_batches 로 batch decode 후 dict 변환.
 
     snapshot/route 가변 블록은 미지원 — parse_file 을 사용할 것.
     """
@@ -306,20 +513,29 @@ def iter_file(filepath: str, event_types=None):
         print(f"[ERROR] File not found: {filepath}", file=sys.stderr)
         return
 
-    if event_types is None:
-        event_types = detect_file_type(str(filepath))
-    if not event_types or len(event_types) != 1:
-        raise ValueError(f"iter_file 은 단일 타입 파일 전용: {filepath.name}")
-    etype = event_types[0]
-    if etype in ('snapshot',) or etype == 2:
+    etype = _fixed_etype(filepath, event_types, 'iter_file')
+    if etype == 2:
         raise ValueError(f"iter_file 은 가변 블록 미지원({filepath.name}) — parse_file 사용")
 
-    _, record_size, fmt = EVENT_TYPES[etype]
     columns = COLUMNS[etype]
-    raw = filepath.read_bytes()
+    if HAS_NUMPY:
+        for batch in iter_batches(filepath, event_types=[etype]):
+            for row in batch.tolist():
+                yield dict(zip(columns, row))
+        return
+
+    _, record_size, fmt = EVENT_TYPES[etype]
+    raw = map_file(filepath)
+    if isinstance(raw, mmap.mmap) and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        raw.madvise(mmap.MADV_SEQUENTIAL)
     num_records = len(raw) // record_size
+    released = 0
     for i in range(num_records):
         yield dict(zip(columns, struct.unpack_from(fmt, raw, i * record_size)))
+        pos = (i + 1) * record_size
+        if pos - released >= MMAP_RELEASE_BYTES:
+            release_pages(raw, released, pos)
+            released = pos
 
 
 def filter_records(records, veh_id=None, ts_from=None, ts_to=None):
@@ -334,34 +550,49 @@ def filter_records(records, veh_id=None, ts_from=None, ts_to=None):
     return filtered
 
 
+def filter_mask(arr, veh_id=None, ts_from=None, ts_to=None):
+    """filter_records 의 structured ndarray 버전 → (n,) bool mask."""
+    names = arr.dtype.names or ()
+    mask = np.ones(len(arr), dtype=bool)
+    if veh_id is not None and 'veh_id' in names:
+        mask &= arr['veh_id'] == veh_id
+    if ts_from is not None and 'ts' in names:
+        mask &= arr['ts'] >= ts_from
+    if ts_to is not None and 'ts' in names:
+        mask &= arr['ts'] <= ts_to
+    return mask
+
+
 def print_summary(records, filepath: str):
-    """통계 요약 출력"""
-    if not records:
+    """통계 요약 출력 (dict 레코드 → SummaryStats 한 번 훑기)"""
+    print_stats(SummaryStats().update_records(records), filepath)
+
+
+def print_stats(stats: SummaryStats, filepath: str):
+    """SummaryStats 출력 — batch 집계 / 병합 결과를 그대로 출력할 때."""
+    if not stats.count:
         print("No records found.")
         return
 
-    ts_values = [r['ts'] for r in records if 'ts' in r]
-    veh_ids = set(r['veh_id'] for r in records if 'veh_id' in r)
-
     print(f"\n{'='*50}")
     print(f"File: {Path(filepath).name}")
-    print(f"Total records: {len(records)}")
-    print(f"Unique vehicles: {len(veh_ids)}")
-    if ts_values:
-        print(f"Time range: {min(ts_values)} ~ {max(ts_values)} ms")
-        print(f"Duration: {max(ts_values) - min(ts_values)} ms")
+    print(f"Total records: {stats.count}")
+    print(f"Unique vehicles: {len(stats.veh_ids)}")
+    if stats.ts_min is not None:
+        print(f"Time range: {stats.ts_min} ~ {stats.ts_max} ms")
+        print(f"Duration: {stats.ts_max - stats.ts_min} ms")
 
     # Edge transit 특수 통계
-    if records and 'enter_ts' in records[0]:
-        durations = [r['exit_ts'] - r['enter_ts'] for r in records if r.get('exit_ts', 0) >= r.get('enter_ts', 0)]
-        if durations:
-            print(f"\nEdge transit stats:")
-            print(f"  Count: {len(durations)}")
-            print(f"  Avg transit time: {sum(durations)/len(durations):.1f} ms")
-            print(f"  Min: {min(durations)} ms, Max: {max(durations)} ms")
-            if records[0].get('edge_len', 0) > 0:
-                lengths = [r['edge_len'] for r in records]
-                print(f"  Avg edge length: {sum(lengths)/len(lengths):.2f} m")
+    if stats.transit_count:
+        p = stats.transit_percentiles()
+        print(f"\nEdge transit stats:")
+        print(f"  Count: {stats.transit_count}")
+        print(f"  Avg transit time: {stats.transit_sum / stats.transit_count:.1f} ms")
+        print(f"  Min: {stats.transit_min} ms, Max: {stats.transit_max} ms")
+        print(f"  p50: {p[0.5]:.0f} ms, p95: {p[0.95]:.0f} ms, p99: {p[0.99]:.0f} ms"
+              f"  (±{stats.transit.alpha:.0%})")
+        if stats.edge_len_sum > 0:
+            print(f"  Avg edge length: {stats.edge_len_sum / stats.count:.2f} m")
 
     print(f"{'='*50}\n")
 
@@ -435,7 +666,9 @@ def main():
   python log_parser.py /path/to/ --session session_xxx --type edge_transit
   python log_parser.py /path/to/sim_123_job.bin --veh 5 --summary
   python log_parser.py /path/to/ --session session_xxx --export-csv ./output/
+  python log_parser.py /path/to/ --session session_xxx --export-parquet ./output/ --veh-buckets 16
   python log_parser.py /path/to/sim_123_veh_state.bin --from 1000 --to 5000
+  python log_parser.py /path/to/sim_123_lock.bin --where "veh_id in (41,108) and wait_ms > 1000"
         """
     )
     parser.add_argument('path', help='파일 경로 또는 디렉토리')
@@ -445,9 +678,18 @@ def main():
     parser.add_argument('--veh', type=int, help='특정 차량 ID 필터')
     parser.add_argument('--summary', action='store_true', help='통계 요약 출력')
     parser.add_argument('--export-csv', metavar='OUTPUT_DIR', help='CSV로 내보내기')
+    parser.add_argument('--export-parquet', metavar='OUTPUT_DIR', help='Parquet로 내보내기 (pyarrow 필요)')
+    parser.add_argument('--export-arrow', metavar='OUTPUT_DIR', help='Arrow IPC(.arrow)로 내보내기 (pyarrow 필요)')
+    parser.add_argument('--row-group', dest='row_group', type=int, default=128 * 1024,
+                        help='Parquet row group / Arrow batch 레코드 수 (기본: 131072)')
+    parser.add_argument('--veh-buckets', dest='veh_buckets', type=int, default=0,
+                        help='columnar export 시 veh_id %% N 으로 파티션 (기본: 0=파티션 없음)')
     parser.add_argument('--from', dest='ts_from', type=str, help='시작 시간 (ms 또는 HH:MM:SS)')
     parser.add_argument('--to', dest='ts_to', type=str, help='종료 시간 (ms 또는 HH:MM:SS)')
     parser.add_argument('--limit', type=int, default=20, help='출력할 최대 레코드 수 (기본: 20)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='병렬 decode worker 수 (기본: 1 = 순차, numpy 필요)')
+    parser.add_argument('--where', help='필터 표현식 (예: "veh_id in (41,108) and wait_ms > 1000")')
 
     args = parser.parse_args()
 
@@ -455,6 +697,15 @@ def main():
     ts_from = parse_time(args.ts_from) if args.ts_from else None
     ts_to = parse_time(args.ts_to) if args.ts_to else None
 
+    where = None
+    if args.where:
+        from where_expr import WhereError, compile_where
+        try:
+            where = compile_where(args.where)
+        except WhereError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+
     path = Path(args.path)
 
     # 파일 목록 결정
@@ -491,13 +742,72 @@ def main():
         print(f"[ERROR] Path not found: {path}", file=sys.stderr)
         sys.exit(1)
 
+    # --jobs N: 고정 크기 파일을 미리 병렬 decode (필터까지 worker 에서 적용)
+    decoded = {}
+    if args.jobs > 1 and HAS_NUMPY and not args.type and not (args.export_parquet or args.export_arrow):
+        from parallel_load import decode_files_parallel
+        fixed = [f for f in files_to_parse
+                 if (detect_file_type(str(f)) or ['snapshot'])[0] not in ('snapshot', 2)]
+        decoded = decode_files_parallel(fixed, args.jobs, veh_filter=args.veh,
+                                        ts_from=ts_from, ts_to=ts_to)
+
     # 파싱 및 출력
     for filepath in sorted(files_to_parse):
         event_types = detect_file_type(str(filepath))
         if args.type:
             event_types = FILE_SUFFIX_TO_TYPES.get(args.type, event_types)
 
-        records = parse_file(str(filepath), event_types)
+        # columnar export 는 dict list 를 거치지 않음 — structured array 에서 바로 변환
+        if args.export_parquet or args.export_arrow:
+            from columnar_export import export_columnar
+            fmt = 'parquet' if args.export_parquet else 'arrow'
+            export_columnar(filepath, args.export_parquet or args.export_arrow, fmt=fmt,
+                            row_group_records=args.row_group, veh_buckets=args.veh_buckets,
+                            veh_id=args.veh, ts_from=ts_from, ts_to=ts_to, where=where)
+            continue
+
+        # --veh 는 .vehidx sidecar 로 그 차량 레코드만, --from/--to 는 .tsidx sidecar 로
+        # 해당 구간만 decode (파일 전체 안 읽음). --where 는 array 단계에서 mask 로 적용
+        arr = None
+        fixed = (HAS_NUMPY and event_types and len(event_types) == 1 and event_types[0] in EVENT_TYPES)
+        if filepath in decoded:
+            arr = decoded[filepath]
+        elif fixed and args.veh is not None and 'veh_id' in COLUMNS[event_types[0]]:
+            from veh_index import read_vehicle
+            arr = read_vehicle(filepath, args.veh, ts_from, ts_to, event_types)
+        elif fixed and (ts_from is not None or ts_to is not None) and 'ts' in COLUMNS[event_types[0]]:
+            from ts_index import read_ts_range
+            arr = read_ts_range(filepath, ts_from, ts_to, event_types)
+        elif fixed and where is not None:
+            arr = parse_file_array(filepath, event_types)
+
+        if where is not None:
+            names = (arr.dtype.names if arr is not None
+                     else COLUMNS.get(event_types[0], []) if event_types else [])
+            if not where.applies_to(names):
+                print(f"[SKIP] {filepath.name}: --where 컬럼 없음 {sorted(where.columns - set(names))}",
+                      file=sys.stderr)
+                continue
+
+        # --summary: dict 안 만들고 batch 단위로 SummaryStats 누적
+        if args.summary and fixed:
+            stats = SummaryStats()
+            for batch in ([arr] if arr is not None else iter_batches(filepath, event_types=event_types)):
+                mask = filter_mask(batch, args.veh, ts_from, ts_to)
+                if where is not None:
+                    mask &= where.mask(batch)
+                stats.update_batch(batch[mask])
+            print_stats(stats, str(filepath))
+            continue
+
+        if arr is not None:
+            if where is not None:
+                arr = arr[where.mask(arr)]
+            records = records_from_array(arr, event_types[0])
+        else:
+            records = parse_file(str(filepath), event_types)
+            if where is not None:
+                records = [r for r in records if where.matches(r)]
 
         # 필터링
         records = filter_records(records, veh_id=args.veh, ts_from=ts_from, ts_to=ts_to)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+세션 .bin 병렬 decode (ProcessPoolExecutor).
+
+load_session / cmd_summary / log_parser main 은 세션의 .bin 8~11 개를 하나씩
+순서대로 처리한다. 이 모듈은 파일 단위(큰 파일은 레코드 경계에 맞춘 chunk 단위)로
+작업을 쪼개 worker 프로세스에 나눠준다.
+
+결과는 dict list 를 pickle 하지 않는다 — worker 가 필터 통과 레코드를
+임시 폴더의 .npy 로 쓰고, 부모는 np.load(mmap_mode='r') 로 memmap 해서 받는다.
+(임시 파일은 로드 직후 삭제 — Linux/WSL 에서는 매핑이 살아있는 동안 데이터 유지.)
+
+I/O:
+  Input:
+    - files: 고정 크기 .bin 경로 목록 (snapshot/route 제외)
+    - jobs: worker 수
+    - veh_filter / ts_from / ts_to: None 이면 해당 필터 없음 (닫힌 구간)
+  Output:
+    - decode_files_parallel → {Path: structured ndarray} (입력 순서, 파일 내 레코드 순서 유지)
+    - summarize_files_parallel → [(suffix, cnt, ts_min, ts_max, n_veh|peak_v)] (cmd_summary 용,
+      chunk 별 SummaryStats 를 merge)
+"""
+
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from log_parser import (COLUMNS, EVENT_DTYPES, EVENT_TYPES, FILE_SUFFIX_TO_TYPES,
+                        detect_file_type, map_file)
+from stream_stats import SummaryStats
+
+# 큰 파일은 이 크기 (레코드 경계 정렬) 로 잘라 여러 worker 에 분배
+PARALLEL_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _decode_unit(unit):
+    """worker: [start, end) 레코드 decode + 필터 → out_path(.npy) 저장. (out_path, count) 반환."""
+    path, etype, start, end, veh_filter, ts_from, ts_to, out_path = unit
+    if start is None:
+        # 차량 질의는 .vehidx 로 파일 단위 gather 가 chunk scan 보다 빠름
+        from veh_index import read_vehicle
+        arr = read_vehicle(path, veh_filter, ts_from, ts_to, [etype])
+    else:
+        record_size = EVENT_TYPES[etype][1]
+        arr = np.frombuffer(map_file(path), dtype=EVENT_DTYPES[etype],
+                            count=end - start, offset=start * record_size)
+        if 'ts' in COLUMNS[etype] and (ts_from is not None or ts_to is not None):
+            mask = np.ones(len(arr), dtype=bool)
+            if ts_from is not None:
+                mask &= arr['ts'] >= ts_from
+            if ts_to is not None:
+                mask &= arr['ts'] <= ts_to
+            arr = arr[mask]
+    np.save(out_path, arr)
+    return out_path, len(arr)
+
+
+def _plan_units(files, veh_filter, ts_from, ts_to, tmp_dir: Path):
+    """파일 → 작업 단위 목록. {file: [out_path, ...]} 도 같이 반환 (결합 순서)."""
+    units, outputs = [], {}
+    for f in files:
+        f = Path(f)
+        etype = detect_file_type(str(f))[0]
+        record_size = EVENT_TYPES[etype][1]
+        num_records = f.stat().st_size // record_size
+        outputs[f] = []
+        if veh_filter is not None and 'veh_id' in COLUMNS[etype]:
+            spans = [(None, None)]
+        else:
+            step = max(1, PARALLEL_CHUNK_BYTES // record_size)
+            spans = [(s, min(s + step, num_records)) for s in range(0, num_records, step)] or [(0, 0)]
+        for start, end in spans:
+            out_path = str(tmp_dir / f'{f.stem}_{len(units)}.npy')
+            units.append((str(f), etype, start, end, veh_filter, ts_from, ts_to, out_path))
+            outputs[f].append(out_path)
+    return units, outputs
+
+
+def decode_files_parallel(files, jobs: int, veh_filter: int | None = None,
+                          ts_from: int | None = None, ts_to: int | None = None) -> dict:
+    """고정 크기 .bin 들을 병렬 decode/필터 → {Path: structured ndarray}."""
+    files = [Path(f) for f in files]
+    if not files:
+        return {}
+    tmp_dir = Path(tempfile.mkdtemp(prefix='vps_logparse_'))
+    try:
+        units, outputs = _plan_units(files, veh_filter, ts_from, ts_to, tmp_dir)
+        with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+            list(pool.map(_decode_unit, units))
+        result = {}
+        for f in files:
+            parts = [np.load(p, mmap_mode='r') for p in outputs[f]]
+            result[f] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return result
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _summarize_unit(unit) -> SummaryStats:
+    """worker: 고정 크기 파일의 [start, end) 레코드 → SummaryStats (부모에서 merge)."""
+    path, etype, start, end = unit
+    record_size = EVENT_TYPES[etype][1]
+    arr = np.frombuffer(map_file(path), dtype=EVENT_DTYPES[etype],
+                        count=end - start, offset=start * record_size)
+    return SummaryStats().update_batch(arr)
+
+
+def summarize_files_parallel(files, jobs: int) -> list[tuple]:
+    """세션 파일별 요약을 병렬 계산 (입력 순서 유지).
+
+    고정 크기 파일은 PARALLEL_CHUNK_BYTES chunk 단위로 나눠 집계 → SummaryStats.merge.
+    snapshot 은 parallel_snapshot 의 byte 구간 단위로 같은 pool 에서 처리.
+    """
+    from parallel_snapshot import scan_range, plan_ranges
+    plan = []  # (suffix, 'fixed'|'snapshot', range(unit 번호))
+    units, snap_units = [], []
+    for f in files:
+        f = Path(f)
+        suffix = next((s for s in FILE_SUFFIX_TO_TYPES if f.stem.endswith(f'_{s}')), None)
+        etype = FILE_SUFFIX_TO_TYPES[suffix][0]
+        if etype == 'snapshot':
+            # 가변 길이 frame — magic 재동기화 byte 구간 (parallel_snapshot.py)
+            mine = [(str(f), a, b, 'summary', {}) for a, b in plan_ranges(f, jobs)]
+            plan.append((suffix, 'snapshot', range(len(snap_units), len(snap_units) + len(mine))))
+            snap_units.extend(mine)
+            continue
+        record_size = EVENT_TYPES[etype][1]
+        num_records = f.stat().st_size // record_size
+        step = max(1, PARALLEL_CHUNK_BYTES // record_size)
+        mine = [(str(f), etype, s, min(s + step, num_records))
+                for s in range(0, num_records, step)] or [(str(f), etype, 0, 0)]
+        plan.append((suffix, 'fixed', range(len(units), len(units) + len(mine))))
+        units.extend(mine)
+
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        snap_partials = list(pool.map(scan_range, snap_units))
+        partials = list(pool.map(_summarize_unit, units))
+
+    rows = []
+    for suffix, kind, idx in plan:
+        if kind == 'snapshot':
+            cnt, peak_v, ts_min, ts_max = 0, 0, None, None
+            for c, lo, hi, pv in (snap_partials[i] for i in idx):
+                cnt += c
+                peak_v = max(peak_v, pv)
+                if lo is not None:
+                    ts_min = lo if ts_min is None else min(ts_min, lo)
+                    ts_max = hi if ts_max is None else max(ts_max, hi)
+            rows.append((suffix, cnt, ts_min, ts_max, peak_v))
+            continue
+        stats = SummaryStats()
+        for i in idx:
+            stats.merge(partials[i])
+        rows.append((suffix, stats.count, stats.ts_min, stats.ts_max, len(stats.veh_ids)))
+    return rows
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+snapshot.bin 병렬 scan — byte 구간 분할 + 0xCAFE magic 재동기화.
+
+frame 은 항상 0xCAFE 로 시작하고 reader 도 이미 magic 으로 재동기화한다.
+그래서 큰 snapshot 을 byte 구간으로 잘라 worker 마다 독립적으로 훑을 수 있다:
+
+  - 각 worker 는 자기 시작 offset 이후 첫 "유효한" frame 을 찾는다
+    (magic + 헤더/vehicle/activeEdges 길이가 파일 안에 맞고, 이어지는 frame 도
+     같은 검사를 통과 — vehicle 데이터 안의 우연한 0xCAFE 를 걸러냄)
+  - 구간 끝도 같은 방법으로 정해 (다음 구간의 시작 frame) 이웃 worker 와
+    정확히 맞물림 → 중복/누락 없음
+  - 결과는 구간 순서 (= 파일 순서, ts 순) 로 합침
+
+fleet anomaly 는 구간 경계에서 이어져야 하므로, worker 는 각 차량의 구간 내
+첫 등장 행과 마지막 상태를 같이 돌려주고 부모가 순서대로 이어 붙인다 —
+결과는 순차 detect_fleet_anomalies 와 동일.
+
+I/O:
+  Input:  *_snapshot.bin, jobs (worker 수)
+  Output:
+    - summarize_snapshot_parallel(filepath, jobs) → (frames, ts_min, ts_max, peak_v)
+    - detect_fleet_anomalies_parallel(filepath, jobs, threshold, ts_range, max_vel) → ANOMALY_DTYPE 표
+    - capture_dense_range_parallel(filepath, ts_range, target_vehs, every_n, jobs) → capture_dense_range 와 같은 list
+"""
+
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from fleet_anomaly import FleetAnomalyScanner
+from frame_walk import walk_frame_arrays
+from log_parser import MMAP_RELEASE_BYTES, SNAPSHOT_VEHICLE_DTYPE, map_file, release_pages
+from snapshot_streaming import (HEADER_SIZE, SNAPSHOT_MAGIC, VEHICLE_RECORD_SIZE,
+                                frame_vehicles, vehicle_mask)
+
+# worker 하나가 맡는 최대 byte 구간 (파일이 작으면 jobs 개로만 나눔)
+SNAPSHOT_CHUNK_BYTES = 32 * 1024 * 1024
+# 재동기화 검증 시 연속으로 확인할 frame 수
+_RESYNC_CHAIN = 3
+_MAGIC_BYTES = struct.pack('<H', SNAPSHOT_MAGIC)
+
+
+def _valid_frame_at(raw, off: int, depth: int = _RESYNC_CHAIN) -> bool:
+    """off 가 frame 구조에 맞는 시작점인지 (다음 depth-1 개 frame 까지 연쇄 확인)."""
+    total = len(raw)
+    if off + HEADER_SIZE > total or struct.unpack_from('<H', raw, off)[0] != SNAPSHOT_MAGIC:
+        return False
+    num_v = struct.unpack_from('<H', raw, off + 6)[0]
+    cur = off + HEADER_SIZE + VEHICLE_RECORD_SIZE * num_v
+    if cur + 2 > total:
+        return False
+    num_e = struct.unpack_from('<H', raw, cur)[0]
+    cur += 2
+    for _ in range(num_e):
+        if cur + 4 > total:
+            return False
+        count = struct.unpack_from('<H', raw, cur + 2)[0]
+        cur += 4 + 2 * count
+    if cur > total:
+        return False  # 우연한 magic 은 대개 activeEdges 가 파일 밖으로 넘침
+    if cur == total or depth <= 1:
+        return True
+    return _valid_frame_at(raw, cur, depth - 1)
+
+
+def find_frame_start(raw, off: int) -> Optional[int]:
+    """off 이후 첫 유효 frame offset (없으면 None)."""
+    while True:
+        pos = raw.find(_MAGIC_BYTES, off)
+        if pos < 0:
+            return None
+        if _valid_frame_at(raw, pos):
+            return pos
+        off = pos + 1
+
+
+def _iter_range_frames(raw, start: int, end: int):
+    """byte 구간 [start, end) 이 소유한 frame 들 (frame dict — iter_snapshot_frames 형식).
+
+    구간 경계는 양쪽 worker 가 같은 find_frame_start 로 정하므로
+    (시작 = find(start), 끝 = find(end)), 이웃 구간과 정확히 맞물린다.
+    경계 근처에 쓰레기 byte 가 있어도 그 구간은 앞 worker 가 순차 reader 와 똑같이 건넌다.
+    첫 구간은 순차 reader 처럼 offset 0 부터.
+    """
+    off = 0 if start == 0 else find_frame_start(raw, start)
+    if off is None:
+        return
+    stop = find_frame_start(raw, end) if end < len(raw) else None
+    stop = len(raw) if stop is None else stop
+    if off >= stop:
+        return
+    released = off
+    for foff, ts, num_v, next_off in zip(*(a.tolist() for a in walk_frame_arrays(raw, off, stop))):
+        yield {'ts': ts, 'num_v': num_v, 'raw': raw,
+               'veh_off': foff + HEADER_SIZE, 'next_off': next_off}
+        if next_off - released >= MMAP_RELEASE_BYTES:
+            release_pages(raw, released, next_off)
+            released = next_off
+
+
+def scan_range(unit):
+    """worker: 구간 하나 scan. op 별 부분 결과 반환."""
+    path, start, end, op, params = unit
+    raw = map_file(path)
+    frames = _iter_range_frames(raw, start, end)
+
+    if op == 'summary':
+        cnt, peak_v, ts_min, ts_max = 0, 0, None, None
+        for fr in frames:
+            cnt += 1
+            peak_v = max(peak_v, fr['num_v'])
+            ts_min = fr['ts'] if ts_min is None else min(ts_min, fr['ts'])
+            ts_max = fr['ts'] if ts_max is None else max(ts_max, fr['ts'])
+        return cnt, ts_min, ts_max, peak_v
+
+    ts_from, ts_to = params['ts_range'] or (0, 0xFFFFFFFF)
+    if op == 'anomalies':
+        scanner = FleetAnomalyScanner(params['threshold'], params['max_vel'])
+        seen = np.zeros(1 << 16, dtype=bool)
+        first_ts, first_rows = [], []
+        for fr in frames:
+            if not ts_from <= fr['ts'] <= ts_to:
+                continue
+            arr = frame_vehicles(fr)
+            new = ~seen[arr['veh_id']]
+            seen[arr['veh_id']] = True
+            if new.any():
+                first_ts.append(np.full(int(new.sum()), fr['ts'], dtype=np.int64))
+                first_rows.append(arr[new])
+            scanner.feed(fr['ts'], arr)
+        table = scanner.result()
+        # 구간 내 첫 등장 행은 이전 구간 상태를 알아야 판정 가능 → 부모가 처리
+        table = table[table['prev_ts'] >= 0]
+        first_ts = np.concatenate(first_ts) if first_ts else np.empty(0, dtype=np.int64)
+        first_rows = (np.concatenate(first_rows) if first_rows
+                      else np.empty(0, dtype=SNAPSHOT_VEHICLE_DTYPE))
+        return table, first_ts, first_rows, scanner.state()
+
+    if op == 'dense':
+        mask = params['mask']
+        return [(fr['ts'], frame_vehicles(fr, mask).copy())
+                for fr in frames if ts_from <= fr['ts'] <= ts_to]
+
+    raise ValueError(f"unknown scan op: {op}")
+
+
+def plan_ranges(filepath: str | Path, jobs: int,
+                chunk_bytes: Optional[int] = None) -> list[tuple[int, int]]:
+    """파일을 [start, end) byte 구간으로 분할 (최소 jobs 개, 구간당 chunk_bytes 이하)."""
+    chunk_bytes = chunk_bytes or SNAPSHOT_CHUNK_BYTES
+    size = Path(filepath).stat().st_size
+    n = max(1, jobs, -(-size // max(1, chunk_bytes)))
+    bounds = np.linspace(0, size, n + 1).astype(np.int64).tolist()
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a] or [(0, 0)]
+
+
+def _run(filepath, jobs, op, params=None) -> list:
+    units = [(str(filepath), a, b, op, params or {}) for a, b in plan_ranges(filepath, jobs)]
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(scan_range, units))
+
+
+def summarize_snapshot_parallel(filepath: str | Path, jobs: int) -> tuple:
+    """(frame 수, ts_min, ts_max, peak_v)."""
+    cnt, peak_v, ts_min, ts_max = 0, 0, None, None
+    for c, lo, hi, pv in _run(filepath, jobs, 'summary'):
+        cnt += c
+        peak_v = max(peak_v, pv)
+        if lo is not None:
+            ts_min = lo if ts_min is None else min(ts_min, lo)
+            ts_max = hi if ts_max is None else max(ts_max, hi)
+    return cnt, ts_min, ts_max, peak_v
+
+
+def detect_fleet_anomalies_parallel(filepath: str | Path, jobs: int,
+                                    threshold: float = 0.3,
+                                    ts_range: Optional[tuple[int, int]] = None,
+                                    max_vel: Optional[float] = None) -> np.ndarray:
+    """detect_fleet_anomalies 의 구간 병렬 버전 (결과 동일)."""
+    parts = _run(filepath, jobs, 'anomalies',
+                 {'threshold': threshold, 'ts_range': ts_range, 'max_vel': max_vel})
+    # 이음매: 구간 순서대로, 각 차량의 구간 내 첫 등장을 직전 구간까지의 상태와 비교
+    carry = FleetAnomalyScanner(threshold, max_vel)
+    tables = []
+    for table, first_ts, first_rows, last_state in parts:
+        tables.append(table)
+        order = np.argsort(first_ts, kind='stable')
+        first_ts, first_rows = first_ts[order], first_rows[order]
+        bounds = np.flatnonzero(np.diff(first_ts)) + 1
+        for ts, rows in zip(np.split(first_ts, bounds), np.split(first_rows, bounds)):
+            if len(ts):
+                carry.feed(int(ts[0]), rows)
+        carry.set_state(last_state)
+    tables.append(carry.result())
+    out = np.concatenate(tables)
+    return out[np.lexsort((out['veh_id'], out['ts']))]
+
+
+def capture_dense_range_parallel(filepath: str | Path,
+                                 ts_range: tuple[int, int],
+                                 target_vehs: Optional[Iterable[int]] = None,
+                                 every_n: int = 1,
+                                 jobs: int = 1) -> list[dict]:
+    """capture_dense_range 의 구간 병렬 버전 (worker 는 frame 별 vehicle 배열만 반환)."""
+    parts = _run(filepath, jobs, 'dense',
+                 {'ts_range': ts_range,
+                  'mask': vehicle_mask(set(target_vehs)) if target_vehs is not None else None})
+    frames = [fr for part in parts for fr in part][::every_n]
+    return [{'ts': ts, 'data': {vid: {'edge': e, 'ratio': r, 'vel': v, 'stop': s}
+                                for vid, e, r, v, s in arr.tolist()}}
+            for ts, arr in frames]
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+snapshot.bin → dense columnar replay store (memmap .npy 묶음).
+
+"t 시점에 X 차량은 어디?" / "속도가 어떻게 변했나?" 같은 replay 질의는 매번
+가변 블록 snapshot 을 다시 파싱했다. 한 번 변환해 두면 frames × vehicles
+행렬을 memmap 으로 열어 슬라이싱만 한다 (파싱 0, 필요한 page 만 읽음).
+
+  ts       (F,)    uint32  frame ts
+  veh_ids  (V,)    uint16  열 번호 → vehId (오름차순)
+  edge     (F, V)  uint16
+  ratio    (F, V)  float32
+  vel      (F, V)  float32
+  stop     (F, V)  uint16
+  present  (F, V)  bool    그 frame 에 차량이 없으면 False (다른 값은 0 — 무시)
+
+셀당 13B — snapshot 원본(14B/차량 + activeEdges) 보다 작고, dict 기반
+메모리 표현(차량당 수백 B)과는 비교가 안 된다.
+
+저장 위치: snapshot 옆 <stem>.replay/ (meta.json 에 원본 size / mtime_ns 기록).
+자동 생성하지 않음 — 원본과 비슷한 크기라 명시적으로 변환
+(analyze.py --build-replay). 있고 최신이면 capture_* / detect_ratio_jumps 가 자동 사용.
+
+I/O:
+  Input:  *_snapshot.bin
+  Output:
+    - convert_snapshot(filepath) → ReplayStore (<stem>.replay/ 기록)
+    - open_replay_store(filepath) → ReplayStore | None (없거나 stale 이면 None)
+    - ReplayStore.frames_in(ts_from, ts_to) / frame_at(ts) / vehicle_track(veh) / frames_data(frames)
+"""
+
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from frame_index import load_frame_index
+from log_parser import map_file
+from snapshot_streaming import HEADER_SIZE, frame_vehicles
+
+REPLAY_VERSION = 1
+_MATRICES = {'edge': np.uint16, 'ratio': np.float32, 'vel': np.float32,
+             'stop': np.uint16, 'present': np.bool_}
+
+
+@dataclass
+class ReplayStore:
+    ts: np.ndarray
+    veh_ids: np.ndarray
+    edge: np.ndarray
+    ratio: np.ndarray
+    vel: np.ndarray
+    stop: np.ndarray
+    present: np.ndarray
+
+    def __post_init__(self):
+        self._slot = np.full(1 << 16, -1, dtype=np.int64)
+        self._slot[self.veh_ids] = np.arange(len(self.veh_ids))
+        self._prefix_max = np.maximum.accumulate(self.ts) if len(self.ts) else self.ts
+        self._suffix_min = np.minimum.accumulate(self.ts[::-1])[::-1] if len(self.ts) else self.ts
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.ts)
+
+    def slots(self, vehs) -> np.ndarray:
+        """vehId 목록 → 열 번호 (store 에 없는 차량은 제외)."""
+        ids = np.fromiter(vehs, dtype=np.int64)
+        s = self._slot[ids[(ids >= 0) & (ids < len(self._slot))]]
+        return s[s >= 0]
+
+    def frames_in(self, ts_from: int, ts_to: int) -> np.ndarray:
+        """ts ∈ [ts_from, ts_to] 인 frame 번호 (파일 순서)."""
+        lo = int(np.searchsorted(self._prefix_max, ts_from, side='left'))
+        hi = int(np.searchsorted(self._suffix_min, ts_to, side='right'))
+        if lo >= hi:
+            return np.empty(0, dtype=np.int64)
+        seg = self.ts[lo:hi]
+        return lo + np.flatnonzero((seg >= ts_from) & (seg <= ts_to))
+
+    def frame_at(self, ts: int) -> int | None:
+        """ts 이상인 첫 frame 번호 (없으면 None)."""
+        i = int(np.searchsorted(self._prefix_max, ts, side='left'))
+        return i if i < len(self.ts) else None
+
+    def frame_data(self, i: int, slots=None) -> dict:
+        """frame i → {vehId: {edge, ratio, vel, stop}} (snapshot_streaming capture 형식)."""
+        return self.frames_data(np.array([i]), slots)[0]
+
+    def frames_data(self, frames, slots=None) -> list[dict]:
+        """frame 번호 배열 → frame 별 {vehId: {...}} list (행렬은 한 번에 gather)."""
+        cols = np.arange(len(self.veh_ids)) if slots is None else np.asarray(slots)
+        frames = np.asarray(frames, dtype=np.int64)
+        sub = np.ix_(frames, cols)
+        present = self.present[sub]
+        vids = self.veh_ids[cols].tolist()
+        rows = zip(present.tolist(), self.edge[sub].tolist(), self.ratio[sub].tolist(),
+                   self.vel[sub].tolist(), self.stop[sub].tolist())
+        return [{vid: {'edge': e, 'ratio': r, 'vel': v, 'stop': s}
+                 for vid, p, e, r, v, s in zip(vids, ps, es, rs, vs, ss) if p}
+                for ps, es, rs, vs, ss in rows]
+
+    def vehicle_track(self, veh_id: int, ts_from: int = 0, ts_to: int = 0xFFFFFFFF) -> dict:
+        """차량 한 대의 시계열 {'ts', 'edge', 'ratio', 'vel', 'stop'} (존재하는 frame 만)."""
+        slot = int(self._slot[veh_id]) if 0 <= veh_id < len(self._slot) else -1
+        if slot < 0:
+            return {'ts': self.ts[:0], 'edge': np.empty(0, dtype=self.edge.dtype),
+                    'ratio': np.empty(0, dtype=self.ratio.dtype), 'vel': np.empty(0, dtype=self.vel.dtype),
+                    'stop': np.empty(0, dtype=self.stop.dtype)}
+        frames = self.frames_in(ts_from, ts_to)
+        frames = frames[self.present[frames, slot]]
+        return {'ts': self.ts[frames], 'edge': self.edge[frames, slot],
+                'ratio': self.ratio[frames, slot], 'vel': self.vel[frames, slot],
+                'stop': self.stop[frames, slot]}
+
+
+def replay_dir(filepath: str | Path) -> Path:
+    return Path(filepath).with_suffix('.replay')
+
+
+def _load(out: Path) -> ReplayStore:
+    arrs = {name: np.load(out / f'{name}.npy', mmap_mode='r')
+            for name in ('ts', 'veh_ids', *_MATRICES)}
+    return ReplayStore(**arrs)
+
+
+def convert_snapshot(filepath: str | Path) -> ReplayStore:
+    """snapshot → <stem>.replay/ 변환 (frame index 로 2-pass: 차량 집합 → 행렬 채우기)."""
+    filepath = Path(filepath)
+    st = filepath.stat()
+    out = replay_dir(filepath)
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir()
+
+    entries = load_frame_index(filepath).entries
+    raw = map_file(filepath)
+    frames = [{'raw': raw, 'num_v': int(e['num_v']), 'veh_off': int(e['offset']) + HEADER_SIZE}
+              for e in entries]
+
+    seen = np.zeros(1 << 16, dtype=bool)
+    for fr in frames:
+        seen[frame_vehicles(fr)['veh_id']] = True
+    veh_ids = np.flatnonzero(seen).astype(np.uint16)
+    slot = np.full(1 << 16, -1, dtype=np.int64)
+    slot[veh_ids] = np.arange(len(veh_ids))
+
+    shape = (len(frames), len(veh_ids))
+    np.save(out / 'ts.npy', np.ascontiguousarray(entries['ts']))
+    np.save(out / 'veh_ids.npy', veh_ids)
+    mats = {name: np.lib.format.open_memmap(out / f'{name}.npy', mode='w+', dtype=dt, shape=shape)
+            for name, dt in _MATRICES.items()}
+    for i, fr in enumerate(frames):
+        arr = frame_vehicles(fr)
+        cols = slot[arr['veh_id']]
+        for name in ('edge', 'ratio', 'vel', 'stop'):
+            mats[name][i, cols] = arr[name]
+        mats['present'][i, cols] = True
+    for m in mats.values():
+        m.flush()
+    del mats
+
+    # meta.json 은 마지막에 — 변환 도중 중단되면 store 로 인정 안 됨
+    (out / 'meta.json').write_text(json.dumps({
+        'version': REPLAY_VERSION, 'src_size': st.st_size, 'src_mtime_ns': st.st_mtime_ns,
+        'n_frames': shape[0], 'n_vehicles': shape[1]}))
+    return _load(out)
+
+
+def open_replay_store(filepath: str | Path) -> ReplayStore | None:
+    """최신 replay store 가 있으면 memmap 으로 열고, 없거나 원본이 바뀌었으면 None."""
+    filepath = Path(filepath)
+    out = replay_dir(filepath)
+    try:
+        meta = json.loads((out / 'meta.json').read_text())
+        st = filepath.stat()
+    except (OSError, ValueError):
+        return None
+    if (meta.get('version') != REPLAY_VERSION or meta.get('src_size') != st.st_size
+            or meta.get('src_mtime_ns') != st.st_mtime_ns):
+        return None
+    return _load(out)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+세션 파일을 한 번씩만 훑어 여러 분석을 동시에 — visitor 방식 report engine.
+
+cmd_summary / cmd_stuck / cmd_transfers / cmd_lock_detail / cmd_checkpoint 는 각자
+파일을 읽는다 (summary 는 batch, 나머지는 load_session 의 dict list). 실행 후 보고서를
+전부 뽑으면 edge_transit / checkpoint 를 여러 번 decode 하고 dict 도 여러 번 만든다.
+
+analyzer 는 관심 suffix 를 선언하고, run_report 가 세션 파일마다 한 번 iter_batches 로
+훑으면서 그 batch (mmap 위 zero-copy structured ndarray) 를 관심 있는 analyzer 전부에
+차례로 넘긴다. analyzer 는 batch 에서 벡터 연산으로 작은 상태만 누적 → 레코드 dict 없음.
+snapshot 은 frame 단위 batch (FRAME_ENTRY_DTYPE — ts / num_v / offset / size) 로 넘긴다.
+
+analyzer 프로토콜 (duck typing — analyze.py 는 numpy 없이도 import 되므로 상속 안 함):
+  suffixes                  관심 suffix tuple (None 이면 세션의 모든 파일)
+  begin_file(f, suffix)     파일 시작
+  feed(suffix, batch)       batch 하나
+  end_file(f, suffix)       파일 끝
+  report()                  결과 출력
+
+OrderedCounter 는 "defaultdict(int) 에 시간순으로 += 1 → 개수 내림차순 (동률은 처음 본 순)"
+패턴을 batch 로 하기 위한 도구 — key 별 개수와 처음 본 (ts, 파일 위치) 를 들고 있다.
+
+I/O:
+  Input:  session_dir, analyzers (위 프로토콜 객체 목록)
+  Output:
+    - run_report(session_dir, analyzers) → analyzers (파일별 한 번 훑기, 출력은 각 analyzer.report())
+    - OrderedCounter().add(keys, ts, pos) / .items()
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from log_parser import FILE_SUFFIX_TO_TYPES, iter_batches
+
+
+class OrderedCounter:
+    """key 별 개수 + 처음 본 순서 (ts, 위치) — items() 는 처음 본 순 dict."""
+
+    def __init__(self):
+        self._count: dict = {}
+        self._first: dict = {}
+
+    def add(self, keys: np.ndarray, ts: np.ndarray, pos: np.ndarray):
+        if not len(keys):
+            return
+        order = np.lexsort((pos, ts))
+        uk, at, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        first_ts, first_pos = ts[order][at], pos[order][at]
+        for k, c, t, p in zip(uk.tolist(), counts.tolist(), first_ts.tolist(), first_pos.tolist()):
+            if k in self._count:
+                self._count[k] += c
+                self._first[k] = min(self._first[k], (t, p))
+            else:
+                self._count[k] = c
+                self._first[k] = (t, p)
+
+    def items(self) -> dict:
+        return {k: self._count[k] for k in sorted(self._count, key=self._first.__getitem__)}
+
+    def __len__(self) -> int:
+        return len(self._count)
+
+
+def _file_suffix(f: Path) -> Optional[str]:
+    return next((s for s in FILE_SUFFIX_TO_TYPES if f.stem.endswith(f'_{s}')), None)
+
+
+def run_report(session_dir: str | Path, analyzers: list) -> list:
+    """세션 .bin 을 파일당 한 번 훑어 관심 있는 analyzer 전부에 batch 전달."""
+    for f in sorted(Path(session_dir).glob('*.bin')):
+        suffix = _file_suffix(f)
+        if suffix is None:
+            continue
+        subs = [a for a in analyzers if a.suffixes is None or suffix in a.suffixes]
+        if not subs:
+            continue
+        for a in subs:
+            a.begin_file(f, suffix)
+        if suffix == 'snapshot':
+            from frame_index import load_frame_index
+            batches = [load_frame_index(f).entries]
+        else:
+            batches = iter_batches(f)
+        for batch in batches:
+            for a in subs:
+                a.feed(suffix, batch)
+        for a in subs:
+            a.end_file(f, suffix)
+    return analyzers
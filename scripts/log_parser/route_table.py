@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+ML_ROUTE ragged-array (CSR) reader.
+
+parse_route_file 은 412B 레코드마다 edges list 를 만든다 — 수천 대가 몇 초마다
+reroute 하는 세션에서는 느리고 메모리도 많이 먹음. 이 모듈은 route 파일을
+컬럼 배열 + 하나의 flat edge buffer + offsets 로 풀어서 보관하고,
+"edge E 를 지나는 route", "veh V 의 t1~t2 route" 같은 질의를 벡터 연산으로 처리.
+
+I/O:
+  Input:
+    - filepath: *_route.bin 경로 (ML_ROUTE, 고정 412B 레코드)
+  Output:
+    - RouteTable with:
+        ts, veh_id, path_len        # (n,) uint32 — 레코드 순서 그대로
+        edges                       # (sum(path_len),) uint32 flat buffer
+        offsets                     # (n+1,) int64 — route i = edges[offsets[i]:offsets[i+1]]
+        route(i)                    # i 번째 route 의 edge 배열 (view)
+        routes_with_edge(edge_ids)  # edge 를 포함하는 route index 배열
+        routes_of_vehicle(veh, ts_from, ts_to)  # 차량/시간 범위 route index 배열
+        to_records(idx)             # parse_route_file 과 같은 list[dict]
+    - route_lengths(chunk) / route_csr(chunk): structured array 조각 → clamp 된 pathLen / CSR
+      (columnar_export, session_cache 도 같은 변환을 씀)
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from log_parser import ROUTE_MAX_EDGES, parse_file_array
+
+# 변환 시 한 번에 마스킹하는 레코드 수 — (n × ROUTE_MAX_EDGES) bool 임시 배열 상한
+_CHUNK_RECORDS = 65536
+
+
+@dataclass
+class RouteTable:
+    ts: np.ndarray
+    veh_id: np.ndarray
+    path_len: np.ndarray
+    edges: np.ndarray
+    offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def route(self, i: int) -> np.ndarray:
+        """i 번째 route 의 edge 배열 (1-based edge index, [0]=현재 edge)."""
+        return self.edges[self.offsets[i]:self.offsets[i + 1]]
+
+    def routes_with_edge(self, edge_ids) -> np.ndarray:
+        """edge_ids (int 또는 iterable) 중 하나라도 포함하는 route index (오름차순)."""
+        if np.isscalar(edge_ids):
+            hits = np.flatnonzero(self.edges == edge_ids)
+        else:
+            hits = np.flatnonzero(np.isin(self.edges, np.asarray(list(edge_ids), dtype=np.uint32)))
+        rows = np.searchsorted(self.offsets, hits, side='right') - 1
+        return np.unique(rows)
+
+    def routes_of_vehicle(self, veh_id: int, ts_from: int = 0,
+                          ts_to: int | None = None) -> np.ndarray:
+        """veh_id 의 [ts_from, ts_to] 구간 route index (레코드 순서)."""
+        mask = (self.veh_id == veh_id) & (self.ts >= ts_from)
+        if ts_to is not None:
+            mask &= self.ts <= ts_to
+        return np.flatnonzero(mask)
+
+    def to_records(self, idx=None) -> list[dict]:
+        """route index → parse_route_file 과 동일한 dict list (None 이면 전체)."""
+        idx = range(len(self)) if idx is None else idx
+        return [{'ts': int(self.ts[i]), 'veh_id': int(self.veh_id[i]),
+                 'path_len': int(self.path_len[i]), 'edges': self.route(i).tolist()}
+                for i in idx]
+
+
+def route_lengths(chunk) -> np.ndarray:
+    """ML_ROUTE structured array 조각 → pathLen (ROUTE_MAX_EDGES 로 clamp, parse_route_file 과 동일)."""
+    return np.minimum(chunk['path_len'], ROUTE_MAX_EDGES).astype(np.uint32)
+
+
+def route_csr(chunk) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ML_ROUTE structured array 조각 → (path_len, offsets (len+1,) int64, flat edges)."""
+    path_len = route_lengths(chunk)
+    offsets = np.zeros(len(chunk) + 1, dtype=np.int64)
+    np.cumsum(path_len, out=offsets[1:])
+    # row-major boolean 인덱싱 → route 별 edge 순서 유지
+    mask = np.arange(ROUTE_MAX_EDGES, dtype=np.uint32) < path_len[:, None]
+    return path_len, offsets, chunk['edges'][mask]
+
+
+def load_route_table(filepath: str | Path) -> RouteTable:
+    """*_route.bin → RouteTable. pathLen 은 ROUTE_MAX_EDGES 로 clamp (parse_route_file 과 동일)."""
+    arr = parse_file_array(filepath, [2])
+    path_len = route_lengths(arr)
+    offsets = np.zeros(len(arr) + 1, dtype=np.int64)
+    np.cumsum(path_len, out=offsets[1:])
+
+    edges = np.empty(int(offsets[-1]), dtype=np.uint32)
+    for start in range(0, len(arr), _CHUNK_RECORDS):
+        end = min(start + _CHUNK_RECORDS, len(arr))
+        edges[offsets[start]:offsets[end]] = route_csr(arr[start:end])[2]
+
+    return RouteTable(ts=np.array(arr['ts']), veh_id=np.array(arr['veh_id']),
+                      path_len=path_len, edges=edges, offsets=offsets)
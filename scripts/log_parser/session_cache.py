@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+세션 decode 캐시 — 고정 크기 .bin 을 컬럼별 .npy (memmap) 로 한 번 풀어 두고 재사용.
+
+deadlock 조사는 같은 logs/SESSION_ID/ 에 analyze.py 를 수십 번 돌리는데, 매번
+load_session 이 레코드 layout (packed, 컬럼이 섞인 row) 위에서 필터 / dict 변환을
+처음부터 다시 했다. 캐시는 파일마다 컬럼 하나 = .npy 하나로 풀어 두므로
+  - 필터 (veh / ts / --where) 는 참조하는 컬럼만 읽음 (checkpoint 24B 레코드 중 veh_id 2B)
+  - route 는 412B 고정 레코드의 edges 를 pathLen 만큼만 CSR (edge_ptr, edge_values) 로 보관
+    → 레코드마다 subarray 를 자르던 loop 없이 한 번에 list 변환
+  - meta.json 에 cmd_summary 한 줄 (count / ts 범위 / 고유 차량 수) 을 같이 저장
+    → 두 번째 요약부터는 파일을 읽지 않음
+
+저장 위치: <session_dir>/.analyze_cache/<stem>/ — 컬럼 .npy + meta.json (마지막에 기록).
+원본 size / mtime_ns + CACHE_VERSION + 레코드 dtype (프로토콜 layout) 이 하나라도
+다르면 stale → 다시 생성. 세션 디렉토리에 쓸 수 없으면 캐시 없이 진행 (OSError 무시).
+snapshot 은 대상 아님 (frame_index / replay_store / snapshot_pyramid 가 담당).
+
+ColumnTable 은 structured ndarray 처럼 table['col'] / table[mask] / len / dtype.names 를
+지원해 where_expr.Predicate.mask, SummaryStats.update_batch 에 그대로 넘길 수 있다.
+
+I/O:
+  Input:  고정 크기 *.bin (snapshot 제외), session_dir
+  Output:
+    - load_table(filepath, etype) → ColumnTable | None (캐시 hit 이면 memmap, miss 면 생성 후 반환)
+    - open_table(filepath, etype) → ColumnTable | None (최신 캐시가 있을 때만)
+    - cached_summary(filepath, etype) → (count, ts_min, ts_max, n_vehicles) | None (miss 면 생성)
+    - clear_cache(session_dir) → 지운 파일 항목 수
+"""
+
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from log_parser import (COLUMNS, DEFAULT_BATCH_RECORDS, EVENT_DTYPES, EVENT_TYPES, map_file,
+                        release_pages)
+from route_table import route_csr, route_lengths
+from stream_stats import SummaryStats
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = '.analyze_cache'
+
+_ROUTE = 2
+
+
+@dataclass
+class ColumnTable:
+    etype: int
+    columns: dict  # 컬럼명 → 1-D ndarray (COLUMNS 순서, route 는 'edges' 제외)
+    edge_ptr: Optional[np.ndarray] = None     # route: 레코드 i 의 edges = edge_values[ptr[i]:ptr[i+1]]
+    edge_values: Optional[np.ndarray] = None
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([(name, col.dtype) for name, col in self.columns.items()])
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        return self.take(key)
+
+    def take(self, mask) -> 'ColumnTable':
+        """boolean mask 또는 연속 slice 로 행 선택 (route 는 edges CSR 도 같이 잘라 냄)."""
+        cols = {name: col[mask] for name, col in self.columns.items()}
+        if self.edge_ptr is None:
+            return ColumnTable(self.etype, cols)
+        if isinstance(mask, slice):
+            start, stop, _ = mask.indices(len(self))
+            ptr = self.edge_ptr[start:max(start, stop) + 1]
+            return ColumnTable(self.etype, cols, ptr - ptr[0], self.edge_values[ptr[0]:ptr[-1]])
+        lens = np.diff(self.edge_ptr)
+        ptr = np.zeros(int(mask.sum()) + 1, dtype=np.int64)
+        np.cumsum(lens[mask], out=ptr[1:])
+        return ColumnTable(self.etype, cols, ptr, self.edge_values[np.repeat(mask, lens)])
+
+    def records(self) -> list[dict]:
+        """→ list[dict] — records_from_array(arr, etype) 와 같은 키 / 값."""
+        names = list(self.columns)
+        rows = zip(*(col.tolist() for col in self.columns.values()))
+        if self.edge_ptr is None:
+            return [dict(zip(names, row)) for row in rows]
+        flat = self.edge_values.tolist()
+        ptr = self.edge_ptr.tolist()
+        return [{'ts': ts, 'veh_id': veh_id, 'path_len': n, 'edges': flat[ptr[i]:ptr[i + 1]]}
+                for i, (ts, veh_id, n) in enumerate(rows)]
+
+
+def cache_dir(session_dir: str | Path) -> Path:
+    return Path(session_dir) / CACHE_DIRNAME
+
+
+def _entry_dir(filepath: Path) -> Path:
+    return cache_dir(filepath.parent) / filepath.stem
+
+
+def _layout(etype: int) -> str:
+    """프로토콜 layout 서명 — 레코드 dtype 이 바뀌면 캐시 무효."""
+    return str(EVENT_DTYPES[etype].descr)
+
+
+def _read_meta(filepath: Path, etype: int) -> Optional[dict]:
+    try:
+        meta = json.loads((_entry_dir(filepath) / 'meta.json').read_text())
+        st = filepath.stat()
+    except (OSError, ValueError):
+        return None
+    if (meta.get('version') != CACHE_VERSION or meta.get('etype') != etype
+            or meta.get('layout') != _layout(etype)
+            or meta.get('src_size') != st.st_size or meta.get('src_mtime_ns') != st.st_mtime_ns):
+        return None
+    return meta
+
+
+def _column_names(etype: int) -> list[str]:
+    return [c for c in COLUMNS[etype] if not (etype == _ROUTE and c == 'edges')]
+
+
+def open_table(filepath: str | Path, etype: int) -> Optional[ColumnTable]:
+    """최신 캐시가 있으면 memmap 으로 로드, 없거나 stale 이면 None."""
+    filepath = Path(filepath)
+    if _read_meta(filepath, etype) is None:
+        return None
+    out = _entry_dir(filepath)
+    try:
+        cols = {name: np.load(out / f'{name}.npy', mmap_mode='r') for name in _column_names(etype)}
+        if etype != _ROUTE:
+            return ColumnTable(etype, cols)
+        return ColumnTable(etype, cols, np.load(out / 'edge_ptr.npy', mmap_mode='r'),
+                           np.load(out / 'edge_values.npy', mmap_mode='r'))
+    except (OSError, ValueError):
+        return None
+
+
+def cached_summary(filepath: str | Path, etype: int) -> Optional[tuple]:
+    """캐시 meta 의 cmd_summary 한 줄 값 (count, ts_min, ts_max, 고유 차량 수) — 없으면 생성."""
+    filepath = Path(filepath)
+    meta = _read_meta(filepath, etype)
+    if meta is None and build_table(filepath, etype) is not None:
+        meta = _read_meta(filepath, etype)
+    return tuple(meta['summary']) if meta is not None else None
+
+
+def _batches(raw, arr):
+    """raw 위의 arr 를 DEFAULT_BATCH_RECORDS 개씩 — 지나간 page 는 release_pages 로 내림."""
+    for start in range(0, len(arr), DEFAULT_BATCH_RECORDS):
+        yield arr[start:start + DEFAULT_BATCH_RECORDS]
+        release_pages(raw, start * arr.itemsize, (start + DEFAULT_BATCH_RECORDS) * arr.itemsize)
+
+
+def _write_table(filepath: Path, etype: int, out: Path) -> None:
+    """원본을 batch 로 훑어 컬럼 .npy 를 채움 (route 는 pathLen 합을 먼저 세는 2-pass).
+
+    녹화 중인 세션은 .bin 이 계속 자라므로 stat 한 크기의 레코드 수 n 만큼만,
+    한 번 매핑한 버퍼에서 두 pass 모두 읽는다 (meta 도 같은 stat) — 늘어난 꼬리는
+    다음 실행에서 size 불일치로 재생성.
+    """
+    st = filepath.stat()
+    dtype = EVENT_DTYPES[etype]
+    names = _column_names(etype)
+    raw = map_file(filepath)
+    n = min(st.st_size, len(raw)) // EVENT_TYPES[etype][1]
+    arr = np.frombuffer(raw, dtype=dtype, count=n)
+    cols = {name: open_memmap(out / f'{name}.npy', mode='w+', dtype=dtype[name], shape=(n,))
+            for name in names}
+    stats = SummaryStats()
+    edge_total = 0
+    pos = 0
+    for batch in _batches(raw, arr):
+        k = len(batch)
+        for name in names:
+            cols[name][pos:pos + k] = batch[name]
+        if etype == _ROUTE:
+            # records_from_array 와 같이 pathLen 은 ROUTE_MAX_EDGES 로 자름
+            cols['path_len'][pos:pos + k] = route_lengths(batch)
+            edge_total += int(cols['path_len'][pos:pos + k].sum(dtype=np.int64))
+        stats.update_batch(batch)
+        pos += k
+
+    if etype == _ROUTE:
+        lens = np.asarray(cols['path_len'], dtype=np.int64)
+        ptr = open_memmap(out / 'edge_ptr.npy', mode='w+', dtype=np.int64, shape=(n + 1,))
+        ptr[0] = 0
+        np.cumsum(lens, out=ptr[1:])
+        values = open_memmap(out / 'edge_values.npy', mode='w+', dtype=dtype['edges'].base,
+                             shape=(edge_total,))
+        pos = 0
+        for batch in _batches(raw, arr):
+            k = len(batch)
+            values[ptr[pos]:ptr[pos + k]] = route_csr(batch)[2]
+            pos += k
+        ptr.flush()
+        values.flush()
+    for col in cols.values():
+        col.flush()
+
+    # meta.json 은 마지막에 — 중단되면 캐시로 인정 안 됨
+    (out / 'meta.json').write_text(json.dumps({
+        'version': CACHE_VERSION, 'etype': etype, 'layout': _layout(etype),
+        'src_size': st.st_size, 'src_mtime_ns': st.st_mtime_ns, 'rows': n,
+        'summary': [stats.count, stats.ts_min, stats.ts_max, len(stats.veh_ids)]}))
+
+
+def build_table(filepath: str | Path, etype: int) -> Optional[ColumnTable]:
+    """캐시 생성 후 로드. 세션 디렉토리에 쓸 수 없으면 None (호출자는 캐시 없이 진행)."""
+    filepath = Path(filepath)
+    out = _entry_dir(filepath)
+    try:
+        if out.exists():
+            shutil.rmtree(out)
+        out.mkdir(parents=True)
+        _write_table(filepath, etype, out)
+    except OSError:
+        shutil.rmtree(out, ignore_errors=True)
+        return None
+    return open_table(filepath, etype)
+
+
+def load_table(filepath: str | Path, etype: int) -> Optional[ColumnTable]:
+    """캐시 hit 이면 바로, miss / stale 이면 생성해서 ColumnTable 반환."""
+    table = open_table(filepath, etype)
+    return table if table is not None else build_table(filepath, etype)
+
+
+def clear_cache(session_dir: str | Path) -> int:
+    """세션 캐시 디렉토리 삭제 → 지운 파일 항목 수."""
+    root = cache_dir(session_dir)
+    if not root.is_dir():
+        return 0
+    n = sum(1 for p in root.iterdir() if p.is_dir())
+    shutil.rmtree(root)
+    return n
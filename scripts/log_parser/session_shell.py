@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+세션을 메모리에 올려 두고 analyze.py 명령을 반복 실행 — 대화형 shell / Unix socket daemon.
+
+analyze.py 한 번 실행은 interpreter 기동 + import + .bin decode + dict 변환을 하고
+전부 버린다. deadlock 조사처럼 같은 세션에 --veh / --lock-node / --deadlock /
+--checkpoint 를 수십 번 돌리면 이 고정비가 대부분이다.
+
+HotSession 은 고정 크기 .bin 을 suffix 별 structured ndarray (복사본) 로 들고 있고,
+명령마다 load_session 과 같은 {suffix: records} 를 mask + records_from_array 로 만든다.
+파일은 처음 필요한 명령에서만 읽고, 이후 명령마다 stat 으로 확인해
+  - 그대로면 재사용
+  - 커졌으면 (녹화 중인 세션) 새로 붙은 완전한 레코드만 읽어 이어 붙임
+  - 줄었거나 이미 읽은 마지막 레코드가 달라졌으면 (다시 쓴 파일) 전체 다시 읽음
+snapshot / checkpoint 등 session_dir 을 직접 읽는 명령은 그대로 실행되지만
+import / frame index / 세션 캐시 memmap 이 프로세스에 남아 있어 역시 빨라진다.
+
+  --shell        analyze> 프롬프트에 analyze.py 옵션 그대로 (session_dir 제외) 입력
+                 reload = 메모리 상주 레코드 버림, help = 옵션 목록, quit / exit / EOF = 종료
+  --serve [SOCK] Unix socket (기본 <session_dir>/.analyze.sock) 에서 한 연결 = 명령 하나,
+                 요청 순서대로 하나씩 처리 (stdout 가로채기 때문)
+  --remote [SOCK] 현재 명령줄을 daemon 에 보내고 출력 / 종료 코드를 그대로 돌려받음
+                 (daemon 이 없으면 로컬에서 실행)
+
+프로토콜: 요청 = JSON {"cwd": 클라이언트 작업 디렉토리, "argv": [...]} + '\\n',
+          응답 = JSON {"code": int, "stdout": str, "stderr": str} 후 연결 종료
+          (클라이언트가 각각 자기 stdout / stderr 로 — 2> 리다이렉트 / pipe 가 로컬 실행과 같음).
+          daemon 은 요청마다 cwd 로 이동해 실행 — 상대 경로 인자가 클라이언트 기준으로 풀림.
+
+I/O:
+  Input:  session_dir, analyze.build_parser() 의 parser, analyze.run
+  Output:
+    - HotSession(session_dir).load(...) → load_session 과 같은 {suffix: [records]}
+    - repl(session_dir, parser, run) / serve(session_dir, parser, run, sock) / send_command(...) → 종료 코드
+"""
+
+import contextlib
+import io
+import json
+import os
+import shlex
+import signal
+import socket
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from log_parser import (COLUMNS, EVENT_DTYPES, EVENT_TYPES, FILE_SUFFIX_TO_TYPES,
+                        records_from_array)
+
+SOCKET_NAME = '.analyze.sock'
+PROMPT = 'analyze> '
+
+# load_session 과 같이 snapshot 은 통째로 올리지 않음
+_SKIP_SUFFIXES = {'snapshot'}
+
+
+@dataclass
+class _HotFile:
+    arr: np.ndarray   # 지금까지 읽은 완전한 레코드 전체 (파일과 분리된 복사본)
+    size: int         # 마지막으로 본 파일 크기
+    mtime_ns: int
+
+
+class HotSession:
+    """세션 .bin 을 메모리에 유지 — load_session 대체."""
+
+    def __init__(self, session_dir: str | Path):
+        self.session_dir = Path(session_dir).resolve()
+        self._files: dict[Path, _HotFile] = {}
+
+    def reset(self):
+        self._files.clear()
+
+    def _read(self, f: Path, etype: int) -> np.ndarray:
+        """f 의 최신 레코드 — 변경 없으면 그대로, 뒤에 붙었으면 꼬리만 읽어 이어 붙임."""
+        st = f.stat()
+        hot = self._files.get(f)
+        if hot is not None and hot.size == st.st_size and hot.mtime_ns == st.st_mtime_ns:
+            return hot.arr
+        dtype = EVENT_DTYPES[etype]
+        record_size = EVENT_TYPES[etype][1]
+        n_total = st.st_size // record_size
+        with open(f, 'rb') as fh:
+            start = 0
+            if hot is not None and n_total >= len(hot.arr):
+                # 이미 읽은 마지막 레코드가 그대로면 append 로 봄
+                done = len(hot.arr)
+                if done:
+                    fh.seek((done - 1) * record_size)
+                    if fh.read(record_size) == hot.arr[-1].tobytes():
+                        start = done
+                else:
+                    start = done
+            fh.seek(start * record_size)
+            tail = np.frombuffer(fh.read((n_total - start) * record_size), dtype=dtype)
+        arr = np.concatenate([hot.arr, tail]) if start else tail.copy()
+        self._files[f] = _HotFile(arr, st.st_size, st.st_mtime_ns)
+        return arr
+
+    def load(self, session_dir: Path, needed: Optional[set] = None,
+             veh_filter: Optional[int] = None, ts_from: int = 0, ts_to: Optional[int] = None,
+             where=None, **_ignored) -> dict[str, list[dict]]:
+        """analyze.load_session 과 같은 인자 / 반환 (jobs / cache 는 의미 없어 무시)."""
+        result = {}
+        # 파일 key 는 절대 경로 — daemon 이 요청마다 cwd 를 옮겨도 같은 항목
+        for f in sorted(self.session_dir.glob('*.bin')):
+            suffix = next((s for s in FILE_SUFFIX_TO_TYPES if f.stem.endswith(f'_{s}')), None)
+            if suffix is None or suffix in _SKIP_SUFFIXES:
+                continue
+            if needed is not None and suffix not in needed:
+                continue
+            etype = FILE_SUFFIX_TO_TYPES[suffix][0]
+            pred = where if where is not None and where.applies_to(COLUMNS[etype]) else None
+            arr = self._read(f, etype)
+            keep = np.ones(len(arr), dtype=bool)
+            if veh_filter is not None:
+                keep &= arr['veh_id'] == veh_filter
+            if ts_to is not None and 'ts' in arr.dtype.names:
+                keep &= (arr['ts'] >= ts_from) & (arr['ts'] <= ts_to)
+            # route 의 edges 는 (pathLen 이후 쓰레기인) subarray — 술어는 dict 단계에서
+            by_row = pred is not None and 'edges' in pred.columns
+            if pred is not None and not by_row:
+                keep &= pred.mask(arr)
+            records = records_from_array(arr[keep], etype)
+            if by_row:
+                records = [r for r in records if pred.matches(r)]
+            if records:
+                result[suffix] = records
+                note = '' if where is None or pred is not None else '  (--where 미적용: 컬럼 없음)'
+                print(f"  loaded {f.name}: {len(records):,} records{note}")
+        return result
+
+
+def _run_argv(session: HotSession, argv: list[str], parser, run) -> int:
+    """argv (session_dir 포함) 로 명령 하나 실행 → 종료 코드. 출력은 현재 stdout / stderr."""
+    try:
+        args = parser.parse_args(argv)
+        if Path(args.session_dir).resolve() != session.session_dir.resolve():
+            print(f"[ERROR] 이 daemon 의 세션은 {session.session_dir} (요청: {args.session_dir})",
+                  file=sys.stderr)
+            return 1
+        # 중첩 shell / daemon 금지
+        args.shell, args.serve, args.remote = False, None, None
+        run(args, session)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:  # 명령 하나의 실패로 shell / daemon 이 죽지 않게
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def repl(session_dir: str | Path, parser, run):
+    """analyze> 프롬프트 — 한 줄 = analyze.py 옵션 (session_dir 제외)."""
+    try:
+        import readline  # noqa: F401  (있으면 history / 줄 편집)
+    except ImportError:
+        pass
+    session = HotSession(session_dir)
+    print(f"세션 {session.session_dir} — analyze.py 옵션 입력 (help / reload / quit)")
+    while True:
+        try:
+            line = input(PROMPT).strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+        if not line:
+            continue
+        if line in ('quit', 'exit'):
+            return
+        if line == 'help':
+            parser.print_help()
+            continue
+        if line == 'reload':
+            session.reset()
+            continue
+        try:
+            argv = [str(session.session_dir)] + shlex.split(line)
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            continue
+        t0 = time.perf_counter()
+        try:
+            _run_argv(session, argv, parser, run)
+        except KeyboardInterrupt:
+            print("\n(중단)", file=sys.stderr)
+        print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)", file=sys.stderr)
+
+
+def socket_path(session_dir: str | Path, sock: Optional[str] = None) -> Path:
+    return (Path(sock) if sock else Path(session_dir) / SOCKET_NAME).resolve()
+
+
+def _recv_all(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(1 << 16)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(session_dir: str | Path, parser, run, sock: Optional[str] = None):
+    """Unix socket daemon — Ctrl-C / kill 로 종료. 연결마다 명령 하나를 순서대로 처리."""
+    path = socket_path(session_dir, sock)
+    if path.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(path))
+            print(f"[ERROR] 이미 daemon 실행 중: {path}", file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            path.unlink()  # 죽은 daemon 이 남긴 socket
+        finally:
+            probe.close()
+
+    # kill (SIGTERM) 도 Ctrl-C 와 같이 socket 정리 후 종료
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    session = HotSession(session_dir)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    print(f"daemon: {path} (세션 {session.session_dir}) — Ctrl-C / kill 로 종료", file=sys.stderr)
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    req = json.loads(conn.makefile('rb').readline())
+                    argv = [str(a) for a in req['argv']]
+                    os.chdir(req['cwd'])
+                except (OSError, ValueError, TypeError, KeyError):
+                    continue
+                out, err = io.StringIO(), io.StringIO()
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    code = _run_argv(session, argv, parser, run)
+                print(f"  {' '.join(argv[1:]) or '(요약)'}  → {code}  "
+                      f"{(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+                try:
+                    conn.sendall(json.dumps({'code': code, 'stdout': out.getvalue(),
+                                             'stderr': err.getvalue()}).encode())
+                except OSError:
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+
+
+def send_command(session_dir: str | Path, argv: list[str], sock: Optional[str], parser, run) -> int:
+    """argv 를 daemon 에 보내 실행 → 종료 코드. daemon 이 없으면 로컬 실행."""
+    path = socket_path(session_dir, sock)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(str(path))
+    except OSError:
+        conn.close()
+        print(f"[WARN] daemon 없음 ({path}) — 로컬 실행", file=sys.stderr)
+        run(parser.parse_args(argv))
+        return 0
+    with conn:
+        conn.sendall(json.dumps({'cwd': os.getcwd(), 'argv': argv}).encode() + b'\n')
+        data = _recv_all(conn)
+    if not data:
+        print(f"[ERROR] daemon 응답 없음 ({path})", file=sys.stderr)
+        return 1
+    reply = json.loads(data)
+    sys.stdout.write(reply['stdout'])
+    sys.stdout.flush()
+    sys.stderr.write(reply['stderr'])
+    return reply['code']
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+snapshot.bin → 다해상도 (level-of-detail) 요약 pyramid.
+
+2시간 세션을 "1초에 한 점" / "1분에 한 점" 으로 보려고 해도 capture_dense_range 가
+모든 frame 을 decode 한 뒤 Python loop 로 다운샘플했다. pyramid 는 snapshot 을
+한 번 훑으면서 여러 bucket 크기 (LOD_LEVELS_MS) 를 동시에 집계해 둔다.
+
+level 마다 두 표 (structured ndarray, bucket 순):
+  vehicles  bucket 안에 등장한 (bucket, 차량) 당 한 행
+    bucket_ts   bucket 시작 ts (ts // level * level)
+    sample_ts   bucket 에서 차량이 처음 보인 frame ts — 그 frame 의 edge/ratio/vel/stop 을 sample 로
+    frames      차량이 등장한 frame 수
+    mean_vel    평균 속도
+    stopped     stop != 0 인 frame 비율
+    dominant_edge  가장 많은 frame 을 보낸 edge (동률이면 작은 edgeId)
+  fleet     bucket 당 한 행 — frame 수, 첫 frame ts, 평균 차량 수, 전 차량 평균 속도 / 정지 비율
+
+frame 이 보통 수십 ms 간격이라 1분 level 은 원본의 수천 분의 1 크기.
+ts 가 역행하면 (녹화 이음매) 그 frame 부터 새 bucket 으로 집계한다.
+
+저장 위치: snapshot 옆 <stem>.lod/ (replay_store.py 와 같은 방식 — meta.json 에 원본
+size / mtime_ns, 명시적으로 생성: analyze.py --build-lod).
+
+I/O:
+  Input:  *_snapshot.bin (또는 .dsnap), levels (bucket ms 목록)
+  Output:
+    - build_pyramid(filepath, levels) → SnapshotPyramid (<stem>.lod/ 기록)
+    - open_pyramid(filepath) → SnapshotPyramid | None (없거나 stale)
+    - SnapshotPyramid.pick_level(resolution_ms) / vehicle_samples(veh, level, ...) / fleet(level, ...)
+"""
+
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from snapshot_streaming import iter_frame_arrays
+
+PYRAMID_VERSION = 1
+LOD_LEVELS_MS = (1_000, 10_000, 60_000, 600_000)
+
+LOD_VEHICLE_DTYPE = np.dtype([('bucket_ts', '<u4'), ('veh_id', '<u2'), ('sample_ts', '<u4'),
+                              ('edge', '<u2'), ('ratio', '<f4'), ('vel', '<f4'), ('stop', '<u2'),
+                              ('frames', '<u4'), ('mean_vel', '<f4'), ('stopped', '<f4'),
+                              ('dominant_edge', '<u2')])
+LOD_FLEET_DTYPE = np.dtype([('bucket_ts', '<u4'), ('first_ts', '<u4'), ('frames', '<u4'),
+                            ('mean_vehicles', '<f4'), ('mean_vel', '<f4'), ('stopped', '<f4')])
+
+
+class _LevelAccumulator:
+    """한 level 의 현재 bucket 누적 — 차량 상태는 vehId 인덱스 배열 (65536 칸)."""
+
+    def __init__(self, level_ms: int):
+        self.level_ms = level_ms
+        self.bucket = None
+        self.vehicle_rows: list[np.ndarray] = []
+        self.fleet_rows: list[tuple] = []
+        n = 1 << 16
+        self._frames = np.zeros(n, dtype=np.int64)
+        self._vel_sum = np.zeros(n)
+        self._stopped = np.zeros(n, dtype=np.int64)
+        self._sample = np.zeros(n, dtype=LOD_VEHICLE_DTYPE)
+        # dominant edge: 차량별 현재 edge 연속 구간 (edge, 길이) + 끝난 구간 목록
+        self._run_edge = np.zeros(n, dtype=np.int64)
+        self._run_len = np.zeros(n, dtype=np.int64)
+        self._runs: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._touched: list[np.ndarray] = []
+        self._fleet = [0, 0, 0, 0.0, 0]  # frames, first_ts, 차량-frame 수, vel 합, 정지 차량-frame 수
+
+    def feed(self, ts: int, arr):
+        bucket = ts // self.level_ms * self.level_ms
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+            self._fleet = [0, ts, 0, 0.0, 0]
+        ids = arr['veh_id'].astype(np.int64)
+        edge = arr['edge'].astype(np.int64)
+        vel = arr['vel'].astype(np.float64)
+        stopped = arr['stop'] != 0
+
+        new = self._frames[ids] == 0
+        if new.any():
+            nid = ids[new]
+            s = self._sample
+            s['sample_ts'][nid] = ts
+            for name in ('edge', 'ratio', 'vel', 'stop'):
+                s[name][nid] = arr[name][new]
+            self._run_edge[nid] = edge[new]
+            self._touched.append(nid)
+        self._frames[ids] += 1
+        self._vel_sum[ids] += vel
+        self._stopped[ids] += stopped
+
+        changed = ~new & (self._run_edge[ids] != edge)
+        if changed.any():
+            cid = ids[changed]
+            self._runs.append((cid, self._run_edge[cid], self._run_len[cid]))
+            self._run_edge[cid] = edge[changed]
+            self._run_len[cid] = 0
+        self._run_len[ids] += 1
+
+        f = self._fleet
+        f[0] += 1
+        f[2] += len(ids)
+        f[3] += float(vel.sum())
+        f[4] += int(stopped.sum())
+
+    def flush(self):
+        if self.bucket is None or not self._fleet[0]:
+            return
+        frames, first_ts, veh_frames, vel_sum, stopped = self._fleet
+        self.fleet_rows.append((self.bucket, first_ts, frames, veh_frames / frames,
+                                vel_sum / veh_frames if veh_frames else 0.0,
+                                stopped / veh_frames if veh_frames else 0.0))
+        if self._touched:
+            ids = np.unique(np.concatenate(self._touched))
+            rows = self._sample[ids].copy()
+            rows['bucket_ts'] = self.bucket
+            rows['veh_id'] = ids
+            n = self._frames[ids]
+            rows['frames'] = n
+            rows['mean_vel'] = self._vel_sum[ids] / n
+            rows['stopped'] = self._stopped[ids] / n
+            rows['dominant_edge'] = self._dominant_edge(ids)
+            self.vehicle_rows.append(rows)
+
+            self._frames[ids] = 0
+            self._vel_sum[ids] = 0
+            self._stopped[ids] = 0
+            self._run_len[ids] = 0
+        self._runs = []
+        self._touched = []
+
+    def _dominant_edge(self, ids: np.ndarray) -> np.ndarray:
+        """(차량, edge) 별 frame 수 합 → 차량별 최다 edge."""
+        veh = np.concatenate([r[0] for r in self._runs] + [ids])
+        edge = np.concatenate([r[1] for r in self._runs] + [self._run_edge[ids]])
+        cnt = np.concatenate([r[2] for r in self._runs] + [self._run_len[ids]])
+        keys, inv = np.unique(veh * (1 << 16) + edge, return_inverse=True)
+        total = np.bincount(inv, weights=cnt)
+        kv, ke = keys >> 16, keys & 0xFFFF
+        # 차량 오름차순, 그 안에서 frame 수 내림차순 → edgeId 오름차순 → 차량별 첫 행
+        order = np.lexsort((ke, -total, kv))
+        kv, ke = kv[order], ke[order]
+        first = np.concatenate(([True], kv[1:] != kv[:-1]))
+        dom = np.zeros(1 << 16, dtype=np.uint16)
+        dom[kv[first]] = ke[first]
+        return dom[ids]
+
+    def tables(self) -> tuple[np.ndarray, np.ndarray]:
+        self.flush()
+        self.bucket = None
+        veh = (np.concatenate(self.vehicle_rows) if self.vehicle_rows
+               else np.empty(0, dtype=LOD_VEHICLE_DTYPE))
+        fleet = np.array(self.fleet_rows, dtype=LOD_FLEET_DTYPE)
+        return veh, fleet
+
+
+@dataclass
+class SnapshotPyramid:
+    levels: dict  # level_ms → (vehicles 표, fleet 표)
+
+    def pick_level(self, resolution_ms: int) -> int:
+        """resolution_ms 이하 중 가장 거친 level (없으면 가장 고운 level)."""
+        fits = [lv for lv in self.levels if lv <= resolution_ms]
+        return max(fits) if fits else min(self.levels)
+
+    def fleet(self, level_ms: int, ts_from: int = 0, ts_to: int = 0xFFFFFFFF) -> np.ndarray:
+        tab = self.levels[level_ms][1]
+        return tab[_in_range(tab, level_ms, ts_from, ts_to)]
+
+    def vehicle_samples(self, veh_ids: Iterable[int] | int, level_ms: int,
+                        ts_from: int = 0, ts_to: int = 0xFFFFFFFF) -> np.ndarray:
+        """차량 (한 대 또는 여러 대) 의 level 행 — (bucket, veh_id) 순."""
+        tab = self.levels[level_ms][0]
+        vehs = np.atleast_1d(veh_ids if np.isscalar(veh_ids) else np.fromiter(veh_ids, dtype=np.int64))
+        return tab[np.isin(tab['veh_id'], vehs) & _in_range(tab, level_ms, ts_from, ts_to)]
+
+
+def _in_range(tab, level_ms: int, ts_from: int, ts_to: int) -> np.ndarray:
+    """[ts_from, ts_to] 와 겹치는 bucket 행."""
+    start = tab['bucket_ts'].astype(np.int64)
+    return (start + level_ms > ts_from) & (start <= ts_to)
+
+
+def lod_dir(filepath: str | Path) -> Path:
+    return Path(filepath).with_suffix('.lod')
+
+
+def build_pyramid(filepath: str | Path, levels: Iterable[int] = LOD_LEVELS_MS) -> SnapshotPyramid:
+    """snapshot 한 번 훑어 모든 level 집계 → <stem>.lod/ 기록."""
+    filepath = Path(filepath)
+    st = filepath.stat()
+    accs = [_LevelAccumulator(int(lv)) for lv in sorted(set(levels))]
+    for ts, arr in iter_frame_arrays(filepath):
+        for acc in accs:
+            acc.feed(ts, arr)
+
+    out = lod_dir(filepath)
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir()
+    result = {}
+    for acc in accs:
+        veh, fleet = acc.tables()
+        np.save(out / f'vehicles_{acc.level_ms}.npy', veh)
+        np.save(out / f'fleet_{acc.level_ms}.npy', fleet)
+        result[acc.level_ms] = (veh, fleet)
+    # meta.json 은 마지막에 — 중단되면 pyramid 로 인정 안 됨
+    (out / 'meta.json').write_text(json.dumps({
+        'version': PYRAMID_VERSION, 'src_size': st.st_size, 'src_mtime_ns': st.st_mtime_ns,
+        'levels': [acc.level_ms for acc in accs]}))
+    return SnapshotPyramid(result)
+
+
+def open_pyramid(filepath: str | Path) -> Optional[SnapshotPyramid]:
+    """최신 pyramid 가 있으면 로드 (memmap), 없거나 원본이 바뀌었으면 None."""
+    filepath = Path(filepath)
+    out = lod_dir(filepath)
+    try:
+        meta = json.loads((out / 'meta.json').read_text())
+        st = filepath.stat()
+    except (OSError, ValueError):
+        return None
+    if (meta.get('version') != PYRAMID_VERSION or meta.get('src_size') != st.st_size
+            or meta.get('src_mtime_ns') != st.st_mtime_ns):
+        return None
+    return SnapshotPyramid({lv: (np.load(out / f'vehicles_{lv}.npy', mmap_mode='r'),
+                                 np.load(out / f'fleet_{lv}.npy', mmap_mode='r'))
+                            for lv in meta['levels']})
@@ -26,29 +26,25 @@ import struct
 from pathlib import Path
 from typing import Iterable, Optional
 
+from log_parser import (map_file, release_pages, HAS_NUMPY, MMAP_RELEASE_BYTES,
+                        SNAPSHOT_VEHICLE_DTYPE)
+
+if HAS_NUMPY:
+    import numpy as np
+
 SNAPSHOT_MAGIC = 0xCAFE
 HEADER_SIZE = 8  # magic(2) + ts(4) + numVehicles(2)
 VEHICLE_RECORD_SIZE = 14  # vehId(2) + currentEdge(2) + ratio(f4) + velocity(f4) + stopReason(2)
 
 
-def iter_snapshot_frames(filepath: str | Path,
-                         ts_range: Optional[tuple[int, int]] = None):
-    """Snapshot frames generator. 각 frame 의 ts/num_v/raw_offsets 만 yield.
-
-    Yields:
-        dict { 'ts': int, 'num_v': int, 'raw': bytes, 'veh_off': int, 'edge_off_after_veh': int }
+def walk_frames(raw, off: int = 0):
+    """raw 를 frame 단위로 훑으며 (frame_off, ts, num_v, next_off) yield.
 
-    한 frame 의 vehicle 데이터는 raw[veh_off : veh_off + 14*num_v].
-    호출자가 직접 unpack 해서 원하는 필드만 추출하도록 함.
+    magic 이 어긋나면 다음 0xCAFE 까지 재동기화. 다음 frame 위치를 알려면
+    가변 길이 activeEdges 를 끝까지 건너뛰어야 함 — frame_index.py 가 이 결과를
+    .frameidx 로 저장해 두고 재사용.
     """
-    filepath = Path(filepath)
-    raw = filepath.read_bytes()
     total = len(raw)
-    off = 0
-
-    ts_from = ts_range[0] if ts_range else 0
-    ts_to = ts_range[1] if ts_range else 0xFFFFFFFF
-
     while off + HEADER_SIZE <= total:
         magic = struct.unpack_from('<H', raw, off)[0]
         if magic != SNAPSHOT_MAGIC:
@@ -60,8 +56,7 @@ def iter_snapshot_frames(filepath: str | Path,
 
         ts = struct.unpack_from('<I', raw, off + 2)[0]
         num_v = struct.unpack_from('<H', raw, off + 6)[0]
-        veh_start = off + HEADER_SIZE
-        veh_end = veh_start + VEHICLE_RECORD_SIZE * num_v
+        veh_end = off + HEADER_SIZE + VEHICLE_RECORD_SIZE * num_v
 
         if veh_end + 2 > total:
             break
@@ -76,18 +71,114 @@ def iter_snapshot_frames(filepath: str | Path,
             edge_id, count = struct.unpack_from('<HH', raw, cur)
             cur += 4 + 2 * count
 
+        yield off, ts, num_v, cur
+        off = cur
+
+
+def iter_snapshot_frames(filepath: str | Path,
+                         ts_range: Optional[tuple[int, int]] = None):
+    """Snapshot frames generator. 각 frame 의 ts/num_v/raw_offsets 만 yield.
+
+    Yields:
+        dict { 'ts': int, 'num_v': int, 'raw': bytes, 'veh_off': int, 'next_off': int }
+
+    한 frame 의 vehicle 데이터는 raw[veh_off : veh_off + 14*num_v].
+    호출자가 직접 unpack 해서 원하는 필드만 추출하도록 함.
+
+    numpy 가 있으면 .frameidx sidecar (frame_index.py) 로 ts_range 의 첫 frame 으로
+    바로 seek 하고, activeEdges 를 다시 훑지 않음. 없으면 처음부터 walk_frames.
+    .dsnap (compact_snapshot.py) 경로면 keyframe chunk 를 풀어 같은 형식으로 yield.
+
+    raw 는 파일 전체의 read-only mmap — 지나간 구간은 release_pages 로 RSS 에서
+    내리므로 파일 크기와 무관하게 peak 메모리 일정.
+    """
+    filepath = Path(filepath)
+    ts_from = ts_range[0] if ts_range else 0
+    ts_to = ts_range[1] if ts_range else 0xFFFFFFFF
+
+    if filepath.suffix == '.dsnap':
+        from compact_snapshot import iter_compact_frames
+        yield from iter_compact_frames(filepath, ts_range)
+        return
+
+    if HAS_NUMPY:
+        from frame_index import load_frame_index
+        idx = load_frame_index(filepath)
+        raw = map_file(filepath)
+        lo, hi = idx.frame_range(ts_from, ts_to)
+        ent = idx.entries[lo:hi]
+        released = int(ent['offset'][0]) if len(ent) else 0
+        for ts, num_v, off, size in zip(ent['ts'].tolist(), ent['num_v'].tolist(),
+                                        ent['offset'].tolist(), ent['size'].tolist()):
+            if ts_from <= ts <= ts_to:
+                yield {'ts': ts, 'num_v': num_v, 'raw': raw,
+                       'veh_off': off + HEADER_SIZE, 'next_off': off + size}
+            if off - released >= MMAP_RELEASE_BYTES:
+                release_pages(raw, released, off)
+                released = off
+        return
+
+    raw = map_file(filepath)
+    released = 0
+    for off, ts, num_v, next_off in walk_frames(raw):
         if ts_from <= ts <= ts_to:
             yield {'ts': ts, 'num_v': num_v, 'raw': raw,
-                   'veh_off': veh_start, 'next_off': cur}
+                   'veh_off': off + HEADER_SIZE, 'next_off': next_off}
 
         if ts > ts_to:
             break
 
-        off = cur
+        if next_off - released >= MMAP_RELEASE_BYTES:
+            release_pages(raw, released, next_off)
+            released = next_off
+
+
+def _replay_store(filepath):
+    """최신 replay store (replay_store.py) 가 있으면 그것, 없으면 None."""
+    if not HAS_NUMPY:
+        return None
+    from replay_store import open_replay_store
+    return open_replay_store(filepath)
+
+
+def vehicle_mask(target_vehs: Optional[Iterable[int]]):
+    """vehId 집합 → (65536,) bool lookup — frame 마다 mask[arr['veh_id']] 로 선택 (set 조회 대신)."""
+    if target_vehs is None:
+        return None
+    mask = np.zeros(1 << 16, dtype=bool)
+    ids = np.fromiter(target_vehs, dtype=np.int64)
+    mask[ids[(ids >= 0) & (ids < 1 << 16)]] = True  # u16 범위 밖 id 는 어떤 frame 에도 없음
+    return mask
 
 
-def _read_vehicles_from_frame(frame, target_vehs: Optional[set] = None) -> dict:
+def frame_vehicles(frame, target_mask=None):
+    """Frame 의 vehicle 블록 → structured ndarray (SNAPSHOT_VEHICLE_DTYPE, mmap zero-copy view).
+
+    target_mask (vehicle_mask 결과) 를 주면 해당 차량 행만 (복사본).
+    """
+    arr = np.frombuffer(frame['raw'], dtype=SNAPSHOT_VEHICLE_DTYPE,
+                        count=frame['num_v'], offset=frame['veh_off'])
+    return arr if target_mask is None else arr[target_mask[arr['veh_id']]]
+
+
+def iter_frame_arrays(filepath: str | Path,
+                      ts_range: Optional[tuple[int, int]] = None,
+                      target_vehs: Optional[Iterable[int]] = None):
+    """(ts, vehicle ndarray) generator — dict 없이 frame 단위 벡터 처리용."""
+    mask = vehicle_mask(target_vehs)
+    for frame in iter_snapshot_frames(filepath, ts_range):
+        yield frame['ts'], frame_vehicles(frame, mask)
+
+
+def _read_vehicles_from_frame(frame, target_vehs: Optional[set] = None, target_mask=None) -> dict:
     """Frame 에서 특정 차량(또는 전체)의 상태 추출."""
+    if HAS_NUMPY:
+        if target_mask is None and target_vehs is not None:
+            target_mask = vehicle_mask(target_vehs)
+        arr = frame_vehicles(frame, target_mask)
+        return {vid: {'edge': edge, 'ratio': ratio, 'vel': vel, 'stop': stop}
+                for vid, edge, ratio, vel, stop in arr.tolist()}
+
     raw = frame['raw']
     off = frame['veh_off']
     num_v = frame['num_v']
@@ -117,17 +208,32 @@ def capture_at_ts_list(filepath: str | Path,
     """
     target_ts_list = sorted(target_ts_list)
     veh_set = set(target_vehs) if target_vehs is not None else None
+    veh_mask = vehicle_mask(veh_set) if HAS_NUMPY else None
     results = {}
     target_idx = 0
 
-    for frame in iter_snapshot_frames(filepath):
+    if not target_ts_list:
+        return results
+
+    store = _replay_store(filepath)
+    if store is not None:
+        slots = store.slots(veh_set) if veh_set is not None else None
+        for t in target_ts_list:
+            i = store.frame_at(t)
+            if i is None:
+                break
+            results[t] = {'snap_ts': int(store.ts[i]), 'data': store.frame_data(i, slots)}
+        return results
+
+    # 첫 target 이전 frame 은 캡처 대상이 아님 — frame index 로 바로 seek
+    for frame in iter_snapshot_frames(filepath, (target_ts_list[0], 0xFFFFFFFF)):
         if target_idx >= len(target_ts_list):
             break
         # 현재 frame 의 ts 가 target 을 지나면 캡처
         while target_idx < len(target_ts_list) and frame['ts'] >= target_ts_list[target_idx]:
             results[target_ts_list[target_idx]] = {
                 'snap_ts': frame['ts'],
-                'data': _read_vehicles_from_frame(frame, veh_set),
+                'data': _read_vehicles_from_frame(frame, veh_set, veh_mask),
             }
             target_idx += 1
 
@@ -150,13 +256,21 @@ def capture_dense_range(filepath: str | Path,
         [{ 'ts': int, 'data': {vehId: {edge,ratio,vel,stop}} }, ...]
     """
     veh_set = set(target_vehs) if target_vehs is not None else None
+    store = _replay_store(filepath)
+    if store is not None:
+        slots = store.slots(veh_set) if veh_set is not None else None
+        frames = store.frames_in(*ts_range)[::every_n]
+        return [{'ts': ts, 'data': data}
+                for ts, data in zip(store.ts[frames].tolist(), store.frames_data(frames, slots))]
+
+    veh_mask = vehicle_mask(veh_set) if HAS_NUMPY else None
     results = []
     i = 0
     for frame in iter_snapshot_frames(filepath, ts_range):
         if i % every_n == 0:
             results.append({
                 'ts': frame['ts'],
-                'data': _read_vehicles_from_frame(frame, veh_set),
+                'data': _read_vehicles_from_frame(frame, veh_set, veh_mask),
             })
         i += 1
     return results
@@ -179,6 +293,35 @@ def detect_ratio_jumps(filepath: str | Path,
         [{ 'ts': int, 'edge': int, 'prev_ratio': float, 'cur_ratio': float,
            'delta': float, 'same_edge': bool, 'prev_vel': float, 'cur_vel': float }]
     """
+    if HAS_NUMPY:
+        # frame 마다 그 차량 행만 뽑아 모은 뒤 Δratio 를 한 번에 계산
+        store = _replay_store(filepath)
+        if store is not None:
+            track = store.vehicle_track(veh_id, *(ts_range or (0, 0xFFFFFFFF)))
+            ts = track['ts'].astype(np.int64)
+        else:
+            rows = [(ts, a[-1]) for ts, a in iter_frame_arrays(filepath, ts_range, (veh_id,)) if len(a)]
+            ts = np.array([t for t, _ in rows], dtype=np.int64)
+            track = np.array([r for _, r in rows], dtype=SNAPSHOT_VEHICLE_DTYPE)
+        if len(ts) < 2:
+            return []
+        # struct 경로와 같은 값: f32 → Python float 변환 후 float64 로 뺄셈
+        ratio = track['ratio'].astype(np.float64)
+        delta = ratio[1:] - ratio[:-1]
+        hit = np.flatnonzero(np.abs(delta) > threshold)
+        edge, vel = track['edge'], track['vel'].astype(np.float64)
+        return [{
+            'ts': int(ts[i + 1]),
+            'edge': int(edge[i + 1]),
+            'prev_ratio': float(ratio[i]),
+            'cur_ratio': float(ratio[i + 1]),
+            'delta': float(delta[i]),
+            'same_edge': bool(edge[i + 1] == edge[i]),
+            'prev_vel': float(vel[i]),
+            'cur_vel': float(vel[i + 1]),
+            'prev_ts': int(ts[i]),
+        } for i in hit.tolist()]
+
     jumps = []
     prev = None
     for frame in iter_snapshot_frames(filepath, ts_range):
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+snapshot stopReason + 속도 → 차량별 정지 구간 (run-length) 표 + 집계.
+
+"왜 안 움직이나" 의 유일한 신호인 stopReason 은 frame 별 dict 를 눈으로 훑어야
+했다. StopIntervalScanner 는 snapshot 을 한 번 훑으면서 차량마다 열린 정지 구간
+(reason, edge, 시작 ts) 을 vehId 인덱스 배열로 들고, 키가 바뀌는 frame 에서만
+구간 한 행을 내보낸다 → frame 수가 아니라 정지 횟수만큼의 행 (수 시간 세션도 MB 단위).
+
+정지 frame: |vel| <= STOP_VEL_EPS. 구간 키 = (stopReason bitmask, edge) —
+같은 정지 중 reason 이 바뀌면 (예: SENSORED → LOCKED) 구간이 나뉜다.
+reason 0 (NONE) 은 "이유 없이 선 차량".
+
+  start_ts  구간 첫 frame ts
+  end_ts    차량이 다시 움직이거나 키가 바뀐 frame ts (open 이면 마지막으로 본 ts).
+            ts 가 되감기는 녹화 이음매에서는 열린 구간을 마지막으로 본 ts 로 닫음
+  frames    구간에 속한 frame 수
+  open      scan 끝까지 안 끝난 구간
+
+I/O:
+  Input:
+    - filepath: *_snapshot.bin (또는 .dsnap)
+    - ts_range (optional), target_vehs (optional)
+  Output:
+    - extract_stop_intervals(filepath, ts_range, target_vehs) → STOP_INTERVAL_DTYPE ndarray
+      (start_ts, veh_id) 정렬
+    - aggregate_stops(intervals, by='reason'|'edge'|'veh_id') → STOP_AGG_DTYPE (total_ms 내림차순)
+"""
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from snapshot_streaming import iter_frame_arrays
+
+# 이 속도 이하면 정지 frame (m/s) — f32 감속 꼬리는 정지로 봄
+STOP_VEL_EPS = 1e-3
+
+STOP_INTERVAL_DTYPE = np.dtype([('veh_id', '<u2'), ('start_ts', '<u4'), ('end_ts', '<u4'),
+                                ('reason', '<u2'), ('edge', '<u2'), ('frames', '<u4'),
+                                ('open', '?')])
+STOP_AGG_DTYPE = np.dtype([('key', '<u2'), ('intervals', '<u4'), ('total_ms', '<u8'),
+                           ('max_ms', '<u4'), ('vehicles', '<u4')])
+
+
+class StopIntervalScanner:
+    """frame 을 순서대로 feed → 닫힌 정지 구간 누적. 열린 구간은 vehId 인덱스 배열."""
+
+    def __init__(self):
+        n = 1 << 16
+        self._active = np.zeros(n, dtype=bool)
+        self._reason = np.zeros(n, dtype=np.uint16)
+        self._edge = np.zeros(n, dtype=np.uint16)
+        self._start = np.zeros(n, dtype=np.int64)
+        self._last = np.zeros(n, dtype=np.int64)
+        self._frames = np.zeros(n, dtype=np.int64)
+        self._rows: list[np.ndarray] = []
+        self._prev_ts: Optional[int] = None
+
+    def _rows_for(self, ids: np.ndarray, end_ts, is_open: bool) -> np.ndarray:
+        rows = np.empty(len(ids), dtype=STOP_INTERVAL_DTYPE)
+        rows['veh_id'] = ids
+        rows['start_ts'] = self._start[ids]
+        rows['end_ts'] = end_ts
+        rows['reason'] = self._reason[ids]
+        rows['edge'] = self._edge[ids]
+        rows['frames'] = self._frames[ids]
+        rows['open'] = is_open
+        return rows
+
+    def feed(self, ts: int, arr):
+        """frame 하나 (SNAPSHOT_VEHICLE_DTYPE 배열)."""
+        if self._prev_ts is not None and ts < self._prev_ts:
+            # 녹화 이음매 (ts 되감김) — end_ts < start_ts 가 안 나오게 열린 구간을 여기서 닫음
+            seam = np.flatnonzero(self._active)
+            if len(seam):
+                self._rows.append(self._rows_for(seam, self._last[seam], False))
+                self._active[seam] = False
+        self._prev_ts = ts
+        if not len(arr):
+            return
+        ids = arr['veh_id'].astype(np.int64)
+        with np.errstate(invalid='ignore'):
+            stopped = np.abs(arr['vel']) <= STOP_VEL_EPS
+        reason = arr['stop']
+        edge = arr['edge']
+        active = self._active[ids]
+        same = active & stopped & (self._reason[ids] == reason) & (self._edge[ids] == edge)
+
+        ended = active & ~same
+        if ended.any():
+            self._rows.append(self._rows_for(ids[ended], ts, False))
+            self._active[ids[ended]] = False
+        started = stopped & ~same
+        if started.any():
+            sid = ids[started]
+            self._active[sid] = True
+            self._reason[sid] = reason[started]
+            self._edge[sid] = edge[started]
+            self._start[sid] = ts
+            self._frames[sid] = 0
+        run = same | started
+        self._frames[ids[run]] += 1
+        self._last[ids] = ts
+
+    def result(self) -> np.ndarray:
+        """닫힌 구간 + 아직 열린 구간 (open=True, end_ts=마지막으로 본 ts) — (start_ts, veh_id) 순."""
+        open_ids = np.flatnonzero(self._active)
+        parts = self._rows + [self._rows_for(open_ids, self._last[open_ids], True)]
+        if not sum(len(p) for p in parts):
+            return np.empty(0, dtype=STOP_INTERVAL_DTYPE)
+        out = np.concatenate(parts)
+        return out[np.lexsort((out['veh_id'], out['start_ts']))]
+
+
+def extract_stop_intervals(filepath: str | Path,
+                           ts_range: Optional[tuple[int, int]] = None,
+                           target_vehs: Optional[Iterable[int]] = None) -> np.ndarray:
+    """snapshot 한 번 훑어 정지 구간 표 반환."""
+    scanner = StopIntervalScanner()
+    for ts, arr in iter_frame_arrays(filepath, ts_range, target_vehs):
+        scanner.feed(ts, arr)
+    return scanner.result()
+
+
+def aggregate_stops(intervals: np.ndarray, by: str = 'reason') -> np.ndarray:
+    """정지 구간 → by ('reason' / 'edge' / 'veh_id') 별 구간 수 / 총·최대 정지 ms / 차량 수."""
+    if by not in ('reason', 'edge', 'veh_id'):
+        raise ValueError(f"aggregate_stops: by 는 reason / edge / veh_id 중 하나 ({by!r})")
+    if not len(intervals):
+        return np.empty(0, dtype=STOP_AGG_DTYPE)
+    dur = np.maximum(intervals['end_ts'].astype(np.int64) - intervals['start_ts'].astype(np.int64), 0)
+    keys, inv = np.unique(intervals[by], return_inverse=True)
+    out = np.zeros(len(keys), dtype=STOP_AGG_DTYPE)
+    out['key'] = keys
+    out['intervals'] = np.bincount(inv, minlength=len(keys))
+    out['total_ms'] = np.bincount(inv, weights=dur, minlength=len(keys))
+    max_ms = np.zeros(len(keys), dtype=np.int64)
+    np.maximum.at(max_ms, inv, dur)
+    out['max_ms'] = max_ms
+    pairs = np.unique(inv.astype(np.int64) * (1 << 16) + intervals['veh_id'])
+    out['vehicles'] = np.bincount(pairs >> 16, minlength=len(keys))
+    return out[np.argsort(-out['total_ms'].astype(np.int64), kind='stable')]
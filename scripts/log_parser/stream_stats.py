@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+한 번 훑기(single pass) + 병합 가능한 요약 통계.
+
+print_summary 는 레코드 list 전체를 메모리에 올린 뒤 ts list / veh set /
+durations list / lengths list 를 만들며 여러 번 훑었다. SummaryStats 는
+batch (iter_batches 의 structured array) 또는 dict 레코드를 한 번씩만 보고
+누적하며, 부분 결과끼리 merge 할 수 있어 병렬 chunk / 여러 파일 결과를 합칠 수 있다.
+
+  - count / ts min·max / unique 차량 (set union — veh_id 는 u16 라 작음)
+  - edge transit (exit_ts - enter_ts): count / 합 / min / max + 분위수 sketch
+  - 분위수 sketch 는 log-bucket 방식 (DDSketch) — 상대오차 ≤ SKETCH_RELATIVE_ACCURACY,
+    bucket count 를 더하기만 하면 병합 (순서/분할과 무관하게 같은 결과)
+
+I/O:
+  Input:  structured ndarray batch (update_batch) 또는 dict 레코드 iterable (update_records)
+  Output: SummaryStats
+            .merge(other)            # 병합 (self 반환)
+            .transit_percentiles()   # {0.5: ms, 0.95: ms, 0.99: ms}
+"""
+
+import math
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# transit p50/p95/p99 의 상대오차 한계 (1% → 10초 transit 이면 ±100ms)
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """log-bucket 분위수 sketch — 값 x>0 은 bucket ceil(log_γ x), x<=0 은 zero bucket."""
+
+    def __init__(self, alpha: float = SKETCH_RELATIVE_ACCURACY):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        k = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+
+    def add_array(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        pos = values[values > 0]
+        self.count += len(values)
+        self.zero_count += len(values) - len(pos)
+        if len(pos):
+            keys, counts = np.unique(np.ceil(np.log(pos) / self._log_gamma).astype(np.int64),
+                                     return_counts=True)
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                self.buckets[k] = self.buckets.get(k, 0) + c
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        if other.alpha != self.alpha:
+            raise ValueError(f"sketch 정확도 불일치: {self.alpha} vs {other.alpha}")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        return self
+
+    def quantile(self, q: float):
+        """q 분위수 근사값 (0 ≤ q ≤ 1). 비어 있으면 None."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cum = self.zero_count
+        for k in sorted(self.buckets):
+            cum += self.buckets[k]
+            if cum > rank:
+                return 2 * self.gamma ** k / (self.gamma + 1)  # bucket 대표값 (상대오차 ≤ alpha)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+def _min(a, b):
+    return b if a is None else (a if b is None else min(a, b))
+
+
+def _max(a, b):
+    return b if a is None else (a if b is None else max(a, b))
+
+
+@dataclass
+class SummaryStats:
+    count: int = 0
+    ts_min: int | None = None
+    ts_max: int | None = None
+    veh_ids: set = field(default_factory=set)
+    # edge transit (enter_ts/exit_ts 컬럼이 있는 파일만)
+    has_transit: bool = False
+    transit_count: int = 0
+    transit_sum: int = 0
+    transit_min: int | None = None
+    transit_max: int | None = None
+    transit: QuantileSketch = field(default_factory=QuantileSketch)
+    edge_len_sum: float = 0.0
+
+    def update_batch(self, arr) -> 'SummaryStats':
+        """structured ndarray batch 누적 (벡터 연산)."""
+        names = arr.dtype.names or ()
+        self.count += len(arr)
+        if 'enter_ts' in names:
+            self.has_transit = True
+        if len(arr) == 0:
+            return self
+        if 'ts' in names:
+            self.ts_min = _min(self.ts_min, int(arr['ts'].min()))
+            self.ts_max = _max(self.ts_max, int(arr['ts'].max()))
+        if 'veh_id' in names:
+            self.veh_ids.update(np.unique(arr['veh_id']).tolist())
+        if self.has_transit:
+            enter = arr['enter_ts'].astype(np.int64)
+            exit_ = arr['exit_ts'].astype(np.int64)
+            dur = (exit_ - enter)[exit_ >= enter]  # 아직 안 나간 transit 제외
+            if len(dur):
+                self.transit_count += len(dur)
+                self.transit_sum += int(dur.sum())
+                self.transit_min = _min(self.transit_min, int(dur.min()))
+                self.transit_max = _max(self.transit_max, int(dur.max()))
+                self.transit.add_array(dur)
+            self.edge_len_sum += float(arr['edge_len'].sum(dtype=np.float64))
+        return self
+
+    def update_records(self, records) -> 'SummaryStats':
+        """dict 레코드 누적 (numpy 없는 fallback 경로)."""
+        for r in records:
+            self.count += 1
+            if 'ts' in r:
+                self.ts_min = _min(self.ts_min, r['ts'])
+                self.ts_max = _max(self.ts_max, r['ts'])
+            if 'veh_id' in r:
+                self.veh_ids.add(r['veh_id'])
+            if 'enter_ts' in r:
+                self.has_transit = True
+                if r.get('exit_ts', 0) >= r['enter_ts']:
+                    d = r['exit_ts'] - r['enter_ts']
+                    self.transit_count += 1
+                    self.transit_sum += d
+                    self.transit_min = _min(self.transit_min, d)
+                    self.transit_max = _max(self.transit_max, d)
+                    self.transit.add(d)
+                self.edge_len_sum += r.get('edge_len', 0)
+        return self
+
+    def merge(self, other: 'SummaryStats') -> 'SummaryStats':
+        """다른 부분 결과를 합침 (병렬 chunk / 여러 파일)."""
+        self.count += other.count
+        self.ts_min = _min(self.ts_min, other.ts_min)
+        self.ts_max = _max(self.ts_max, other.ts_max)
+        self.veh_ids |= other.veh_ids
+        self.has_transit |= other.has_transit
+        self.transit_count += other.transit_count
+        self.transit_sum += other.transit_sum
+        self.transit_min = _min(self.transit_min, other.transit_min)
+        self.transit_max = _max(self.transit_max, other.transit_max)
+        self.transit.merge(other.transit)
+        self.edge_len_sum += other.edge_len_sum
+        return self
+
+    def transit_percentiles(self, qs=(0.5, 0.95, 0.99)) -> dict:
+        return {q: self.transit.quantile(q) for q in qs}
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+고정 크기 .bin 의 sparse timestamp index (.tsidx sidecar).
+
+--from/--to 질의마다 파일 전체를 decode 후 Python 으로 거르던 것을,
+블록(기본 4096 레코드) 단위 ts min/max 만 담은 작은 sidecar 로 대체.
+SimLogger 는 ts 가 "대체로" 오름차순이라 (버퍼 flush 순서로 약간 섞임)
+블록 max 의 누적 최대 / 블록 min 의 역누적 최소를 binary search 해서
+후보 레코드 구간 [start, end) 을 구하고, 그 구간만 decode 해서 정확히 필터한다.
+정렬이 깨져 있어도 결과는 항상 정확 (후보 구간이 넓어질 뿐).
+
+sidecar 는 원본 size / mtime_ns 를 기록 — 파일이 자라거나 바뀌면 자동 재생성.
+로그 폴더에 쓰기 권한이 없으면 메모리에만 두고 넘어간다.
+
+I/O:
+  Input:
+    - filepath: ts 컬럼이 있는 고정 크기 .bin (order/snapshot 제외)
+    - ts_from, ts_to: 닫힌 구간 [ts_from, ts_to] (ms)
+  Output:
+    - <stem>.tsidx sidecar (원본과 같은 폴더)
+    - load_ts_index(filepath) → TsIndex (record_range(ts_from, ts_to) → (start, end))
+    - read_ts_range(filepath, ts_from, ts_to) → structured ndarray (구간 내 레코드만)
+"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from log_parser import (COLUMNS, EVENT_DTYPES, EVENT_TYPES, detect_file_type,
+                        map_file)
+
+TSIDX_MAGIC = b'TSIX'
+TSIDX_VERSION = 1
+TSIDX_BLOCK_RECORDS = 4096
+# magic(4) version(u32) src_size(u64) src_mtime_ns(u64) record_size(u32) block_records(u32) n_blocks(u32)
+_HEADER = struct.Struct('<4sIQQIII')
+
+
+@dataclass
+class TsIndex:
+    record_size: int
+    block_records: int
+    num_records: int
+    block_min: np.ndarray  # (n_blocks,) uint32
+    block_max: np.ndarray  # (n_blocks,) uint32
+
+    def __post_init__(self):
+        # 누적 max 는 비감소, 역누적 min 도 비감소 → 둘 다 searchsorted 가능
+        self._prefix_max = np.maximum.accumulate(self.block_max) if len(self.block_max) else self.block_max
+        self._suffix_min = (np.minimum.accumulate(self.block_min[::-1])[::-1]
+                            if len(self.block_min) else self.block_min)
+
+    def record_range(self, ts_from: int | None, ts_to: int | None) -> tuple[int, int]:
+        """[ts_from, ts_to] 레코드를 모두 포함하는 후보 레코드 구간 [start, end)."""
+        n_blocks = len(self.block_min)
+        lo = 0 if ts_from is None else int(np.searchsorted(self._prefix_max, ts_from, side='left'))
+        hi = n_blocks if ts_to is None else int(np.searchsorted(self._suffix_min, ts_to, side='right'))
+        if lo >= hi:
+            return 0, 0
+        return lo * self.block_records, min(hi * self.block_records, self.num_records)
+
+
+def tsidx_path(filepath: str | Path) -> Path:
+    return Path(filepath).with_suffix('.tsidx')
+
+
+def has_ts_column(event_types) -> bool:
+    """ts index 를 쓸 수 있는 타입인지 (단일 고정 크기 + ts 컬럼)."""
+    return (bool(event_types) and len(event_types) == 1
+            and 'ts' in COLUMNS.get(event_types[0], []))
+
+
+def _etype_with_ts(filepath: Path, event_types=None) -> int:
+    types = event_types or detect_file_type(str(filepath))
+    if not types or types == ['snapshot'] or 'ts' not in COLUMNS.get(types[0], []):
+        raise ValueError(f"ts index 는 ts 컬럼이 있는 고정 크기 파일 전용: {filepath.name}")
+    return types[0]
+
+
+def build_ts_index(filepath: str | Path, block_records: int = TSIDX_BLOCK_RECORDS,
+                   write: bool = True, event_types=None) -> TsIndex:
+    """원본을 한 번 훑어 블록별 ts min/max 계산 → sidecar 기록 (write=False 면 메모리만)."""
+    filepath = Path(filepath)
+    etype = _etype_with_ts(filepath, event_types)
+    st = filepath.stat()
+    record_size = EVENT_TYPES[etype][1]
+    raw = map_file(filepath)
+    num_records = len(raw) // record_size
+    ts = np.frombuffer(raw, dtype=EVENT_DTYPES[etype], count=num_records)['ts']
+
+    n_blocks = -(-num_records // block_records)
+    block_min = np.empty(n_blocks, dtype=np.uint32)
+    block_max = np.empty(n_blocks, dtype=np.uint32)
+    if n_blocks:
+        starts = np.arange(0, num_records, block_records)
+        block_min[:] = np.minimum.reduceat(ts, starts)
+        block_max[:] = np.maximum.reduceat(ts, starts)
+
+    idx = TsIndex(record_size, block_records, num_records, block_min, block_max)
+    if write:
+        header = _HEADER.pack(TSIDX_MAGIC, TSIDX_VERSION, st.st_size, st.st_mtime_ns,
+                              record_size, block_records, n_blocks)
+        try:
+            with open(tsidx_path(filepath), 'wb') as f:
+                f.write(header)
+                f.write(block_min.tobytes())
+                f.write(block_max.tobytes())
+        except OSError:
+            pass  # 읽기 전용 로그 폴더 — 이번 실행은 메모리 index 로 충분
+    return idx
+
+
+def _read_sidecar(filepath: Path) -> TsIndex | None:
+    """sidecar 가 원본(size/mtime)과 일치하면 TsIndex, 아니면 None."""
+    side = tsidx_path(filepath)
+    try:
+        data = side.read_bytes()
+        st = filepath.stat()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, size, mtime_ns, record_size, block_records, n_blocks = _HEADER.unpack_from(data)
+    if (magic != TSIDX_MAGIC or version != TSIDX_VERSION
+            or size != st.st_size or mtime_ns != st.st_mtime_ns
+            or len(data) != _HEADER.size + 8 * n_blocks):
+        return None
+    arrs = np.frombuffer(data, dtype='<u4', offset=_HEADER.size)
+    return TsIndex(record_size, block_records, size // record_size,
+                   arrs[:n_blocks], arrs[n_blocks:])
+
+
+def load_ts_index(filepath: str | Path, event_types=None) -> TsIndex:
+    """유효한 sidecar 가 있으면 로드, 없거나 stale 이면 재생성."""
+    filepath = Path(filepath)
+    idx = _read_sidecar(filepath)
+    return idx if idx is not None else build_ts_index(filepath, event_types=event_types)
+
+
+def read_ts_range(filepath: str | Path, ts_from: int | None = None,
+                  ts_to: int | None = None, event_types=None):
+    """[ts_from, ts_to] 레코드만 structured ndarray 로 반환 (원래 파일 순서 유지).
+
+    index 가 준 후보 구간만 decode → 구간 밖 페이지는 건드리지도 않음.
+    """
+    filepath = Path(filepath)
+    etype = _etype_with_ts(filepath, event_types)
+    idx = load_ts_index(filepath, event_types)
+    start, end = idx.record_range(ts_from, ts_to)
+    dtype = EVENT_DTYPES[etype]
+    if end <= start:
+        return np.empty(0, dtype=dtype)
+    arr = np.frombuffer(map_file(filepath), dtype=dtype, count=end - start,
+                        offset=start * idx.record_size)
+    mask = np.ones(len(arr), dtype=bool)
+    if ts_from is not None:
+        mask &= arr['ts'] >= ts_from
+    if ts_to is not None:
+        mask &= arr['ts'] <= ts_to
+    return arr[mask]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+고정 크기 .bin 의 차량별 레코드 offset index (.vehidx sidecar).
+
+`--veh 13` 한 대 보려고 1000+ 대 세션의 모든 레코드를 decode 하던 것을,
+차량별 레코드 번호 posting list 로 대체. 한 번 인덱싱해 두면 이후 질의는
+해당 차량 레코드만 fancy indexing 으로 gather (arr[idx]).
+
+posting 은 레코드 번호를 delta 인코딩 후 LEB128 varint 로 압축 — 같은 차량
+레코드는 대개 촘촘하게 이어져서 delta 가 작아 1~2 byte 에 들어간다.
+인코딩/디코딩 모두 numpy 벡터 연산 (Python 루프 없음).
+
+sidecar 는 원본 size / mtime_ns 를 기록 — 파일이 바뀌면 자동 재생성
+(ts_index.py 와 같은 규칙). 쓰기 권한 없으면 메모리에만 둔다.
+
+I/O:
+  Input:
+    - filepath: veh_id 컬럼이 있는 고정 크기 .bin (snapshot 제외)
+    - veh_id, (optional) ts_from / ts_to
+  Output:
+    - <stem>.vehidx sidecar (원본과 같은 폴더)
+    - load_veh_index(filepath) → VehIndex (record_indices(veh_id), vehicles)
+    - read_vehicle(filepath, veh_id, ts_from, ts_to) → structured ndarray (그 차량 레코드만)
+"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from log_parser import COLUMNS, EVENT_DTYPES, EVENT_TYPES, detect_file_type, map_file
+
+VEHIDX_MAGIC = b'VHIX'
+VEHIDX_VERSION = 1
+# magic(4) version(u32) src_size(u64) src_mtime_ns(u64) record_size(u32) n_vehs(u32)
+_HEADER = struct.Struct('<4sIQQII')
+_ENTRY_DTYPE = np.dtype([('veh_id', '<u4'), ('count', '<u4'),
+                         ('byte_off', '<u8'), ('byte_len', '<u8')])
+
+
+def encode_varint(values: np.ndarray) -> np.ndarray:
+    """uint32 배열 → LEB128 varint 바이트 (uint8 배열). 하위 7bit 먼저, MSB=continuation."""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 5):
+        nbytes += values >= (1 << (7 * k))
+    starts = np.cumsum(nbytes) - nbytes
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(5):
+        sel = nbytes > k
+        if not sel.any():
+            break
+        byte = (values[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        cont = (nbytes[sel] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[sel] + k] = byte | cont
+    return out
+
+
+def decode_varint(buf: np.ndarray) -> np.ndarray:
+    """LEB128 varint 바이트 → uint64 배열 (encode_varint 의 역)."""
+    buf = np.asarray(buf, dtype=np.uint8)
+    if len(buf) == 0:
+        return np.empty(0, dtype=np.uint64)
+    term = buf < 0x80
+    ends = np.flatnonzero(term)
+    starts = np.empty(len(ends), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    group = np.cumsum(term) - term  # 각 byte 가 속한 값 번호
+    shift = (7 * (np.arange(len(buf)) - starts[group])).astype(np.uint64)
+    contrib = (buf & 0x7F).astype(np.uint64) << shift
+    return np.add.reduceat(contrib, starts)
+
+
+@dataclass
+class VehIndex:
+    record_size: int
+    entries: np.ndarray   # _ENTRY_DTYPE, veh_id 오름차순
+    postings: np.ndarray  # uint8 varint blob
+
+    @property
+    def vehicles(self) -> np.ndarray:
+        return self.entries['veh_id']
+
+    def record_indices(self, veh_id: int) -> np.ndarray:
+        """veh_id 의 레코드 번호 (파일 순서, int64). 없으면 빈 배열."""
+        i = int(np.searchsorted(self.entries['veh_id'], veh_id))
+        if i >= len(self.entries) or self.entries['veh_id'][i] != veh_id:
+            return np.empty(0, dtype=np.int64)
+        e = self.entries[i]
+        blob = self.postings[int(e['byte_off']):int(e['byte_off']) + int(e['byte_len'])]
+        return np.cumsum(decode_varint(blob)).astype(np.int64)
+
+
+def vehidx_path(filepath: str | Path) -> Path:
+    return Path(filepath).with_suffix('.vehidx')
+
+
+def has_veh_column(event_types) -> bool:
+    """veh index 를 쓸 수 있는 타입인지 (단일 고정 크기 + veh_id 컬럼)."""
+    return (bool(event_types) and len(event_types) == 1
+            and 'veh_id' in COLUMNS.get(event_types[0], []))
+
+
+def _etype_with_veh(filepath: Path, event_types=None) -> int:
+    types = event_types or detect_file_type(str(filepath))
+    if not has_veh_column(types):
+        raise ValueError(f"veh index 는 veh_id 컬럼이 있는 고정 크기 파일 전용: {filepath.name}")
+    return types[0]
+
+
+def build_veh_index(filepath: str | Path, write: bool = True, event_types=None) -> VehIndex:
+    """원본을 한 번 훑어 차량별 posting 생성 → sidecar 기록 (write=False 면 메모리만)."""
+    filepath = Path(filepath)
+    etype = _etype_with_veh(filepath, event_types)
+    st = filepath.stat()
+    record_size = EVENT_TYPES[etype][1]
+    raw = map_file(filepath)
+    num_records = len(raw) // record_size
+    veh = np.frombuffer(raw, dtype=EVENT_DTYPES[etype], count=num_records)['veh_id']
+
+    # stable sort → 같은 차량 안에서 레코드 번호 오름차순 유지
+    order = np.argsort(veh, kind='stable').astype(np.uint64)
+    uniq, group_starts, counts = np.unique(veh[order.astype(np.int64)],
+                                           return_index=True, return_counts=True)
+    deltas = order.copy()
+    deltas[1:] -= order[:-1]
+    deltas[group_starts] = order[group_starts]  # 차량마다 첫 값은 절대 번호
+
+    postings = encode_varint(deltas)
+    entries = np.zeros(len(uniq), dtype=_ENTRY_DTYPE)
+    entries['veh_id'] = uniq
+    entries['count'] = counts
+    if len(uniq):
+        nbytes = np.ones(len(deltas), dtype=np.int64)
+        for k in range(1, 5):
+            nbytes += deltas >= (1 << (7 * k))
+        entries['byte_len'] = np.add.reduceat(nbytes, group_starts)
+        entries['byte_off'] = np.cumsum(entries['byte_len']) - entries['byte_len']
+
+    idx = VehIndex(record_size, entries, postings)
+    if write:
+        header = _HEADER.pack(VEHIDX_MAGIC, VEHIDX_VERSION, st.st_size, st.st_mtime_ns,
+                              record_size, len(entries))
+        try:
+            with open(vehidx_path(filepath), 'wb') as f:
+                f.write(header)
+                f.write(entries.tobytes())
+                f.write(postings.tobytes())
+        except OSError:
+            pass  # 읽기 전용 로그 폴더 — 이번 실행은 메모리 index 로 충분
+    return idx
+
+
+def _read_sidecar(filepath: Path) -> VehIndex | None:
+    """sidecar 가 원본(size/mtime)과 일치하면 VehIndex, 아니면 None."""
+    try:
+        data = vehidx_path(filepath).read_bytes()
+        st = filepath.stat()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, size, mtime_ns, record_size, n_vehs = _HEADER.unpack_from(data)
+    entries_end = _HEADER.size + n_vehs * _ENTRY_DTYPE.itemsize
+    if (magic != VEHIDX_MAGIC or version != VEHIDX_VERSION
+            or size != st.st_size or mtime_ns != st.st_mtime_ns or len(data) < entries_end):
+        return None
+    entries = np.frombuffer(data, dtype=_ENTRY_DTYPE, count=n_vehs, offset=_HEADER.size)
+    postings = np.frombuffer(data, dtype=np.uint8, offset=entries_end)
+    return VehIndex(record_size, entries, postings)
+
+
+def load_veh_index(filepath: str | Path, event_types=None) -> VehIndex:
+    """유효한 sidecar 가 있으면 로드, 없거나 stale 이면 재생성."""
+    filepath = Path(filepath)
+    idx = _read_sidecar(filepath)
+    return idx if idx is not None else build_veh_index(filepath, event_types=event_types)
+
+
+def read_vehicle(filepath: str | Path, veh_id: int, ts_from: int | None = None,
+                 ts_to: int | None = None, event_types=None):
+    """veh_id 레코드만 structured ndarray 로 gather (파일 순서, ts 범위 optional)."""
+    filepath = Path(filepath)
+    etype = _etype_with_veh(filepath, event_types)
+    rows = load_veh_index(filepath, event_types).record_indices(veh_id)
+    raw = map_file(filepath)  # 레코드 수는 같은 매핑에서 — 녹화 중 파일이 자라도 안전
+    arr = np.frombuffer(raw, dtype=EVENT_DTYPES[etype], count=len(raw) // EVENT_TYPES[etype][1])
+    out = arr[rows]
+    if 'ts' in COLUMNS[etype]:
+        if ts_from is not None:
+            out = out[out['ts'] >= ts_from]
+        if ts_to is not None:
+            out = out[out['ts'] <= ts_to]
+    return out
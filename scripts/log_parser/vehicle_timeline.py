@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+차량 타임라인 — 소스별 시간순 slice 를 heap 으로 lazy 병합 (--veh / --vehs).
+
+예전 cmd_vehicle_timeline 은 load_session 이 만든 6개 레코드 list (edge_transit / path /
+replay / transfer / lock / checkpoint) 를 전부 훑어 그 차량 tuple 을 모은 뒤 한 번에
+정렬했다. 바쁜 차량의 몇 시간짜리 타임라인은 첫 줄이 나오기까지 전부 decode + dict
+변환 + 정렬을 기다려야 했다.
+
+여기서는 (소스, 차량) 마다 이미 시간순인 slice 를 만들고 (세션 캐시 컬럼 mask 또는
+.vehidx gather — 파일 순서 = 기록 순서라 보통 ts 순), 그 slice 를 TIMELINE_CHUNK
+레코드씩 dict 로 바꾸며 heapq.merge 로 섞는다 → 출력은 바로 시작되고 메모리는 slice
+하나당 chunk 하나. 파일 안에서 ts 가 역전된 slice 만 통째로 변환 후 stable sort.
+
+heapq.merge 는 같은 ts 면 앞 입력이 먼저 — 입력 순서 (TIMELINE_SOURCES 순, 그 안에서
+차량 순) 가 예전 "소스 순서대로 모아 stable sort" 와 같은 동률 순서를 만든다.
+
+I/O:
+  Input:  session_dir (또는 load_session 결과 dict), 차량 ID 목록, ts 범위
+  Output:
+    - vehicle_slices(session_dir, veh_ids, ts_from, ts_to, cache) → [TimelineSlice] (numpy 필요)
+    - slices_from_records(data, veh_ids, ts_from, ts_to) → [TimelineSlice] (이미 로드한 dict list)
+    - merge_timeline(slices) → (ts, kind, record) iterator (ts 순)
+"""
+
+import heapq
+from dataclasses import dataclass
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from log_parser import FILE_SUFFIX_TO_TYPES
+
+# (파일 suffix, 타임라인 kind) — 같은 ts 면 이 순서대로 출력
+TIMELINE_SOURCES = (
+    ('edge_transit', 'EDGE'),
+    ('path', 'PATH'),
+    ('replay', 'SNAP'),
+    ('transfer', 'XFER'),
+    ('lock', 'LOCK'),
+    ('checkpoint', 'CP'),
+)
+
+# slice 하나에서 한 번에 dict 로 바꾸는 레코드 수
+TIMELINE_CHUNK = 1024
+
+
+@dataclass
+class TimelineSlice:
+    kind: str
+    veh_id: int
+    count: int
+    records: Iterable[dict]  # ts 순 (동률은 파일 순)
+
+
+def _to_records(rows, etype: int) -> list[dict]:
+    if hasattr(rows, 'records'):  # session_cache.ColumnTable
+        return rows.records()
+    from log_parser import records_from_array
+    return records_from_array(rows, etype)
+
+
+def _stream_rows(rows, etype: int, chunk: int = TIMELINE_CHUNK) -> Iterator[dict]:
+    """slice → dict 를 chunk 단위로 lazy 하게 (ts 역전이 있으면 전부 변환 후 stable sort)."""
+    import numpy as np
+    ts = np.asarray(rows['ts'], dtype=np.int64)
+    if (np.diff(ts) < 0).any():
+        yield from sorted(_to_records(rows, etype), key=itemgetter('ts'))
+        return
+    for start in range(0, len(ts), chunk):
+        yield from _to_records(rows[start:start + chunk], etype)
+
+
+def vehicle_slices(session_dir: str | Path, veh_ids: list[int], ts_from: int, ts_to: int,
+                   cache: bool = True) -> list[TimelineSlice]:
+    """세션 파일에서 (소스, 차량) 별 시간순 slice — 레코드 dict 변환은 아직 안 함."""
+    from session_cache import load_table
+    from veh_index import read_vehicle
+
+    kinds = dict(TIMELINE_SOURCES)
+    rank = {kind: i for i, (_, kind) in enumerate(TIMELINE_SOURCES)}
+    slices = []
+    # 파일은 load_session 과 같은 이름 순으로 읽고, slice 는 TIMELINE_SOURCES 순으로 정렬
+    for f in sorted(Path(session_dir).glob('*.bin')):
+        suffix = next((s for s in kinds if f.stem.endswith(f'_{s}')), None)
+        if suffix is None:
+            continue
+        etype = FILE_SUFFIX_TO_TYPES[suffix][0]
+        table = load_table(f, etype) if cache else None
+        loaded = 0
+        for veh in veh_ids:
+            if table is not None:
+                keep = table['veh_id'] == veh
+                keep &= (table['ts'] >= ts_from) & (table['ts'] <= ts_to)
+                rows = table.take(keep)
+            else:
+                rows = read_vehicle(f, veh, ts_from, ts_to)
+            if len(rows):
+                slices.append(TimelineSlice(kinds[suffix], veh, len(rows), _stream_rows(rows, etype)))
+                loaded += len(rows)
+        if loaded:
+            print(f"  loaded {f.name}: {loaded:,} records")
+    # stable — 같은 소스 안에서는 파일 순, 차량 순 유지
+    slices.sort(key=lambda s: rank[s.kind])
+    return slices
+
+
+def slices_from_records(data: dict, veh_ids: list[int], ts_from: int,
+                        ts_to: int) -> list[TimelineSlice]:
+    """load_session (또는 --shell 의 HotSession) 결과 dict list 에서 같은 slice 목록."""
+    slices = []
+    for suffix, kind in TIMELINE_SOURCES:
+        records = data.get(suffix, [])
+        for veh in veh_ids:
+            rows = [r for r in records if r['veh_id'] == veh and ts_from <= r['ts'] <= ts_to]
+            if rows:
+                rows.sort(key=itemgetter('ts'))
+                slices.append(TimelineSlice(kind, veh, len(rows), rows))
+    return slices
+
+
+def _tagged(s: TimelineSlice) -> Iterator[tuple[int, str, dict]]:
+    for r in s.records:
+        yield r['ts'], s.kind, r
+
+
+def merge_timeline(slices: list[TimelineSlice]) -> Iterator[tuple[int, str, dict]]:
+    """slice 들을 heap 으로 병합 → (ts, kind, record), ts 순 (동률은 slice 순서)."""
+    return heapq.merge(*(_tagged(s) for s in slices), key=itemgetter(0))
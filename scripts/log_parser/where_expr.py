@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+--where 술어 표현식 → numpy boolean mask.
+
+cmd_* 마다 veh / ts / node / action / flags 용 if 체인을 레코드 단위로 돌리던 것을
+공용 필터 레이어로 대체. 표현식은 Python 문법의 안전한 부분집합만 허용
+(ast 로 파싱 후 화이트리스트 노드만 컴파일 — eval 안 씀):
+
+    veh_id in (41, 108) and wait_ms > 1000 and node_idx == 215
+    exit_ts - enter_ts > 5000
+    (cp_flags & 1) != 0 and not action == 2
+    1000 <= ts <= 5000
+
+  - 이름: COLUMNS 의 컬럼명 (파일 타입별로 다름)
+  - 상수: 정수/실수, in / not in 의 우변은 상수 tuple/list
+  - 연산: and or not, == != < <= > >=, in / not in, + - * // % & |
+
+컴파일 결과 Predicate 는 structured ndarray 에 mask(arr) 로 적용 (벡터 연산 한 번),
+dict 레코드에는 matches(r) 로 적용 (numpy 없는 fallback 경로용 — numpy 없이도 동작).
+unsigned 컬럼은 int64 로 넓혀서 계산 — exit_ts - enter_ts 같은 뺄셈 underflow 방지.
+
+I/O:
+  Input:  expr 문자열
+  Output: compile_where(expr) → Predicate
+            .columns          # 참조하는 컬럼명 set
+            .applies_to(names)# 해당 컬럼이 모두 있는지
+            .mask(arr)        # (n,) bool ndarray
+            .matches(record)  # bool
+"""
+
+import ast
+import operator
+from functools import reduce
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_CMP_OPS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+_BIN_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+}
+
+
+class WhereError(ValueError):
+    """--where 표현식 파싱/적용 오류."""
+
+
+def _is_array(v) -> bool:
+    return np is not None and isinstance(v, np.ndarray)
+
+
+def _column(table, name):
+    v = table[name]
+    if _is_array(v) and v.dtype.kind == 'u':
+        return v.astype(np.int64)
+    return v
+
+
+def _bool(v):
+    return v.astype(bool, copy=False) if _is_array(v) else bool(v)
+
+
+def _not(v):
+    return ~v if _is_array(v) else not v
+
+
+def _isin(v, values: tuple, invert: bool):
+    if _is_array(v):
+        return np.isin(v, values, invert=invert)
+    return (v in values) != invert
+
+
+class Predicate:
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.columns: set[str] = set()
+        try:
+            tree = ast.parse(expr.strip(), mode='eval')
+        except SyntaxError as e:
+            raise WhereError(f"--where 구문 오류: {expr!r} ({e.msg})") from None
+        self._fn = self._compile(tree.body)
+
+    def _compile(self, node):
+        if isinstance(node, ast.BoolOp):
+            fns = [self._compile(v) for v in node.values]
+            op = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+            return lambda t: reduce(op, (_bool(f(t)) for f in fns))
+
+        if isinstance(node, ast.UnaryOp):
+            inner = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda t: _not(_bool(inner(t)))
+            if isinstance(node.op, ast.USub):
+                return lambda t: -inner(t)
+            raise WhereError(f"지원하지 않는 단항 연산: {ast.unparse(node)}")
+
+        if isinstance(node, ast.Compare):
+            left = self._compile(node.left)
+            parts = []
+            for op, comp in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    values = self._const_list(comp)
+                    negate = isinstance(op, ast.NotIn)
+                    parts.append(lambda t, lf=left, vs=values, neg=negate:
+                                 _isin(lf(t), vs, neg))
+                elif type(op) in _CMP_OPS:
+                    right = self._compile(comp)
+                    parts.append(lambda t, lf=left, rf=right, fn=_CMP_OPS[type(op)]:
+                                 fn(lf(t), rf(t)))
+                    left = right  # a < b < c → (a < b) and (b < c)
+                else:
+                    raise WhereError(f"지원하지 않는 비교 연산: {ast.unparse(node)}")
+            return lambda t: reduce(operator.and_, (_bool(p(t)) for p in parts))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            lf, rf, fn = self._compile(node.left), self._compile(node.right), _BIN_OPS[type(node.op)]
+            return lambda t: fn(lf(t), rf(t))
+
+        if isinstance(node, ast.Name):
+            self.columns.add(node.id)
+            return lambda t, name=node.id: _column(t, name)
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return lambda t, v=node.value: v
+
+        raise WhereError(f"지원하지 않는 구문: {ast.unparse(node)!r} (in {self.expr!r})")
+
+    @staticmethod
+    def _const_list(node) -> tuple:
+        if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+            try:
+                return tuple(ast.literal_eval(e) for e in node.elts)
+            except ValueError:
+                pass
+        raise WhereError(f"in 의 우변은 상수 목록이어야 함: {ast.unparse(node)}")
+
+    def applies_to(self, names) -> bool:
+        return self.columns <= set(names)
+
+    def mask(self, arr) -> 'np.ndarray':
+        """structured ndarray → (n,) bool mask."""
+        missing = self.columns - set(arr.dtype.names or ())
+        if missing:
+            raise WhereError(f"--where 컬럼 없음: {sorted(missing)} (가능: {list(arr.dtype.names)})")
+        out = np.asarray(self._fn(arr), dtype=bool)
+        return np.broadcast_to(out, (len(arr),)) if out.ndim == 0 else out
+
+    def matches(self, record: dict) -> bool:
+        return bool(self._fn(record))
+
+    def __repr__(self) -> str:
+        return f"Predicate({self.expr!r})"
+
+
+def compile_where(expr: str) -> Predicate:
+    return Predicate(expr)